@@ -0,0 +1,82 @@
+"""In-process LRU cache of serialized read-endpoint responses.
+
+/api/games and /api/facets only change when a refresh saves, so their JSON
+bodies are cached by (path, normalized parameters, data version). A save
+changes the data version, which makes every older entry unreachable; LRU
+eviction then drops them. Each entry carries a strong ETag (a hash of the
+body) so clients can revalidate with If-None-Match and get a 304.
+
+The size bound is configurable via env:
+    API_CACHE_MAX_ENTRIES   responses kept (default 256)
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+
+def cache_key(path: str, params: Dict[str, Any], version: str) -> Hashable:
+    """Key for a response; list parameters are order-insensitive."""
+    normalized = {
+        name: sorted(set(value)) if isinstance(value, (list, tuple, set)) else value
+        for name, value in params.items()
+        if value is not None
+    }
+    return path, json.dumps(normalized, sort_keys=True), version
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 specifies for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class ApiResponseCache:
+    """Thread-safe LRU of response bodies with their ETags."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or int(os.getenv("API_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES)))
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, body: bytes) -> CachedResponse:
+        entry = CachedResponse(body=body, etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,8 +1,14 @@
 import httpx
+import io
+import json
+import os
 import xml.etree.ElementTree as ET
 import asyncio
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional, Union
 from .models import Game
+from .http_cache import ResponseCache
+from .ratelimit import AdaptiveLimiter
+from .retry import BGGRequestError, RetryPolicy, get_with_retry
 from .util import rate_limit_sleep
 
 BASE = "https://boardgamegeek.com/xmlapi2"
@@ -10,9 +16,14 @@ GEEKITEMS = "https://boardgamegeek.com/api/geekitems"
 # Community weight (complexity) lives in BGG's dynamic stats API. The xmlapi2
 # /thing endpoint now rejects cookie auth (401), so we read it from here.
 DYNAMICINFO = "https://api.geekdo.com/api/dynamicinfo"
-MAX_CONCURRENT = 5
-REDUCED_DELAY = 0.3
 MAX_POLL_RETRIES = 30
+# xmlapi2 /thing accepts up to 20 comma-separated ids per request.
+THING_BATCH_SIZE = 20
+
+# on_progress(enriched, failed, total), called as enrichment advances.
+ProgressCallback = Callable[[int, int, int], None]
+# on_enriched(games), called with each group of freshly enriched games.
+EnrichedCallback = Callable[[List[Game]], None]
 
 
 async def get_bgg_session(client: httpx.AsyncClient, username: str, password: str) -> str:
@@ -35,18 +46,21 @@ async def fetch_collection(
     client: httpx.AsyncClient,
     username: str,
     session_cookie: Optional[str] = None,
-) -> Tuple[List[int], Dict[int, Optional[float]], str]:
+    limiter: Optional[AdaptiveLimiter] = None,
+    retry: Optional[RetryPolicy] = None,
+) -> Tuple[List[int], Dict[int, Optional[float]], List[Game]]:
     """
-    Returns (game_ids, user_ratings_by_id, raw_xml) from the BGG collection.
+    Returns (game_ids, user_ratings_by_id, base_games) from the BGG collection.
+    base_games are the unenriched Games parsed from the collection XML.
     Authenticated via httpx cookie jar (session_cookie param kept for compat).
     """
     params = {"username": username, "own": 1, "stats": 1}
-    ratings: Dict[int, Optional[float]] = {}
-    ids: List[int] = []
     poll_attempts = 0
 
     while True:
-        r = await client.get(f"{BASE}/collection", params=params, timeout=60)
+        r = await get_with_retry(
+            client, f"{BASE}/collection", limiter=limiter, retry=retry, params=params, timeout=60
+        )
 
         if r.status_code == 202:
             poll_attempts += 1
@@ -68,27 +82,42 @@ async def fetch_collection(
             raise RuntimeError("BoardGameGeek is temporarily unavailable. Try again in a few minutes.")
 
         r.raise_for_status()
-
-        root = ET.fromstring(r.text)
-        items = root.findall("item") or root.findall(".//item")
-
-        for item in items:
-            gid = int(item.attrib.get("objectid"))
-            ids.append(gid)
-            stats = item.find("stats")
-            my = None
-            if stats is not None:
-                rating = stats.find("rating")
-                if rating is not None:
-                    val = rating.attrib.get("value")
-                    try:
-                        my = float(val) if val not in (None, "N/A") else None
-                    except (ValueError, TypeError):
-                        my = None
-            ratings[gid] = my
         break
 
-    return ids, ratings, r.text
+    # Large collections are multi-megabyte; keep the parse off the event loop.
+    return await asyncio.to_thread(parse_collection, r.content)
+
+
+async def fetch_collections(
+    client: httpx.AsyncClient,
+    usernames: List[str],
+    session_cookie: Optional[str] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    retry: Optional[RetryPolicy] = None,
+) -> Tuple[List[int], Dict[str, Dict[int, Optional[float]]], List[Game]]:
+    """Fetch several users' collections concurrently and merge them.
+
+    Returns (unique game_ids, user_ratings_by_id per username, base_games).
+    Each objectid appears once in base_games however many users own it, so
+    it is enriched only once. A game's my_rating is the first username's
+    rating, or None if that user doesn't own it; every user's own ratings
+    are in the per-username dict.
+    """
+    results = await asyncio.gather(*(
+        fetch_collection(client, u, session_cookie=session_cookie, limiter=limiter, retry=retry)
+        for u in usernames
+    ))
+
+    primary = results[0][1] if results else {}
+    ratings: Dict[str, Dict[int, Optional[float]]] = {}
+    merged: Dict[int, Game] = {}
+    for username, (_, user_ratings, games) in zip(usernames, results):
+        ratings[username] = user_ratings
+        for g in games:
+            if g.id not in merged:
+                g.my_rating = primary.get(g.id)
+                merged[g.id] = g
+    return list(merged), ratings, list(merged.values())
 
 
 # Alias for backward compatibility with tests
@@ -101,6 +130,55 @@ async def fetch_collection_ids(
     return ids, ratings
 
 
+def _parse_my_rating(item: ET.Element) -> Optional[float]:
+    stats = item.find("stats")
+    if stats is None:
+        return None
+    rating = stats.find("rating")
+    if rating is None:
+        return None
+    val = rating.attrib.get("value")
+    try:
+        return float(val) if val not in (None, "N/A") else None
+    except (ValueError, TypeError):
+        return None
+
+
+def parse_collection(
+    xml: Union[bytes, str],
+) -> Tuple[List[int], Dict[int, Optional[float]], List[Game]]:
+    """Parse collection XML in one streaming pass.
+
+    Returns (game_ids, user_ratings_by_id, base_games). Each <item> is turned
+    into a Game as soon as it closes and then discarded, so memory stays
+    bounded by one item rather than the whole tree. Duplicate objectids keep
+    their first entry in base_games.
+    """
+    if isinstance(xml, str):
+        xml = xml.encode("utf-8")
+    ids: List[int] = []
+    ratings: Dict[int, Optional[float]] = {}
+    games: List[Game] = []
+
+    context = ET.iterparse(io.BytesIO(xml), events=("start", "end"))
+    _, root = next(context)
+    for event, elem in context:
+        if event != "end" or elem.tag != "item":
+            continue
+        gid = int(elem.attrib.get("objectid"))
+        ids.append(gid)
+        first = gid not in ratings
+        ratings[gid] = _parse_my_rating(elem)
+        if first:
+            games.append(_parse_collection_item(elem, ratings))
+        root.clear()
+
+    # Like BGG's own collection view, the last duplicate's rating wins.
+    for g in games:
+        g.my_rating = ratings[g.id]
+    return ids, ratings, games
+
+
 def _parse_collection_item(item: ET.Element, my_ratings: Dict[int, Optional[float]]) -> Game:
     """Extract all available fields from a collection <item> element."""
     gid = int(item.attrib.get("objectid"))
@@ -162,40 +240,93 @@ def _parse_avgweight(payload: dict) -> Optional[float]:
     return w or None
 
 
-async def fetch_weight(client: httpx.AsyncClient, game_id: int) -> Optional[float]:
-    """Fetch a game's community weight from BGG's dynamicinfo API (no auth)."""
+async def _get_json(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict,
+    cache: Optional[ResponseCache],
+    endpoint: str,
+    key: int,
+    limiter: Optional[AdaptiveLimiter] = None,
+    retry: Optional[RetryPolicy] = None,
+) -> dict:
+    """GET a JSON API through the response cache (read and written off the event loop).
+
+    Fresh entries skip the network. Stale ones are revalidated with their
+    ETag/Last-Modified, and a 304 re-serves the cached body. If the request
+    still fails after retries, a stale cached body is better than nothing;
+    with no cached body BGGRequestError is raised.
+    """
+    cached = await asyncio.to_thread(cache.get, endpoint, key) if cache is not None else None
+    if cached is not None and cached.fresh:
+        return json.loads(cached.body)
+
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
     try:
-        r = await client.get(
-            DYNAMICINFO,
-            params={"objectid": game_id, "objecttype": "thing"},
-            timeout=30,
+        r = await get_with_retry(
+            client, url, limiter=limiter, retry=retry, params=params, headers=headers, timeout=30
         )
+        if r.status_code == 304 and cached is not None:
+            await asyncio.to_thread(cache.touch, endpoint, key)
+            return json.loads(cached.body)
         if r.status_code != 200:
-            return None
-        return _parse_avgweight(r.json())
-    except Exception as e:
-        print(f"Error fetching weight for game {game_id}: {e}")
-        return None
+            raise BGGRequestError(f"{endpoint} {key}: HTTP {r.status_code}")
+        payload = r.json()
+    except (BGGRequestError, ValueError):
+        if cached is not None:
+            return json.loads(cached.body)
+        raise
+    if cache is not None:
+        await asyncio.to_thread(cache.put, endpoint, key, r.text, r.headers.get("etag"), r.headers.get("last-modified"))
+    return payload
+
+
+async def fetch_weight(
+    client: httpx.AsyncClient,
+    game_id: int,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    retry: Optional[RetryPolicy] = None,
+) -> Optional[float]:
+    """Fetch a game's community weight from BGG's dynamicinfo API (no auth).
+
+    None means BGG has no weight for the game; a failed request raises
+    BGGRequestError so callers can tell the two apart.
+    """
+    payload = await _get_json(
+        client, DYNAMICINFO,
+        {"objectid": game_id, "objecttype": "thing"},
+        cache, "dynamicinfo", game_id, limiter, retry,
+    )
+    return _parse_avgweight(payload)
 
 
 async def fetch_game_links(
     client: httpx.AsyncClient,
     game: Game,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    retry: Optional[RetryPolicy] = None,
 ) -> Game:
     """
     Fetch mechanics, categories, designers, artists, publishers for a game
     from BGG's internal geekitems API (no auth required).
-    Returns an updated Game with those fields populated.
+    Returns an updated Game with those fields populated; raises
+    BGGRequestError if the request fails.
     """
+    payload = await _get_json(
+        client, GEEKITEMS,
+        {"nosession": 1, "objecttype": "thing", "objectid": game.id},
+        cache, "geekitems", game.id, limiter, retry,
+    )
     try:
-        r = await client.get(
-            GEEKITEMS,
-            params={"nosession": 1, "objecttype": "thing", "objectid": game.id},
-            timeout=30,
-        )
-        if r.status_code != 200:
-            return game
-        item = r.json().get("item", {})
+        item = payload.get("item") or {}
         links = item.get("links", {})
 
         def names(key):
@@ -219,46 +350,266 @@ async def fetch_game_links(
             artists=names("boardgameartist"),
             publishers=names("boardgamepublisher"),
         )
-    except Exception as e:
-        print(f"Error fetching geekitems for game {game.id}: {e}")
-        return game
+    except (AttributeError, KeyError, TypeError) as e:
+        raise BGGRequestError(f"geekitems {game.id}: malformed payload ({e!r})") from e
+
+
+def make_thing_client() -> httpx.AsyncClient:
+    """Client for batched xmlapi2 /thing calls.
+
+    /thing rejects cookie auth (401), so this client has its own empty cookie
+    jar and never carries the login session. If BGG_API_TOKEN is set it is
+    sent as a bearer token (BGG's registered-application auth).
+    """
+    headers = {}
+    token = os.getenv("BGG_API_TOKEN")
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return httpx.AsyncClient(
+        headers=headers,
+        limits=httpx.Limits(max_keepalive_connections=5, max_connections=5),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+    )
+
+
+def _parse_things(xml: bytes) -> Dict[int, ET.Element]:
+    """Map id -> <item> for a /thing response."""
+    root = ET.fromstring(xml)
+    return {int(item.attrib["id"]): item for item in root.iter("item") if item.attrib.get("id")}
+
+
+def _game_from_thing(game: Game, item: ET.Element) -> Game:
+    """Merge a /thing?stats=1 <item> into a collection-parsed Game."""
+
+    def names(link_type):
+        return [
+            link.attrib["value"] for link in item.findall("link")
+            if link.attrib.get("type") == link_type and link.attrib.get("value")
+        ]
+
+    def text(path):
+        n = item.find(path)
+        return n.text.strip() if n is not None and n.text else None
+
+    weight = None
+    node = item.find("statistics/ratings/averageweight")
+    if node is not None:
+        try:
+            weight = float(node.attrib.get("value")) or None
+        except (TypeError, ValueError):
+            weight = None
+
+    return game.model_copy(update={
+        "image": game.image or text("image"),
+        "thumbnail": game.thumbnail or text("thumbnail"),
+        "weight": weight,
+        "mechanics": names("boardgamemechanic"),
+        "categories": names("boardgamecategory"),
+        "designers": names("boardgamedesigner"),
+        "artists": names("boardgameartist"),
+        "publishers": names("boardgamepublisher"),
+    })
+
+
+async def fetch_things_batch(
+    client: httpx.AsyncClient,
+    games: List[Game],
+    limiter: Optional[AdaptiveLimiter] = None,
+    retry: Optional[RetryPolicy] = None,
+) -> Dict[int, Game]:
+    """Enrich up to THING_BATCH_SIZE games with one xmlapi2 /thing request.
+
+    Returns enriched games by id; ids BGG left out of the response are
+    missing from the result. Raises on a non-200 or unparseable response so
+    the caller can fall back to the per-game path.
+    """
+    params = {"id": ",".join(str(g.id) for g in games), "stats": 1}
+    r = await get_with_retry(
+        client, f"{BASE}/thing", limiter=limiter, retry=retry, params=params, timeout=60
+    )
+    r.raise_for_status()
+    items = await asyncio.to_thread(_parse_things, r.content)
+    return {g.id: _game_from_thing(g, items[g.id]) for g in games if g.id in items}
+
+
+# Collection-level fields whose change means the stored enrichment may be
+# stale. Ratings are deliberately absent: averages drift with every BGG vote,
+# so they are always taken fresh from the collection without re-enriching.
+_ENRICHMENT_KEY_FIELDS = ("name", "year", "min_players", "max_players", "playing_time")
+
+
+def _needs_enrichment(game: Game, stored: Optional[Game]) -> bool:
+    """True if `game` must be re-fetched from geekitems/dynamicinfo."""
+    if stored is None:
+        return True
+    # A previous enrichment that came back empty is worth retrying.
+    if stored.weight is None and not (stored.mechanics or stored.categories):
+        return True
+    for field in _ENRICHMENT_KEY_FIELDS:
+        if getattr(game, field) != getattr(stored, field):
+            return True
+    # Stored images may have been filled in from geekitems, so only a
+    # collection-supplied image that differs counts as a change.
+    if game.image and game.image != stored.image:
+        return True
+    if game.thumbnail and game.thumbnail != stored.thumbnail:
+        return True
+    return False
+
+
+def _keep_previous(game: Game, stored: Optional[Game], links, weight) -> Game:
+    """Merge whatever did succeed with stored values for whatever failed."""
+    result = game if isinstance(links, Exception) else links
+    if isinstance(links, Exception) and stored is not None:
+        result = _reuse_stored(result, stored)
+    if isinstance(weight, Exception):
+        result.weight = stored.weight if stored is not None else None
+    else:
+        result.weight = weight
+    return result
+
+
+def _reuse_stored(game: Game, stored: Game) -> Game:
+    """Fresh collection fields on top of the stored enrichment data."""
+    return game.model_copy(update={
+        "image": game.image or stored.image,
+        "thumbnail": game.thumbnail or stored.thumbnail,
+        "weight": stored.weight,
+        "mechanics": list(stored.mechanics),
+        "categories": list(stored.categories),
+        "designers": list(stored.designers),
+        "artists": list(stored.artists),
+        "publishers": list(stored.publishers),
+    })
 
 
 async def fetch_all_games(
     auth_client: httpx.AsyncClient,
-    ids: List[int],
-    my_ratings: Dict[int, Optional[float]],
-    collection_xml: str,
+    base_games: List[Game],
+    existing: Optional[Dict[int, Game]] = None,
+    cache: Optional[ResponseCache] = None,
+    limiter: Optional[AdaptiveLimiter] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    thing_client: Optional[httpx.AsyncClient] = None,
+    checkpointed: Optional[Dict[int, Game]] = None,
+    on_enriched: Optional[EnrichedCallback] = None,
+    retry: Optional[RetryPolicy] = None,
+    previous: Optional[Dict[int, Game]] = None,
 ) -> List[Game]:
     """
-    Given the collection XML (already fetched), parse basic game data,
-    then enrich each game with links from the geekitems API in parallel.
+    Given the base games parsed from the collection (see fetch_collection),
+    enrich each game with links from the geekitems API in parallel.
+
+    If `existing` (stored games by id) is given, the refresh is incremental:
+    games that are new or whose collection-level fields changed are enriched,
+    the rest reuse their stored links and weight without any BGG request.
+    With a `cache`, geekitems/dynamicinfo responses are served from and
+    written to the persistent response cache.
+
+    All requests share one AdaptiveLimiter (a fresh one unless `limiter` is
+    given), and each game's geekitems and dynamicinfo calls run in parallel.
+    `on_progress` is called once up front and after every game; reused games
+    count as enriched.
+
+    With a `thing_client` (see make_thing_client) games are enriched in
+    batches of THING_BATCH_SIZE through xmlapi2 /thing. A failed batch, or
+    ids missing from its response, fall back to the per-game path.
+
+    `checkpointed` holds games already enriched earlier in a resumed run;
+    they are reused without any request. `on_enriched` receives each newly
+    enriched game (or /thing batch) as soon as it is ready, for checkpointing.
+
+    Requests are retried per `retry` (a default RetryPolicy with its own
+    circuit breaker unless given). A game that still fails keeps the links
+    and weight from `previous` (stored games by id) instead of being blanked,
+    counts as failed, and is not checkpointed so a resumed run retries it.
     """
-    root = ET.fromstring(collection_xml)
-    items = root.findall("item") or root.findall(".//item")
-    seen: set = set()
-    unique_items = []
-    for item in items:
-        gid = int(item.attrib.get("objectid"))
-        if gid not in seen:
-            seen.add(gid)
-            unique_items.append(item)
-    games = [_parse_collection_item(item, my_ratings) for item in unique_items]
-    print(f"Parsed {len(games)} games from collection, fetching links...")
-
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+    games = list(base_games)
+
+    reused: List[Game] = []
+    if checkpointed:
+        pending = []
+        for g in games:
+            if g.id in checkpointed:
+                reused.append(_reuse_stored(g, checkpointed[g.id]))
+            else:
+                pending.append(g)
+        games = pending
+        print(f"Resuming: {len(reused)} games already enriched in this run")
+
+    if existing is not None:
+        stale = []
+        for g in games:
+            stored = existing.get(g.id)
+            if _needs_enrichment(g, stored):
+                stale.append(g)
+            else:
+                reused.append(_reuse_stored(g, stored))
+        print(f"Reusing {len(games) - len(stale)} unchanged games, fetching links for {len(stale)}...")
+        games = stale
+    else:
+        print(f"Parsed {len(games)} games from collection, fetching links...")
+
+    limiter = limiter or AdaptiveLimiter()
+    retry = retry or RetryPolicy()
+    previous = previous or {}
+    total = len(reused) + len(games)
+    done = len(reused)
+    failed = 0
+
+    def report():
+        if on_progress is not None:
+            on_progress(done, failed, total)
+
+    def checkpoint(new: List[Game]):
+        if on_enriched is not None and new:
+            on_enriched(new)
 
     async def enrich(game: Game) -> Game:
-        async with semaphore:
-            result = await fetch_game_links(auth_client, game)
-            result.weight = await fetch_weight(auth_client, game.id)
-            await asyncio.sleep(REDUCED_DELAY)
+        nonlocal done, failed
+        links, weight = await asyncio.gather(
+            fetch_game_links(auth_client, game, cache=cache, limiter=limiter, retry=retry),
+            fetch_weight(auth_client, game.id, cache=cache, limiter=limiter, retry=retry),
+            return_exceptions=True,
+        )
+        if isinstance(links, Exception) or isinstance(weight, Exception):
+            err = links if isinstance(links, Exception) else weight
+            print(f"Enrichment failed for game {game.id} ({err}); keeping previous values")
+            result = _keep_previous(game, previous.get(game.id), links, weight)
+            failed += 1
+            report()
             return result
-
-    tasks = [enrich(g) for g in games]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    enriched = []
+        links.weight = weight
+        done += 1
+        checkpoint([links])
+        report()
+        return links
+
+    async def enrich_batch(batch: List[Game]) -> List[Game]:
+        nonlocal done
+        try:
+            found = await fetch_things_batch(thing_client, batch, limiter=limiter, retry=retry)
+        except Exception as e:
+            print(f"Batch /thing request failed ({e}); falling back to per-game enrichment")
+            found = {}
+        done += len(found)
+        checkpoint(list(found.values()))
+        report()
+        rest = await asyncio.gather(
+            *(enrich(g) for g in batch if g.id not in found), return_exceptions=True
+        )
+        return list(found.values()) + list(rest)
+
+    report()
+    if thing_client is not None:
+        batches = [games[i:i + THING_BATCH_SIZE] for i in range(0, len(games), THING_BATCH_SIZE)]
+        batch_results = await asyncio.gather(*(enrich_batch(b) for b in batches))
+        results = [r for batch in batch_results for r in batch]
+    else:
+        tasks = [enrich(g) for g in games]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    enriched = reused
     for r in results:
         if isinstance(r, Exception):
             print(f"Game enrichment failed: {r}")
@@ -0,0 +1,99 @@
+"""Bitset inverted index over the link fields.
+
+Each mechanic, category, designer, artist and publisher maps to a Python
+int whose bit i is set when the game at position i carries it. Filters
+combine with &, | and ~ (AND/OR/NOT), and counts are popcounts, so a
+filter over thousands of games is a handful of word-wide operations.
+
+Positions are indexes into the game list the index was built from. The
+snapshot uses it for link filters; the static export ships it to the
+browser next to games.json (to_json), where data.js decodes the same
+little-endian bytes.
+"""
+import base64
+from typing import Dict, Iterable, List, Sequence
+
+from .facets import LINK_FACETS
+from .models import Game
+
+
+def _from_positions(positions: Iterable[int], size: int) -> int:
+    raw = bytearray((size + 7) // 8)
+    for pos in positions:
+        raw[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(raw, "little")
+
+
+def count(bits: int) -> int:
+    """Number of games in `bits`."""
+    return bits.bit_count()
+
+
+def positions(bits: int) -> List[int]:
+    """Positions of the games in `bits`, ascending."""
+    found = []
+    while bits:
+        low = bits & -bits
+        found.append(low.bit_length() - 1)
+        bits ^= low
+    return found
+
+
+class BitsetIndex:
+    """{field: {term: bitset of game positions}} for a list of games."""
+
+    def __init__(self, games: Sequence[Game], fields: Sequence[str] = LINK_FACETS):
+        self.size = len(games)
+        self.universe = (1 << self.size) - 1
+        self.bits: Dict[str, Dict[str, int]] = {}
+        for field in fields:
+            postings: Dict[str, List[int]] = {}
+            for pos, game in enumerate(games):
+                for name in getattr(game, field):
+                    postings.setdefault(name, []).append(pos)
+            self.bits[field] = {name: _from_positions(p, self.size) for name, p in postings.items()}
+
+    def term(self, field: str, name: str) -> int:
+        return self.bits[field].get(name, 0)
+
+    def any_of(self, field: str, names: Iterable[str]) -> int:
+        bits = 0
+        for name in names:
+            bits |= self.term(field, name)
+        return bits
+
+    def all_of(self, field: str, names: Iterable[str]) -> int:
+        bits = self.universe
+        for name in names:
+            bits &= self.term(field, name)
+        return bits
+
+    def none_of(self, field: str, names: Iterable[str]) -> int:
+        return self.universe & ~self.any_of(field, names)
+
+    def match(self, field: str, names: Iterable[str], mode: str = "any") -> int:
+        """Games with any, all or none of `names`, as a bitset."""
+        if mode == "all":
+            return self.all_of(field, names)
+        if mode == "none":
+            return self.none_of(field, names)
+        return self.any_of(field, names)
+
+    def facet_counts(self, field: str, bits: int) -> Dict[str, int]:
+        """{term: games in `bits` carrying it}, for terms with any."""
+        counts = {name: count(term & bits) for name, term in self.bits[field].items() if name}
+        return {name: n for name, n in counts.items() if n}
+
+    def to_bytes(self, bits: int) -> bytes:
+        """Little-endian bytes: bit i of byte j is position 8 * j + i."""
+        return bits.to_bytes((self.size + 7) // 8, "little")
+
+    def to_json(self) -> dict:
+        """{"size": n, "fields": {field: {term: base64 bitset}}} for the browser."""
+        return {
+            "size": self.size,
+            "fields": {
+                field: {name: base64.b64encode(self.to_bytes(bits)).decode("ascii") for name, bits in terms.items()}
+                for field, terms in self.bits.items()
+            },
+        }
@@ -1,3 +1,21 @@
+"""SQLite engines and sessions.
+
+Reads and writes go through separate engines so the API keeps serving
+while a refresh saves. The database runs in WAL mode, where readers see the
+last committed snapshot and never wait on the writer.
+
+- read_engine: a pool of read-only connections (`query_only`) with a large
+  page cache and memory-mapped I/O. get_db hands these to request handlers,
+  which query them on db_executor's read threads.
+- write_engine: a single connection with `synchronous=NORMAL`, which is
+  durable across application crashes in WAL mode and much cheaper than FULL.
+  Refresh jobs (get_session_factory) and schema creation use it.
+
+Both are tuned through environment variables (DB_READ_POOL_SIZE,
+DB_CACHE_SIZE_KIB, DB_MMAP_SIZE, DB_BUSY_TIMEOUT_MS, DB_SYNCHRONOUS).
+"""
+import os
+
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from pathlib import Path
@@ -7,31 +25,97 @@ DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 DATABASE_URL = f"sqlite:///{DATA_DIR}/games.db"
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    echo=False,
-)
+READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "5"))
+CACHE_SIZE_KIB = int(os.getenv("DB_CACHE_SIZE_KIB", str(64 * 1024)))
+MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL").upper()
 
 
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
-    """Enable FK enforcement so ON DELETE CASCADE works at the DB level."""
+def _execute_pragmas(dbapi_connection, pragmas) -> None:
     cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
+    for pragma in pragmas:
+        cursor.execute(f"PRAGMA {pragma}")
     cursor.close()
 
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def create_write_engine(url: str = DATABASE_URL):
+    """Single-connection engine in WAL mode with synchronous=NORMAL."""
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        # One writer at a time is all SQLite allows; queue here, not on the lock.
+        pool_size=1,
+        max_overflow=0,
+        echo=False,
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_writer_pragmas(dbapi_connection, connection_record):
+        # FK enforcement so ON DELETE CASCADE works at the DB level.
+        _execute_pragmas(dbapi_connection, [
+            "journal_mode=WAL",
+            f"synchronous={SYNCHRONOUS}",
+            "foreign_keys=ON",
+            f"busy_timeout={BUSY_TIMEOUT_MS}",
+            f"cache_size=-{CACHE_SIZE_KIB}",
+        ])
+
+    return engine
+
+
+def create_read_engine(url: str = DATABASE_URL):
+    """Pool of read-only connections with a big page cache and memory-mapped I/O."""
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=READ_POOL_SIZE,
+        max_overflow=READ_POOL_SIZE,
+        echo=False,
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_reader_pragmas(dbapi_connection, connection_record):
+        _execute_pragmas(dbapi_connection, [
+            "query_only=ON",
+            "foreign_keys=ON",
+            f"busy_timeout={BUSY_TIMEOUT_MS}",
+            f"cache_size=-{CACHE_SIZE_KIB}",
+            f"mmap_size={MMAP_SIZE}",
+        ])
+
+    return engine
+
+
+write_engine = create_write_engine()
+read_engine = create_read_engine()
+# Existing callers (init_db, `make db-reset`) create the schema through this.
+engine = write_engine
+
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    """Read-only session for request handlers.
+
+    Async so FastAPI doesn't take a threadpool slot to open and close it:
+    creating a session doesn't connect, and closing one only hands its
+    connection back to the pool. Handlers run their queries through
+    db_executor.read_executor.
+    """
+    db = ReadSessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_session_factory():
+    """Session factory for work that outlives a request (background refresh)."""
+    return SessionLocal
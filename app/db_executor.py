@@ -0,0 +1,47 @@
+"""Dedicated threads for blocking database work called from async code.
+
+db_storage is synchronous (SQLAlchemy over sqlite3). Sync endpoints would
+run it on Starlette's default threadpool, where it competes with every
+other sync dependency and file response; calling it from async code
+directly stalls the event loop. Instead, async endpoints and the refresh
+job hand their database calls to one of two bounded executors:
+
+- read_executor: DB_READ_WORKERS threads (default DB_READ_POOL_SIZE, the
+  read engine's connection pool), so reads never queue on the pool itself;
+  extra requests wait in the executor's queue without holding a thread.
+- write_executor: one thread, matching the write engine's single
+  connection. Refresh saves and checkpoints run here, off the loop, and
+  in submission order, so a refresh's session is only used by this thread.
+"""
+import asyncio
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, TypeVar
+
+from .database import READ_POOL_SIZE
+
+T = TypeVar("T")
+
+READ_WORKERS = int(os.getenv("DB_READ_WORKERS", str(READ_POOL_SIZE)))
+
+
+class DbExecutor:
+    """A fixed pool of threads that blocking database calls are awaited on."""
+
+    def __init__(self, workers: int, name: str):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Await fn(*args, **kwargs) on one of this executor's threads."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+
+    def submit(self, fn: Callable[..., T], *args, **kwargs) -> "Future[T]":
+        """Queue fn(*args, **kwargs) from sync code; await it later with asyncio.wrap_future."""
+        return self._pool.submit(fn, *args, **kwargs)
+
+
+read_executor = DbExecutor(READ_WORKERS, "db-read")
+write_executor = DbExecutor(1, "db-write")
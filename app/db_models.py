@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey
+from sqlalchemy import DDL, Column, Integer, String, Float, Text, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -12,11 +12,11 @@ class GameDB(Base):
     thumbnail = Column(Text, nullable=True)
     min_players = Column(Integer, nullable=True)
     max_players = Column(Integer, nullable=True)
-    playing_time = Column(Integer, nullable=True)
-    weight = Column(Float, nullable=True)
-    avg_rating = Column(Float, nullable=True)
-    bayes_rating = Column(Float, nullable=True)
-    my_rating = Column(Float, nullable=True)
+    playing_time = Column(Integer, nullable=True, index=True)
+    weight = Column(Float, nullable=True, index=True)
+    avg_rating = Column(Float, nullable=True, index=True)
+    bayes_rating = Column(Float, nullable=True, index=True)
+    my_rating = Column(Float, nullable=True, index=True)
     
     # Relationships for many-to-many fields
     mechanics = relationship("GameMechanic", back_populates="game", cascade="all, delete-orphan")
@@ -25,37 +25,162 @@ class GameDB(Base):
     artists = relationship("GameArtist", back_populates="game", cascade="all, delete-orphan")
     publishers = relationship("GamePublisher", back_populates="game", cascade="all, delete-orphan")
 
+# Link names are interned: each distinct mechanic, category, designer,
+# artist and publisher is stored once in its own term table, and the link
+# tables hold (game_id, term_id) integer pairs. The (term_id, game_id) index
+# serves "games with this term" lookups for filters and facet counts.
+
+
+class Mechanic(Base):
+    __tablename__ = "mechanics"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class Category(Base):
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class Designer(Base):
+    __tablename__ = "designers"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class Artist(Base):
+    __tablename__ = "artists"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class Publisher(Base):
+    __tablename__ = "publishers"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+
+
 class GameMechanic(Base):
     __tablename__ = "game_mechanics"
-    
+    __table_args__ = (Index("ix_game_mechanics_term_game", "term_id", "game_id"),)
+
     game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
-    mechanic = Column(String, primary_key=True)
+    term_id = Column(Integer, ForeignKey("mechanics.id"), primary_key=True)
     game = relationship("GameDB", back_populates="mechanics")
+    term = relationship("Mechanic")
 
 class GameCategory(Base):
     __tablename__ = "game_categories"
+    __table_args__ = (Index("ix_game_categories_term_game", "term_id", "game_id"),)
 
     game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
-    category = Column(String, primary_key=True)
+    term_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
     game = relationship("GameDB", back_populates="categories")
+    term = relationship("Category")
 
 class GameDesigner(Base):
     __tablename__ = "game_designers"
+    __table_args__ = (Index("ix_game_designers_term_game", "term_id", "game_id"),)
 
     game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
-    designer = Column(String, primary_key=True)
+    term_id = Column(Integer, ForeignKey("designers.id"), primary_key=True)
     game = relationship("GameDB", back_populates="designers")
+    term = relationship("Designer")
 
 class GameArtist(Base):
     __tablename__ = "game_artists"
+    __table_args__ = (Index("ix_game_artists_term_game", "term_id", "game_id"),)
 
     game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
-    artist = Column(String, primary_key=True)
+    term_id = Column(Integer, ForeignKey("artists.id"), primary_key=True)
     game = relationship("GameDB", back_populates="artists")
+    term = relationship("Artist")
 
 class GamePublisher(Base):
     __tablename__ = "game_publishers"
+    __table_args__ = (Index("ix_game_publishers_term_game", "term_id", "game_id"),)
 
     game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True)
-    publisher = Column(String, primary_key=True)
+    term_id = Column(Integer, ForeignKey("publishers.id"), primary_key=True)
     game = relationship("GameDB", back_populates="publishers")
+    term = relationship("Publisher")
+
+
+# Full-text index over each game's name, designers, publishers and mechanics,
+# keyed by rowid = games.id. save_games keeps it in sync; prefix indexes make
+# the prefix queries used for search-as-you-type cheap.
+GAMES_FTS_TABLE = "games_fts"
+event.listen(Base.metadata, "after_create", DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {GAMES_FTS_TABLE} USING fts5("
+    "name, designers, publishers, mechanics, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+).execute_if(dialect="sqlite"))
+event.listen(Base.metadata, "before_drop", DDL(
+    f"DROP TABLE IF EXISTS {GAMES_FTS_TABLE}"
+).execute_if(dialect="sqlite"))
+
+
+class RefreshRunDB(Base):
+    """One refresh attempt; unfinished runs are resumed by the next refresh."""
+    __tablename__ = "refresh_runs"
+
+    id = Column(String, primary_key=True)
+    username = Column(String, nullable=False, index=True)
+    started_at = Column(Float, nullable=False)
+    finished_at = Column(Float, nullable=True)
+    checkpoints = relationship("RefreshCheckpointDB", back_populates="run", cascade="all, delete-orphan")
+
+
+class RefreshCheckpointDB(Base):
+    """An enriched game saved mid-run, as Game JSON."""
+    __tablename__ = "refresh_checkpoints"
+
+    run_id = Column(String, ForeignKey("refresh_runs.id", ondelete="CASCADE"), primary_key=True)
+    game_id = Column(Integer, primary_key=True)
+    data = Column(Text, nullable=False)
+    run = relationship("RefreshRunDB", back_populates="checkpoints")
+
+
+class CollectionEntryDB(Base):
+    """A game in one user's collection, with that user's own rating.
+
+    Game metadata lives once in `games`; these rows say who owns what.
+    """
+    __tablename__ = "collection_entries"
+
+    username = Column(String, primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), primary_key=True, index=True)
+    my_rating = Column(Float, nullable=True)
+
+
+class FacetCountDB(Base):
+    """Precomputed facet count: games with `value` for `facet`.
+
+    Updated with the games that change whenever games or collections are
+    saved, and rebuilt by a full replace. username is "" for the
+    whole library, otherwise counts cover that user's collection only.
+    """
+    __tablename__ = "facet_counts"
+
+    username = Column(String, primary_key=True)
+    facet = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False)
+
+
+class DataVersionDB(Base):
+    """Single row whose version changes whenever games or collections are saved.
+
+    token is random per save, so two databases never share a version string.
+    """
+    __tablename__ = "data_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    token = Column(String, nullable=False)
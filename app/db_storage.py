@@ -1,21 +1,144 @@
-from typing import List, Optional
+import base64
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session, selectinload
-from sqlalchemy import and_, or_
+from sqlalchemy import (
+    and_, or_, bindparam, column, delete, func, insert, inspect, literal_column, select, table, text,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from .database import engine
-from .db_models import Base, GameDB, GameMechanic, GameCategory, GameDesigner, GameArtist, GamePublisher
-from .models import Game
+from .db_models import (
+    Base, GameDB, GameMechanic, GameCategory, GameDesigner, GameArtist, GamePublisher,
+    Mechanic, Category, Designer, Artist, Publisher,
+    RefreshRunDB, RefreshCheckpointDB, CollectionEntryDB, FacetCountDB, DataVersionDB, GAMES_FTS_TABLE,
+)
+from .facets import FACET_NAMES, LINK_FACETS, bucket_counts
+from .models import Facets, Game
+from .snapshot import Snapshot
 
+# Unfinished runs older than this are abandoned rather than resumed.
+RESUME_MAX_AGE = 24 * 3600
 
-def init_db():
-    """Initialize the database by creating all tables."""
-    Base.metadata.create_all(bind=engine)
 
+# (link model, term model) for each many-to-many Game field, in save order.
+_LINK_TABLES = {
+    "mechanics": (GameMechanic, Mechanic),
+    "categories": (GameCategory, Category),
+    "designers": (GameDesigner, Designer),
+    "artists": (GameArtist, Artist),
+    "publishers": (GamePublisher, Publisher),
+}
+# Before term interning, link tables stored the name itself in this column.
+_LEGACY_LINK_COLUMNS = {
+    "mechanics": "mechanic",
+    "categories": "category",
+    "designers": "designer",
+    "artists": "artist",
+    "publishers": "publisher",
+}
+# Keep IN (...) lists under SQLite's bound-parameter limit.
+_IN_CHUNK = 500
 
-def get_total_game_count(db: Session) -> int:
+_games_fts = table(GAMES_FTS_TABLE, column("rowid"), column(GAMES_FTS_TABLE))
+# bm25 column weights: name, designers, publishers, mechanics.
+_FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+# Rebuilds the full-text row for each game from the games and term tables.
+_FTS_INDEX_SQL = f"""
+INSERT INTO {GAMES_FTS_TABLE} (rowid, name, designers, publishers, mechanics)
+SELECT g.id, g.name,
+    (SELECT group_concat(t.name, ' ') FROM game_designers l JOIN designers t ON t.id = l.term_id
+     WHERE l.game_id = g.id),
+    (SELECT group_concat(t.name, ' ') FROM game_publishers l JOIN publishers t ON t.id = l.term_id
+     WHERE l.game_id = g.id),
+    (SELECT group_concat(t.name, ' ') FROM game_mechanics l JOIN mechanics t ON t.id = l.term_id
+     WHERE l.game_id = g.id)
+FROM games g
+"""
+
+
+def init_db(bind=None):
+    """Initialize the database by creating all tables.
+
+    Link tables from before term interning are migrated to term ids in the
+    same transaction.
+    """
+    with (bind or engine).begin() as conn:
+        legacy = _take_legacy_links(conn)
+        Base.metadata.create_all(bind=conn)
+        # create_all skips indexes added to tables that already exist.
+        for index in GameDB.__table__.indexes:
+            index.create(conn, checkfirst=True)
+        for field, pairs in legacy.items():
+            _insert_links(conn, field, pairs)
+        # A search index that is empty while games exist predates it; fill it.
+        if legacy or conn.execute(select(_games_fts.c.rowid).limit(1)).first() is None:
+            _index_games(conn)
+        if legacy or conn.execute(select(FacetCountDB.count).limit(1)).first() is None:
+            _store_facets(conn)
+        if get_data_version(conn) is None and conn.execute(select(GameDB.id).limit(1)).first() is not None:
+            _bump_data_version(conn)
+
+
+def _index_games(db, game_ids: Optional[List[int]] = None) -> None:
+    """Rebuild full-text rows for `game_ids`, or for every game."""
+    if game_ids is None:
+        db.execute(delete(_games_fts))
+        db.execute(text(_FTS_INDEX_SQL))
+        return
+    for i in range(0, len(game_ids), _IN_CHUNK):
+        chunk = game_ids[i:i + _IN_CHUNK]
+        db.execute(delete(_games_fts).where(_games_fts.c.rowid.in_(chunk)))
+        db.execute(
+            text(_FTS_INDEX_SQL + " WHERE g.id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": chunk},
+        )
+
+
+def _fts_query(search: str) -> Optional[str]:
+    """FTS5 MATCH expression requiring every word of `search` as a prefix."""
+    words = re.findall(r"\w+", search)
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _take_legacy_links(conn) -> Dict[str, List[Tuple[int, str]]]:
+    """Read and drop link tables that still store names; returns their rows."""
+    inspector = inspect(conn)
+    legacy = {}
+    for field, (model, _) in _LINK_TABLES.items():
+        table_name = model.__tablename__
+        column = _LEGACY_LINK_COLUMNS[field]
+        if not inspector.has_table(table_name):
+            continue
+        if column not in {c["name"] for c in inspector.get_columns(table_name)}:
+            continue
+        legacy[field] = [tuple(row) for row in conn.execute(text(f"SELECT game_id, {column} FROM {table_name}"))]
+        conn.execute(text(f"DROP TABLE {table_name}"))
+    return legacy
+
+
+def get_total_game_count(db: Session, username: Optional[str] = None) -> int:
+    if username:
+        return db.query(CollectionEntryDB).filter(CollectionEntryDB.username == username).count()
     return db.query(GameDB).count()
 
 
-def _to_game(game_db: GameDB) -> Game:
+def _term_names(db: Session) -> Dict[str, Dict[int, str]]:
+    """{field: {term_id: name}}; term tables are small enough to load whole."""
+    return {
+        field: {term_id: name for term_id, name in db.execute(select(term.id, term.name))}
+        for field, (_, term) in _LINK_TABLES.items()
+    }
+
+
+def _to_game(game_db: GameDB, names: Dict[str, Dict[int, str]]) -> Game:
     return Game(
         id=game_db.id,
         name=game_db.name,
@@ -29,45 +152,202 @@ def _to_game(game_db: GameDB) -> Game:
         avg_rating=game_db.avg_rating,
         bayes_rating=game_db.bayes_rating,
         my_rating=game_db.my_rating,
-        mechanics=[m.mechanic for m in game_db.mechanics],
-        categories=[c.category for c in game_db.categories],
-        designers=[d.designer for d in game_db.designers],
-        artists=[a.artist for a in game_db.artists],
-        publishers=[p.publisher for p in game_db.publishers],
+        mechanics=[names["mechanics"][m.term_id] for m in game_db.mechanics],
+        categories=[names["categories"][c.term_id] for c in game_db.categories],
+        designers=[names["designers"][d.term_id] for d in game_db.designers],
+        artists=[names["artists"][a.term_id] for a in game_db.artists],
+        publishers=[names["publishers"][p.term_id] for p in game_db.publishers],
     )
 
 
-def save_games(games: List[Game], db: Session) -> None:
-    """Replace all games in the database with the provided list."""
+def _lookup_terms(db, term_table, names: List[str]) -> Dict[str, int]:
+    ids: Dict[str, int] = {}
+    for i in range(0, len(names), _IN_CHUNK):
+        rows = db.execute(
+            select(term_table.c.name, term_table.c.id).where(term_table.c.name.in_(names[i:i + _IN_CHUNK]))
+        )
+        ids.update((name, term_id) for name, term_id in rows)
+    return ids
+
+
+def _intern_terms(db, field: str, names: List[str]) -> Dict[str, int]:
+    """name -> term id for `names`, inserting the ones not stored yet."""
+    term_table = _LINK_TABLES[field][1].__table__
+    names = list(dict.fromkeys(names))
+    ids = _lookup_terms(db, term_table, names)
+    missing = [n for n in names if n not in ids]
+    if missing:
+        db.execute(insert(term_table), [{"name": n} for n in missing])
+        ids.update(_lookup_terms(db, term_table, missing))
+    return ids
+
+
+def _insert_links(db, field: str, pairs: List[Tuple[int, str]]) -> None:
+    """Insert (game_id, name) link rows for `field`, interning the names."""
+    if not pairs:
+        return
+    ids = _intern_terms(db, field, [name for _, name in pairs])
+    link_table = _LINK_TABLES[field][0].__table__
+    db.execute(insert(link_table), [{"game_id": gid, "term_id": ids[name]} for gid, name in pairs])
+
+
+@dataclass
+class SaveStats:
+    """Rows written by save_games."""
+    inserted: int = 0
+    updated: int = 0
+    deleted: int = 0
+    links_added: int = 0
+    links_removed: int = 0
+
+
+# Game columns stored in the games table, in table order.
+_GAME_COLUMNS = (
+    "id", "name", "year", "image", "thumbnail", "min_players", "max_players",
+    "playing_time", "weight", "avg_rating", "bayes_rating", "my_rating",
+)
+
+
+def _game_row(game: Game) -> dict:
+    return {column: getattr(game, column) for column in _GAME_COLUMNS}
+
+
+def _link_pairs(games: List[Game], field: str) -> Dict[Tuple[int, str], None]:
+    """(game_id, value) link rows in game order; a dict so duplicates collapse."""
+    return dict.fromkeys((g.id, value) for g in games for value in getattr(g, field))
+
+
+def save_games(games: List[Game], db: Session, replace: bool = False) -> SaveStats:
+    """Make the stored games exactly `games`.
+
+    By default the incoming games are diffed against what is stored: new and
+    changed games are upserted, only link rows that differ are inserted or
+    deleted, and games no longer present are removed, so the write volume
+    (and the time the SQLite write lock is held) scales with the change
+    rather than the collection. `replace=True` deletes everything and
+    bulk-inserts the lot instead, which is also what an empty database gets.
+    """
+    games = list({g.id: g for g in games}.values())
+    if replace or db.query(GameDB.id).first() is None:
+        return _replace_games(games, db)
+
+    # Work out the whole diff before the first write: SQLite only takes the
+    # write lock at the first DML statement, so reads stay outside it.
+    stats = SaveStats()
+    table = GameDB.__table__
+    stored = {row.id: tuple(row) for row in db.execute(select(*(table.c[c] for c in _GAME_COLUMNS)))}
+
+    upserts = []
+    for g in games:
+        row = _game_row(g)
+        old = stored.get(g.id)
+        if old is None:
+            stats.inserted += 1
+            upserts.append(row)
+        elif old != tuple(row.values()):
+            stats.updated += 1
+            upserts.append(row)
+
+    incoming_ids = {g.id for g in games}
+    removed = [gid for gid in stored if gid not in incoming_ids]
+    stats.deleted = len(removed)
+
+    # Links are diffed by name; stale ones are deleted by term id.
+    names = _term_names(db)
+    link_changes = []
+    for field, (model, _) in _LINK_TABLES.items():
+        link_table = model.__table__
+        term_names = names[field]
+        # Plain tuples: hashing SQLAlchemy Rows is several times slower.
+        current = {
+            (gid, term_names[term_id])
+            for gid, term_id in db.execute(select(link_table.c.game_id, link_table.c.term_id))
+        }
+        wanted = _link_pairs(games, field)
+        # Links of removed games go with the games below.
+        stale = [(gid, v) for gid, v in current if gid in incoming_ids and (gid, v) not in wanted]
+        added = [pair for pair in wanted if pair not in current]
+        term_ids = {name: term_id for term_id, name in term_names.items()}
+        link_changes.append((field, link_table, [(gid, term_ids[v]) for gid, v in stale], added))
+        stats.links_added += len(added)
+        stats.links_removed += len(stale)
+
+    touched = {row["id"] for row in upserts}
+    for _, _, stale, added in link_changes:
+        touched.update(gid for gid, _ in stale)
+        touched.update(gid for gid, _ in added)
+    # Facet counts of the games about to change, per stored collection, so
+    # only their difference is written once the games are saved.
+    facet_scopes = [None] + [u for (u,) in db.execute(select(CollectionEntryDB.username).distinct())]
+    counts_before = {
+        username: _facet_counts_of(db, sorted(touched | set(removed)), username) for username in facet_scopes
+    }
+
+    if upserts:
+        stmt = sqlite_insert(table)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.id],
+                set_={c: stmt.excluded[c] for c in _GAME_COLUMNS if c != "id"},
+            ),
+            upserts,
+        )
+    for field, link_table, stale, added in link_changes:
+        if stale:
+            db.execute(
+                delete(link_table).where(
+                    link_table.c.game_id == bindparam("b_game_id"), link_table.c.term_id == bindparam("b_term_id")
+                ),
+                [{"b_game_id": gid, "b_term_id": term_id} for gid, term_id in stale],
+            )
+        _insert_links(db, field, added)
+    for i in range(0, len(removed), _IN_CHUNK):
+        chunk = removed[i:i + _IN_CHUNK]
+        for model, _ in _LINK_TABLES.values():
+            db.execute(delete(model.__table__).where(model.__table__.c.game_id.in_(chunk)))
+        db.execute(delete(table).where(table.c.id.in_(chunk)))
+        db.execute(delete(_games_fts).where(_games_fts.c.rowid.in_(chunk)))
+    if stats.links_removed or removed:
+        _prune_terms(db)
+
+    if touched:
+        _index_games(db, sorted(touched))
+    if upserts or removed or stats.links_added or stats.links_removed:
+        for username, before in counts_before.items():
+            _update_facets(db, username, _facet_counts_of(db, sorted(touched), username), before)
+        _bump_data_version(db)
+
+    db.commit()
+    return stats
+
+
+def _prune_terms(db: Session) -> None:
+    """Delete terms no game links to any more."""
+    for model, term in _LINK_TABLES.values():
+        db.execute(delete(term.__table__).where(term.__table__.c.id.not_in(select(model.__table__.c.term_id))))
+
+
+def _replace_games(games: List[Game], db: Session) -> SaveStats:
+    """Delete every stored game and bulk-insert `games` with Core executemany."""
     # Delete child rows first (bulk delete bypasses ORM cascade).
-    db.query(GameMechanic).delete()
-    db.query(GameCategory).delete()
-    db.query(GameDesigner).delete()
-    db.query(GameArtist).delete()
-    db.query(GamePublisher).delete()
-    db.query(GameDB).delete()
+    for model, term in _LINK_TABLES.values():
+        db.execute(delete(model.__table__))
+        db.execute(delete(term.__table__))
+    db.execute(delete(GameDB.__table__))
 
-    for game in games:
-        db.add(GameDB(
-            id=game.id, name=game.name, year=game.year,
-            image=game.image, thumbnail=game.thumbnail,
-            min_players=game.min_players, max_players=game.max_players,
-            playing_time=game.playing_time, weight=game.weight,
-            avg_rating=game.avg_rating, bayes_rating=game.bayes_rating,
-            my_rating=game.my_rating,
-        ))
-        for m in game.mechanics:
-            db.add(GameMechanic(game_id=game.id, mechanic=m))
-        for c in game.categories:
-            db.add(GameCategory(game_id=game.id, category=c))
-        for d in game.designers:
-            db.add(GameDesigner(game_id=game.id, designer=d))
-        for a in game.artists:
-            db.add(GameArtist(game_id=game.id, artist=a))
-        for p in game.publishers:
-            db.add(GamePublisher(game_id=game.id, publisher=p))
+    stats = SaveStats(inserted=len(games))
+    if games:
+        db.execute(insert(GameDB.__table__), [_game_row(g) for g in games])
+    for field in _LINK_TABLES:
+        pairs = list(_link_pairs(games, field))
+        _insert_links(db, field, pairs)
+        stats.links_added += len(pairs)
+    _index_games(db)
+    _store_facets(db)
+    _bump_data_version(db)
 
     db.commit()
+    return stats
 
 
 def load_games(db: Session) -> List[Game]:
@@ -83,11 +363,12 @@ def load_games(db: Session) -> List[Game]:
         )
         .all()
     )
-    return [_to_game(g) for g in games_db]
+    names = _term_names(db)
+    return [_to_game(g, names) for g in games_db]
 
 
-def get_games_filtered(
-    db: Session,
+def _apply_filters(
+    stmt,
     mechanics: Optional[List[str]] = None,
     categories: Optional[List[str]] = None,
     designers: Optional[List[str]] = None,
@@ -103,62 +384,629 @@ def get_games_filtered(
     weight_max: Optional[float] = None,
     rating_min: Optional[float] = None,
     search: Optional[str] = None,
-) -> List[Game]:
-    """Return games matching all supplied filters."""
-    query = db.query(GameDB)
-
-    if mechanics:
-        query = query.join(GameMechanic).filter(GameMechanic.mechanic.in_(mechanics))
-    if categories:
-        query = query.join(GameCategory).filter(GameCategory.category.in_(categories))
-    if designers:
-        query = query.join(GameDesigner).filter(GameDesigner.designer.in_(designers))
-    if artists:
-        query = query.join(GameArtist).filter(GameArtist.artist.in_(artists))
-    if publishers:
-        query = query.join(GamePublisher).filter(GamePublisher.publisher.in_(publishers))
+    username: Optional[str] = None,
+    match: Optional[Dict[str, str]] = None,
+):
+    """Narrow a select over `games` to the games matching all filters.
+
+    Within a link field, games match any of the values, or all or none of
+    them when `match` maps the field to "all" or "none".
+
+    Returns (select, rank), where rank is the search's bm25 score column
+    (lower is better) or None without a search. The select is None when
+    nothing can match (a search without any words).
+    """
+    if username:
+        stmt = stmt.join(CollectionEntryDB).where(CollectionEntryDB.username == username)
+
+    # Link filters are semi-joins on the (term_id, game_id) index, so a game
+    # appears once however many of the values it has. "any" is an EXISTS,
+    # "none" a NOT EXISTS; "all" keeps games linked to every one of the values.
+    for field, values in (
+        ("mechanics", mechanics), ("categories", categories), ("designers", designers),
+        ("artists", artists), ("publishers", publishers),
+    ):
+        if values:
+            model, term = _LINK_TABLES[field]
+            term_ids = select(term.id).where(term.name.in_(values))
+            mode = (match or {}).get(field, "any")
+            if mode == "all":
+                having_all = (
+                    select(model.game_id)
+                    .where(model.term_id.in_(term_ids))
+                    .group_by(model.game_id)
+                    .having(func.count() == len(set(values)))
+                )
+                stmt = stmt.where(GameDB.id.in_(having_all))
+            else:
+                linked = select(model.game_id).where(model.game_id == GameDB.id, model.term_id.in_(term_ids)).exists()
+                stmt = stmt.where(~linked if mode == "none" else linked)
 
     if year_min is not None:
-        query = query.filter(GameDB.year >= year_min)
+        stmt = stmt.where(GameDB.year >= year_min)
     if year_max is not None:
-        query = query.filter(GameDB.year <= year_max)
+        stmt = stmt.where(GameDB.year <= year_max)
 
     if players is not None:
-        query = query.filter(
+        stmt = stmt.where(
             and_(
                 or_(GameDB.min_players.is_(None), GameDB.min_players <= players),
                 or_(GameDB.max_players.is_(None), GameDB.max_players >= players),
             )
         )
     if players_min is not None:
-        query = query.filter(or_(GameDB.max_players.is_(None), GameDB.max_players >= players_min))
+        stmt = stmt.where(or_(GameDB.max_players.is_(None), GameDB.max_players >= players_min))
     if players_max is not None:
-        query = query.filter(or_(GameDB.min_players.is_(None), GameDB.min_players <= players_max))
+        stmt = stmt.where(or_(GameDB.min_players.is_(None), GameDB.min_players <= players_max))
 
     # For time/weight/rating: NULLs are excluded when a bound is active.
     # A game with unknown weight should not appear in a weight-filtered result.
     if time_max is not None:
-        query = query.filter(GameDB.playing_time <= time_max)
+        stmt = stmt.where(GameDB.playing_time <= time_max)
     if weight_min is not None:
-        query = query.filter(GameDB.weight >= weight_min)
+        stmt = stmt.where(GameDB.weight >= weight_min)
     if weight_max is not None:
-        query = query.filter(GameDB.weight <= weight_max)
+        stmt = stmt.where(GameDB.weight <= weight_max)
     if rating_min is not None:
-        query = query.filter(GameDB.avg_rating >= rating_min)
+        stmt = stmt.where(GameDB.avg_rating >= rating_min)
 
+    # Search matches word prefixes in name, designers, publishers and
+    # mechanics through the FTS5 index.
+    rank = None
     if search:
-        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
-        query = query.filter(GameDB.name.ilike(f"%{escaped}%", escape="\\"))
+        fts_match = _fts_query(search)
+        if fts_match is None:
+            return None, None
+        ranked = (
+            select(
+                _games_fts.c.rowid.label("game_id"),
+                func.bm25(literal_column(GAMES_FTS_TABLE), *_FTS_WEIGHTS).label("rank"),
+            )
+            .where(_games_fts.c[GAMES_FTS_TABLE].op("MATCH")(fts_match))
+            .subquery()
+        )
+        stmt = stmt.join(ranked, ranked.c.game_id == GameDB.id)
+        rank = ranked.c.rank
 
-    games_db = (
-        query.distinct()
-        .options(
-            selectinload(GameDB.mechanics),
-            selectinload(GameDB.categories),
-            selectinload(GameDB.designers),
-            selectinload(GameDB.artists),
-            selectinload(GameDB.publishers),
+    return stmt, rank
+
+
+SORT_COLUMNS = ("name", "year", "weight", "avg_rating", "bayes_rating", "my_rating", "playing_time")
+
+
+class InvalidCursor(ValueError):
+    """A pagination cursor that is malformed or was issued for another sort."""
+
+
+@dataclass
+class GamePage:
+    games: List[Game]
+    filtered: int  # matching games across all pages
+    next_cursor: Optional[str] = None
+    games_json: Optional[List[bytes]] = None  # serialized games, instead of `games` (as_json)
+
+
+def _encode_cursor(sort: str, order: str, value: Any, game_id: int) -> str:
+    raw = json.dumps([sort, order, value, game_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    try:
+        c_sort, c_order, value, game_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if (c_sort, c_order) != (sort, order):
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    if not _is_int(game_id) or not _valid_sort_value(sort, value):
+        raise InvalidCursor("Malformed cursor")
+    return value, game_id
+
+
+_MAX_EXACT_INT = 2 ** 53
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _valid_sort_value(sort: str, value: Any) -> bool:
+    """Whether a cursor's `value` can be a `sort` key: None (unknown), a name
+    for "name", a finite number for the numeric columns (ints no larger than
+    a float holds exactly, so comparing them can't overflow)."""
+    if value is None:
+        return True
+    if sort == "id":
+        return False  # id order carries no value
+    if sort == "name":
+        return isinstance(value, str)
+    if _is_int(value):
+        return abs(value) <= _MAX_EXACT_INT
+    return isinstance(value, float) and math.isfinite(value)
+
+
+def _keyset(stmt, key, order: str, after: Optional[Tuple[Any, int]]):
+    """Order `stmt` by (key, id) and start it after the `after` key.
+
+    NULL keys sort as SQLite sorts them: first ascending, last descending,
+    so an index on the key column serves both directions.
+    """
+    desc = order == "desc"
+    id_order = GameDB.id.desc() if desc else GameDB.id
+    if key is None:
+        stmt = stmt.order_by(id_order)
+        if after is not None:
+            stmt = stmt.where(GameDB.id < after[1] if desc else GameDB.id > after[1])
+        return stmt
+
+    stmt = stmt.order_by(key.desc() if desc else key, id_order)
+    if after is None:
+        return stmt
+    value, last_id = after
+    id_after = GameDB.id < last_id if desc else GameDB.id > last_id
+    if value is None:
+        condition = and_(key.is_(None), id_after)
+        if not desc:
+            condition = or_(condition, key.is_not(None))
+    else:
+        condition = or_(key < value if desc else key > value, and_(key == value, id_after))
+        if desc:
+            condition = or_(condition, key.is_(None))
+    return stmt.where(condition)
+
+
+def _load_links(db, fields: List[str], game_ids: List[int]) -> Dict[str, Dict[int, List[str]]]:
+    """{field: {game_id: [names]}} for the given link fields and games."""
+    links: Dict[str, Dict[int, List[str]]] = {}
+    for field in fields:
+        model, term = _LINK_TABLES[field]
+        link, terms = model.__table__, term.__table__
+        stmt = (
+            select(link.c.game_id, terms.c.name)
+            .select_from(link.join(terms))
+            .order_by(link.c.game_id, link.c.term_id)
         )
-        .all()
+        by_game: Dict[int, List[str]] = {}
+        if len(game_ids) <= _IN_CHUNK:
+            rows = db.execute(stmt.where(link.c.game_id.in_(game_ids)))
+        else:
+            # Past one IN list, one scan of the link table beats many lookups.
+            wanted = set(game_ids)
+            rows = ((gid, name) for gid, name in db.execute(stmt) if gid in wanted)
+        for gid, name in rows:
+            by_game.setdefault(gid, []).append(name)
+        links[field] = by_game
+    return links
+
+
+def get_games_page(
+    db: Session,
+    sort: Optional[str] = None,
+    order: str = "asc",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    links: Optional[List[str]] = None,
+    username: Optional[str] = None,
+    as_json: bool = False,
+    **filters,
+) -> GamePage:
+    """One page of the games matching `filters` (see _apply_filters).
+
+    Games are ordered by `sort` (one of SORT_COLUMNS), then id; without a
+    sort, a search orders by relevance and anything else by id. `cursor`
+    is a page's next_cursor and continues right after its last game
+    (keyset pagination), so deep pages cost the same as the first. Raises
+    InvalidCursor for a cursor from a different sort or order.
+
+    `fields` (game columns; id is always included) and `links` (link
+    fields such as "mechanics") limit what is selected. Either one makes
+    the games partial: only the requested attributes are set, and the
+    games skip validation. Unknown names raise ValueError.
+
+    With `username`, only that user's collection is returned and my_rating
+    (also as a sort key) is their own rating.
+
+    With `as_json`, a page of full games served from the snapshot comes
+    back as games_json, each game's pre-serialized JSON, and `games` is
+    empty; other pages (search, fields, links) still fill `games`.
+    """
+    if sort is not None and sort not in SORT_COLUMNS:
+        raise ValueError(f"Unknown sort column: {sort}")
+    unknown = set(fields or ()) - set(_GAME_COLUMNS) | set(links or ()) - set(_LINK_TABLES)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    partial = fields is not None or links is not None
+    columns = ["id"] + [c for c in _GAME_COLUMNS if c != "id" and (fields is None or c in fields)]
+    link_fields = list(_LINK_TABLES) if links is None else [f for f in _LINK_TABLES if f in links]
+
+    # Full-text search needs the FTS index; everything else can come from
+    # the in-memory snapshot.
+    snapshot = None if filters.get("search") else load_snapshot(db)
+    if snapshot is not None:
+        return _snapshot_page(
+            snapshot, sort, order, limit, cursor, columns, link_fields, partial, username, filters,
+            as_json=as_json and not partial,
+        )
+    return _sql_page(db, sort, order, limit, cursor, columns, link_fields, partial, username, filters)
+
+
+def _snapshot_page(
+    snapshot: Snapshot, sort, order, limit, cursor, columns, link_fields, partial, username, filters,
+    as_json: bool = False,
+) -> GamePage:
+    label = sort or "id"
+    after = _decode_cursor(cursor, label, order) if cursor else None
+    filters = {k: v for k, v in filters.items() if k != "search"}
+    mask = snapshot.mask(username=username, **filters)
+    positions, more = snapshot.page(mask, sort, order, limit, after, username=username)
+
+    next_cursor = None
+    if more:
+        pos = positions[-1]
+        if sort is None:
+            value = None
+        elif sort == "my_rating" and username:
+            rating = snapshot.collections[username][1][pos]
+            value = None if rating != rating else float(rating)
+        else:
+            value = getattr(snapshot.games[pos], sort)
+        next_cursor = _encode_cursor(label, order, value, snapshot.games[pos].id)
+    if as_json:
+        return GamePage(
+            games=[], filtered=int(mask.sum()), next_cursor=next_cursor,
+            games_json=[snapshot.game_json(pos, username) for pos in positions],
+        )
+
+    games = []
+    for pos in positions:
+        game = snapshot.games[pos]
+        update = {}
+        if username:
+            rating = snapshot.collections[username][1][pos]
+            update["my_rating"] = None if rating != rating else float(rating)  # NaN is unrated
+        if partial:
+            values = {c: getattr(game, c) for c in columns}
+            values.update({f: getattr(game, f) for f in link_fields})
+            values.update({k: v for k, v in update.items() if k in values})
+            game = Game.model_construct(**values)
+        elif update:
+            game = game.model_copy(update=update)
+        games.append(game)
+    return GamePage(games=games, filtered=int(mask.sum()), next_cursor=next_cursor)
+
+
+def _sql_page(
+    db: Session, sort, order, limit, cursor, columns, link_fields, partial, username, filters,
+) -> GamePage:
+    table = GameDB.__table__
+    selected = [
+        CollectionEntryDB.my_rating.label(c) if c == "my_rating" and username else table.c[c]
+        for c in columns
+    ]
+    stmt, rank = _apply_filters(select(*selected).select_from(table), username=username, **filters)
+    if stmt is None:
+        return GamePage(games=[], filtered=0)
+
+    if sort == "my_rating" and username:
+        key = CollectionEntryDB.my_rating
+    elif sort:
+        key = getattr(GameDB, sort)
+    else:
+        key = rank
+    label = sort or ("relevance" if rank is not None else "id")
+    after = _decode_cursor(cursor, label, order) if cursor else None
+    if key is not None:
+        stmt = stmt.add_columns(key.label("sort_key"))
+    stmt = _keyset(stmt, key, order, after)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+
+    rows = db.execute(stmt).all()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(label, order, last.sort_key if key is not None else None, last.id)
+
+    ids = [row.id for row in rows]
+    names = _load_links(db, link_fields, ids)
+    games = []
+    for row in rows:
+        values = {c: row[i] for i, c in enumerate(columns)}
+        for field in link_fields:
+            values[field] = names[field].get(row.id, [])
+        games.append(Game.model_construct(**values) if partial else Game(**values))
+
+    if after is None and next_cursor is None:
+        filtered = len(games)
+    else:
+        ids, _ = _apply_filters(select(GameDB.id), username=username, **filters)
+        filtered = db.scalar(select(func.count()).select_from(ids.subquery()))
+    return GamePage(games=games, filtered=filtered, next_cursor=next_cursor)
+
+
+def get_games_filtered(db: Session, **filters) -> List[Game]:
+    """All games matching `filters`; see get_games_page."""
+    return get_games_page(db, **filters).games
+
+
+def get_filtered_facet_counts(db: Session, **filters) -> Facets:
+    """Facet counts over the games matching `filters` (see _apply_filters).
+
+    A link field filtered with the default "any" match is counted without
+    its own filter, so each of its values shows how many games selecting it
+    as well would give; every other facet counts the fully filtered games.
+
+    Counted from the snapshot, or in SQL with GROUP BY against the filtered
+    game ids for a search, so no game is loaded. Without filters this is
+    the precomputed get_facet_counts.
+    """
+    counts = _filtered_facet_counts(db, filters)
+    match = filters.get("match") or {}
+    for field in LINK_FACETS:
+        if filters.get(field) and match.get(field, "any") == "any":
+            counts[field] = _filtered_facet_counts(db, dict(filters, **{field: None}), field)[field]
+    return Facets(**counts)
+
+
+def _filtered_facet_counts(db: Session, filters: dict, field: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """{facet: {value: count}} over the games matching `filters`; just `field` if given."""
+    if all(v in (None, "", []) for k, v in filters.items() if k not in ("username", "match")):
+        return get_facet_counts(db, filters.get("username")).model_dump()
+    stmt, _ = _apply_filters(select(GameDB.id), **filters)
+    if stmt is None:
+        return {facet: {} for facet in FACET_NAMES}
+    snapshot = None if filters.get("search") else load_snapshot(db)
+    if snapshot is not None:
+        filters = {k: v for k, v in filters.items() if k != "search"}
+        return snapshot.facet_counts(snapshot.mask(**filters), field)
+    return _facet_counts(db, stmt, field)
+
+
+def get_data_version(db) -> Optional[str]:
+    """Identifies the stored games and collections; changes on every save."""
+    row = db.execute(select(DataVersionDB.version, DataVersionDB.token)).first()
+    return f"{row.version}-{row.token}" if row else None
+
+
+def _bump_data_version(db) -> None:
+    table = DataVersionDB.__table__
+    stmt = sqlite_insert(table).values(id=1, version=1, token=uuid.uuid4().hex)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.id], set_={"version": table.c.version + 1, "token": stmt.excluded.token},
+    ))
+
+
+_snapshot: Optional[Snapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def load_snapshot(db: Session) -> Optional[Snapshot]:
+    """The in-memory snapshot for the data version `db` sees.
+
+    Built on first use after each save and then shared by every reader;
+    the new snapshot replaces the old one in a single assignment. None for
+    a database that was never saved to.
+    """
+    global _snapshot
+    version = get_data_version(db)
+    if version is None:
+        return None
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if snapshot is None or snapshot.version != version:
+            games = _sql_page(db, None, "asc", None, None, list(_GAME_COLUMNS), list(_LINK_TABLES), False, None, {})
+            collections: Dict[str, Dict[int, Optional[float]]] = {}
+            for username, game_id, rating in db.execute(
+                select(CollectionEntryDB.username, CollectionEntryDB.game_id, CollectionEntryDB.my_rating)
+            ):
+                collections.setdefault(username, {})[game_id] = rating
+            snapshot = _snapshot = Snapshot(version, games.games, collections)
+    return snapshot
+
+
+def save_collections(db: Session, collections: Dict[str, Dict[int, Optional[float]]]) -> None:
+    """Replace per-user collection entries: {username: {game_id: my_rating}}.
+
+    Call after save_games; entries reference rows in `games`. Entries are
+    diffed against what is stored and nothing is written (and the data
+    version stays put) when they are unchanged.
+    """
+    table = CollectionEntryDB.__table__
+    stored = {
+        (username, game_id): rating
+        for username, game_id, rating in db.execute(select(table.c.username, table.c.game_id, table.c.my_rating))
+    }
+    wanted = {
+        (username, game_id): rating
+        for username, ratings in collections.items()
+        for game_id, rating in ratings.items()
+    }
+    removed = [key for key in stored if key not in wanted]
+    upserts = [
+        {"username": username, "game_id": game_id, "my_rating": rating}
+        for (username, game_id), rating in wanted.items()
+        if (username, game_id) not in stored or stored[username, game_id] != rating
+    ]
+    if not removed and not upserts:
+        db.commit()
+        return
+
+    # Ratings aren't faceted, so only entries joining or leaving a
+    # collection change its counts; work them out before the first write.
+    facet_changes = {}
+    for username in {u for u, _ in removed} | {row["username"] for row in upserts}:
+        joined = sorted(gid for u, gid in wanted if u == username and (u, gid) not in stored)
+        left = sorted(gid for u, gid in removed if u == username)
+        facet_changes[username] = (_facet_counts_of(db, joined), _facet_counts_of(db, left))
+
+    if removed:
+        db.execute(
+            delete(table).where(table.c.username == bindparam("b_username"), table.c.game_id == bindparam("b_game_id")),
+            [{"b_username": username, "b_game_id": game_id} for username, game_id in removed],
+        )
+    if upserts:
+        stmt = sqlite_insert(table)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.username, table.c.game_id], set_={"my_rating": stmt.excluded.my_rating},
+            ),
+            upserts,
+        )
+    for username, (joined, left) in facet_changes.items():
+        _update_facets(db, username, joined, left)
+    _bump_data_version(db)
+    db.commit()
+
+
+def _facet_counts(db, game_ids=None, field: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """{facet: {value: count}} over all games, or those in the `game_ids` select.
+
+    With `field`, only that link field is counted.
+    """
+    games = GameDB.__table__
+    counts: Dict[str, Dict[str, int]] = {}
+    for name, (model, term) in _LINK_TABLES.items():
+        if field is not None and name != field:
+            continue
+        link, terms = model.__table__, term.__table__
+        stmt = select(terms.c.name, func.count()).select_from(link.join(terms)).where(terms.c.name != "")
+        if game_ids is not None:
+            stmt = stmt.where(link.c.game_id.in_(game_ids))
+        counts[name] = {value: n for value, n in db.execute(stmt.group_by(terms.c.id))}
+    if field is not None:
+        return counts
+    stmt = select(games.c.year, games.c.min_players, games.c.max_players, games.c.playing_time, games.c.weight)
+    if game_ids is not None:
+        stmt = stmt.where(games.c.id.in_(game_ids))
+    counts.update(bucket_counts(tuple(row) for row in db.execute(stmt)))
+    return counts
+
+
+def _collection_ids(username: Optional[str]):
+    if username is None:
+        return None
+    return select(CollectionEntryDB.game_id).where(CollectionEntryDB.username == username)
+
+
+def _store_facets(db) -> None:
+    """Recompute facet_counts for the library and every stored collection."""
+    table = FacetCountDB.__table__
+    usernames = [u for (u,) in db.execute(select(CollectionEntryDB.username).distinct())]
+    db.execute(delete(table))
+    for username in [None] + usernames:
+        rows = [
+            {"username": username or "", "facet": facet, "value": value, "count": n}
+            for facet, values in _facet_counts(db, _collection_ids(username)).items()
+            for value, n in values.items()
+        ]
+        if rows:
+            db.execute(insert(table), rows)
+
+
+def _facet_counts_of(db, game_ids: List[int], username: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """_facet_counts over `game_ids`, limited to `username`'s collection if given."""
+    counts: Dict[str, Dict[str, int]] = {}
+    for i in range(0, len(game_ids), _IN_CHUNK):
+        chunk = game_ids[i:i + _IN_CHUNK]
+        ids = select(GameDB.id).where(GameDB.id.in_(chunk))
+        if username is not None:
+            ids = ids.where(GameDB.id.in_(_collection_ids(username)))
+        for facet, values in _facet_counts(db, ids).items():
+            merged = counts.setdefault(facet, {})
+            for value, n in values.items():
+                merged[value] = merged.get(value, 0) + n
+    return counts
+
+
+def _update_facets(
+    db, username: Optional[str], added: Dict[str, Dict[str, int]], removed: Dict[str, Dict[str, int]],
+) -> None:
+    """Add `added` to and subtract `removed` from the stored counts of `username`
+    (the library when None), dropping counts that reach zero."""
+    delta: Dict[Tuple[str, str], int] = {}
+    for sign, counts in ((1, added), (-1, removed)):
+        for facet, values in counts.items():
+            for value, n in values.items():
+                delta[facet, value] = delta.get((facet, value), 0) + sign * n
+    rows = [
+        {"username": username or "", "facet": facet, "value": value, "count": n}
+        for (facet, value), n in delta.items() if n
+    ]
+    if not rows:
+        return
+    table = FacetCountDB.__table__
+    stmt = sqlite_insert(table)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.c.username, table.c.facet, table.c.value],
+            set_={"count": table.c["count"] + stmt.excluded["count"]},
+        ),
+        rows,
     )
-    return [_to_game(g) for g in games_db]
+    db.execute(delete(table).where(table.c.username == (username or ""), table.c["count"] <= 0))
+
+
+def get_facet_counts(db: Session, username: Optional[str] = None) -> Facets:
+    """Facet counts for the library, or for `username`'s collection.
+
+    Reads the counts save_games and save_collections keep up to date.
+    """
+    counts: Dict[str, Dict[str, int]] = {facet: {} for facet in FACET_NAMES}
+    rows = db.execute(
+        select(FacetCountDB.facet, FacetCountDB.value, FacetCountDB.count)
+        .where(FacetCountDB.username == (username or ""))
+    )
+    for facet, value, n in rows:
+        counts[facet][value] = n
+    return Facets(**counts)
+
+
+def get_collection_usernames(db: Session) -> List[str]:
+    """Users with a stored collection, alphabetically."""
+    rows = db.query(CollectionEntryDB.username).distinct().order_by(CollectionEntryDB.username)
+    return [username for (username,) in rows]
+
+
+def start_refresh_run(db: Session, username: str) -> Tuple[str, Dict[int, Game]]:
+    """Resume the latest unfinished refresh run for `username`, or start one.
+
+    Returns (run_id, checkpointed games by id).
+    """
+    run = (
+        db.query(RefreshRunDB)
+        .filter(RefreshRunDB.username == username, RefreshRunDB.finished_at.is_(None))
+        .order_by(RefreshRunDB.started_at.desc())
+        .first()
+    )
+    if run is not None and time.time() - run.started_at <= RESUME_MAX_AGE:
+        games = {cp.game_id: Game.model_validate_json(cp.data) for cp in run.checkpoints}
+        return run.id, games
+
+    # Nothing resumable: drop stale unfinished runs and start over.
+    for stale in db.query(RefreshRunDB).filter(
+        RefreshRunDB.username == username, RefreshRunDB.finished_at.is_(None)
+    ):
+        db.delete(stale)
+    run = RefreshRunDB(id=uuid.uuid4().hex, username=username, started_at=time.time())
+    db.add(run)
+    db.commit()
+    return run.id, {}
+
+
+def save_checkpoints(db: Session, run_id: str, games: List[Game]) -> None:
+    """Persist enriched games for `run_id` so a restarted refresh can skip them."""
+    for game in games:
+        db.merge(RefreshCheckpointDB(run_id=run_id, game_id=game.id, data=game.model_dump_json()))
+    db.commit()
+
+
+def finish_refresh_run(db: Session, run_id: str) -> None:
+    """Mark a run complete and discard its checkpoints."""
+    db.query(RefreshCheckpointDB).filter(RefreshCheckpointDB.run_id == run_id).delete()
+    db.query(RefreshRunDB).filter(RefreshRunDB.id == run_id).update({"finished_at": time.time()})
+    db.commit()
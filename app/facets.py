@@ -0,0 +1,72 @@
+"""Facet counts: how many games carry each filter value.
+
+The bucket functions define the labels the frontend shows for scalar
+columns. db_storage uses them to precompute counts at save time;
+make_facets computes the same counts from a list of games.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Facets, Game
+from .util import bucketize_minutes
+
+LINK_FACETS = ("mechanics", "categories", "designers", "artists", "publishers")
+FACET_NAMES = LINK_FACETS + ("years", "player_counts", "time_buckets", "weight_buckets")
+
+
+def year_bucket(year: Optional[int]) -> str:
+    return str(year) if year else "Unknown"
+
+
+def player_bucket(min_players: Optional[int], max_players: Optional[int]) -> str:
+    if not (min_players or max_players):
+        return "Unknown"
+    pmin = min_players or max_players
+    pmax = max_players or min_players
+    return f"{pmin}–{pmax}"
+
+
+def time_bucket(playing_time: Optional[int]) -> str:
+    return bucketize_minutes(playing_time if playing_time else None)
+
+
+def weight_bucket(weight: Optional[float]) -> str:
+    if weight is None:
+        return "Unknown"
+    return (
+        "Light (≤1.75)"          if weight <= 1.75 else
+        "Medium‑Light (1.76–2.5)" if weight <= 2.5  else
+        "Medium (2.51–3.25)"      if weight <= 3.25 else
+        "Medium‑Heavy (3.26–4.0)" if weight <= 4.0  else
+        "Heavy (>4.0)"
+    )
+
+
+def bucket_counts(
+    rows: Iterable[Tuple[Optional[int], Optional[int], Optional[int], Optional[int], Optional[float]]],
+) -> Dict[str, Dict[str, int]]:
+    """Scalar facet counts from (year, min_players, max_players, playing_time, weight) rows."""
+    counts: Dict[str, Dict[str, int]] = {
+        "years": {}, "player_counts": {}, "time_buckets": {}, "weight_buckets": {},
+    }
+    for year, min_players, max_players, playing_time, weight in rows:
+        for facet, key in (
+            ("years", year_bucket(year)),
+            ("player_counts", player_bucket(min_players, max_players)),
+            ("time_buckets", time_bucket(playing_time)),
+            ("weight_buckets", weight_bucket(weight)),
+        ):
+            counts[facet][key] = counts[facet].get(key, 0) + 1
+    return counts
+
+
+def make_facets(games: List[Game]) -> Facets:
+    counts: Dict[str, Dict[str, int]] = {facet: {} for facet in LINK_FACETS}
+    for g in games:
+        for facet in LINK_FACETS:
+            for name in getattr(g, facet):
+                if name:
+                    counts[facet][name] = counts[facet].get(name, 0) + 1
+    counts.update(bucket_counts(
+        (g.year, g.min_players, g.max_players, g.playing_time, g.weight) for g in games
+    ))
+    return Facets(**counts)
@@ -0,0 +1,165 @@
+"""Persistent response cache for BGG's geekitems and dynamicinfo APIs.
+
+Entries live in a small SQLite file next to games.db, keyed by endpoint and
+objectid. Each endpoint has its own TTL; within it a cached body is served
+without touching the network. Past it the entry is revalidated with
+If-None-Match / If-Modified-Since, so an unchanged game costs a 304 instead
+of a full payload. The table is bounded by entry count, oldest fetch first;
+it is trimmed every EVICT_EVERY puts and on close rather than on each put.
+
+Calls are blocking sqlite3 I/O; async callers (bgg._get_json) run them
+with asyncio.to_thread so a refresh doesn't stall the event loop.
+
+TTLs and the size bound are configurable via env:
+    BGG_CACHE_TTL_GEEKITEMS     seconds (default 7 days)
+    BGG_CACHE_TTL_DYNAMICINFO   seconds (default 1 day)
+    BGG_CACHE_MAX_ENTRIES       rows kept (default 20000)
+"""
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from .database import DATA_DIR
+
+CACHE_PATH = DATA_DIR / "http_cache.db"
+
+DEFAULT_TTLS: Dict[str, float] = {
+    "geekitems": 7 * 24 * 3600,
+    "dynamicinfo": 24 * 3600,
+}
+DEFAULT_MAX_ENTRIES = 20000
+EVICT_EVERY = 500  # puts between eviction passes
+
+
+def _env_ttls() -> Dict[str, float]:
+    ttls = dict(DEFAULT_TTLS)
+    for endpoint in DEFAULT_TTLS:
+        raw = os.getenv(f"BGG_CACHE_TTL_{endpoint.upper()}")
+        if raw:
+            ttls[endpoint] = float(raw)
+    return ttls
+
+
+@dataclass
+class CachedResponse:
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    fresh: bool
+
+
+class ResponseCache:
+    """SQLite-backed cache of raw response bodies with per-endpoint TTLs."""
+
+    def __init__(
+        self,
+        path: Path = CACHE_PATH,
+        ttls: Optional[Dict[str, float]] = None,
+        max_entries: Optional[int] = None,
+        evict_every: int = EVICT_EVERY,
+    ):
+        self.ttls = {**_env_ttls(), **(ttls or {})}
+        self.max_entries = max_entries or int(os.getenv("BGG_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+        self.evict_every = evict_every
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                endpoint TEXT NOT NULL,
+                key TEXT NOT NULL,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (endpoint, key)
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_fetched_at ON responses (fetched_at)")
+        self._conn.commit()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+            self._conn.close()
+
+    def get(self, endpoint: str, key) -> Optional[CachedResponse]:
+        """Return the cached entry (fresh or stale), or None if absent."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM responses WHERE endpoint = ? AND key = ?",
+                (endpoint, str(key)),
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        fresh = time.time() - fetched_at < self.ttls.get(endpoint, 0)
+        return CachedResponse(body, etag, last_modified, fetched_at, fresh)
+
+    def put(
+        self,
+        endpoint: str,
+        key,
+        body: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (endpoint, key, body, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (endpoint, str(key), body, etag, last_modified, time.time()),
+            )
+            self._puts += 1
+            if self._puts >= self.evict_every:
+                self._evict()
+            self._conn.commit()
+
+    def touch(self, endpoint: str, key) -> None:
+        """Mark an entry fresh again after a 304 revalidation."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ? WHERE endpoint = ? AND key = ?",
+                (time.time(), endpoint, str(key)),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def evict(self) -> None:
+        """Drop the oldest entries beyond max_entries now."""
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        self._puts = 0
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE rowid IN "
+                "(SELECT rowid FROM responses ORDER BY fetched_at LIMIT ?)",
+                (excess,),
+            )
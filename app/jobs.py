@@ -0,0 +1,134 @@
+"""In-process background refresh jobs.
+
+A refresh can take minutes for a large collection, so POST /api/refresh
+starts a job and returns immediately. Progress is polled through
+GET /api/refresh/{id} or followed as server-sent events. Only one job may
+run at a time; finished jobs are kept briefly so clients can read results.
+"""
+import asyncio
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from .models import RefreshJobStatus, RefreshResponse
+
+MAX_FINISHED_JOBS = 20
+
+
+class RefreshInProgress(RuntimeError):
+    """Raised when a refresh is requested while another one is running."""
+
+    def __init__(self, job: "RefreshJob"):
+        super().__init__(f"A refresh is already running (job {job.id}).")
+        self.job = job
+
+
+class RefreshJob:
+    def __init__(self, username: str):
+        self.id = uuid.uuid4().hex
+        self.username = username
+        self.state = "pending"
+        self.total = 0
+        self.enriched = 0
+        self.failed = 0
+        self.error: Optional[str] = None
+        self.result: Optional[RefreshResponse] = None
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        # Rate baseline for the ETA, taken at the first progress report so
+        # games reused instantly by an incremental refresh don't skew it.
+        self._rate_origin: Optional[tuple] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.state in ("succeeded", "failed")
+
+    def progress(self, enriched: int, failed: int, total: int) -> None:
+        """ProgressCallback for fetch_all_games."""
+        self.enriched, self.failed, self.total = enriched, failed, total
+        if self._rate_origin is None:
+            self._rate_origin = (time.monotonic(), enriched + failed)
+        self._notify()
+
+    def eta_seconds(self) -> Optional[float]:
+        if self.done or self._rate_origin is None:
+            return None
+        origin_time, origin_count = self._rate_origin
+        processed = self.enriched + self.failed
+        rate_count = processed - origin_count
+        if rate_count <= 0:
+            return None
+        elapsed = time.monotonic() - origin_time
+        return round(elapsed / rate_count * (self.total - processed), 1)
+
+    def status(self) -> RefreshJobStatus:
+        return RefreshJobStatus(
+            id=self.id, username=self.username, state=self.state,
+            total=self.total, enriched=self.enriched, failed=self.failed,
+            eta_seconds=self.eta_seconds(),
+            started_at=self.started_at, finished_at=self.finished_at,
+            error=self.error, result=self.result,
+        )
+
+    async def updates(self) -> AsyncIterator[RefreshJobStatus]:
+        """Yield the current status, then again on every change until done."""
+        while True:
+            changed = self._changed
+            yield self.status()
+            if self.done:
+                return
+            await changed.wait()
+
+    def _notify(self) -> None:
+        # Swap in a fresh Event so every waiter wakes exactly once per change.
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class JobManager:
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, RefreshJob]" = OrderedDict()
+        self._tasks = set()
+
+    def get(self, job_id: str) -> Optional[RefreshJob]:
+        return self._jobs.get(job_id)
+
+    def running(self) -> Optional[RefreshJob]:
+        return next((j for j in self._jobs.values() if not j.done), None)
+
+    def start(self, username: str, run: Callable[[RefreshJob], Awaitable[RefreshResponse]]) -> RefreshJob:
+        """Start `run(job)` in the background; refuses if a job is running."""
+        active = self.running()
+        if active is not None:
+            raise RefreshInProgress(active)
+        job = RefreshJob(username)
+        self._jobs[job.id] = job
+        self._prune()
+        task = asyncio.create_task(self._run(job, run))
+        # Keep a reference so the task isn't garbage-collected mid-run.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _run(self, job: RefreshJob, run: Callable[[RefreshJob], Awaitable[RefreshResponse]]) -> None:
+        job.state = "running"
+        job._notify()
+        try:
+            job.result = await run(job)
+            job.state = "succeeded"
+        except Exception as e:
+            traceback.print_exc()
+            job.error = str(e) or "Failed to refresh collection. Check server logs for details."
+            job.state = "failed"
+        finally:
+            job.finished_at = time.time()
+            job._notify()
+
+    def _prune(self) -> None:
+        finished = [jid for jid, j in self._jobs.items() if j.done]
+        for jid in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[jid]
@@ -1,20 +1,25 @@
+import json
 import os
 from contextlib import asynccontextmanager
-from typing import List, Optional, Dict
+from typing import Callable, List, Literal, Optional
 from pathlib import Path
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Response, HTTPException, Depends
+from fastapi import FastAPI, Request, Response, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-import httpx
 
-from .models import Game, Facets, RefreshResponse, GamesResponse
-from .database import get_db
-from .db_storage import save_games, load_games, get_games_filtered, get_total_game_count, init_db
-from .bgg import fetch_collection, get_bgg_session, fetch_all_games
-from .util import bucketize_minutes
+from .api_cache import ApiResponseCache, cache_key, etag_matches
+from .models import Facets, GamesResponse, RefreshJobStatus
+from .database import get_db, get_session_factory
+from .db_executor import read_executor, write_executor
+from .db_storage import (
+    get_games_page, get_total_game_count, get_collection_usernames, get_filtered_facet_counts, get_data_version, init_db,
+)
+from .jobs import JobManager, RefreshInProgress, RefreshJob
+from .refresh import configured_usernames, refresh_collections
 
 load_dotenv()
 
@@ -23,7 +28,7 @@ BASE_DIR = Path(__file__).parent.parent
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
+    await write_executor.run(init_db)
     yield
 
 
@@ -49,69 +54,7 @@ async def test_endpoint():
     return {"status": "ok", "message": "API is working"}
 
 
-def make_facets(games: List[Game]) -> Facets:
-    def add_count(d: Dict[str, int], key: Optional[str]):
-        if not key:
-            return
-        d[key] = d.get(key, 0) + 1
-
-    mechanics: Dict[str, int] = {}
-    categories: Dict[str, int] = {}
-    designers: Dict[str, int] = {}
-    artists: Dict[str, int] = {}
-    publishers: Dict[str, int] = {}
-    years: Dict[str, int] = {}
-    player_counts: Dict[str, int] = {}
-    time_buckets: Dict[str, int] = {}
-    weight_buckets: Dict[str, int] = {}
-
-    for g in games:
-        for m in g.mechanics:   add_count(mechanics, m)
-        for c in g.categories:  add_count(categories, c)
-        for d in g.designers:   add_count(designers, d)
-        for a in g.artists:     add_count(artists, a)
-        for p in g.publishers:  add_count(publishers, p)
-
-        add_count(years, str(g.year) if g.year else "Unknown")
-
-        if g.min_players or g.max_players:
-            pmin = g.min_players or g.max_players
-            pmax = g.max_players or g.min_players
-            add_count(player_counts, f"{pmin}–{pmax}")
-        else:
-            add_count(player_counts, "Unknown")
-
-        tb = bucketize_minutes(g.playing_time if g.playing_time else None)
-        add_count(time_buckets, tb)
-
-        if g.weight is None:
-            add_count(weight_buckets, "Unknown")
-        else:
-            w = g.weight
-            key = (
-                "Light (≤1.75)"          if w <= 1.75 else
-                "Medium‑Light (1.76–2.5)" if w <= 2.5  else
-                "Medium (2.51–3.25)"      if w <= 3.25 else
-                "Medium‑Heavy (3.26–4.0)" if w <= 4.0  else
-                "Heavy (>4.0)"
-            )
-            add_count(weight_buckets, key)
-
-    return Facets(
-        mechanics=mechanics, categories=categories,
-        designers=designers, artists=artists, publishers=publishers,
-        years=years, player_counts=player_counts,
-        time_buckets=time_buckets, weight_buckets=weight_buckets,
-    )
-
-
-@app.get("/api/facets", response_model=Facets)
-def get_facets(db: Session = Depends(get_db)):
-    return make_facets(load_games(db))
-
-
-@app.get("/api/games", response_model=GamesResponse)
-def get_games(
+def game_filters(
     mechanics: Optional[str] = None,
     categories: Optional[str] = None,
     designers: Optional[str] = None,
@@ -127,10 +70,23 @@ def get_games(
     weight_max: Optional[float] = None,
     rating_min: Optional[float] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
-):
-    games = get_games_filtered(
-        db,
+    user: Optional[str] = None,
+    mechanics_match: Literal["any", "all", "none"] = "any",
+    categories_match: Literal["any", "all", "none"] = "any",
+    designers_match: Literal["any", "all", "none"] = "any",
+    artists_match: Literal["any", "all", "none"] = "any",
+    publishers_match: Literal["any", "all", "none"] = "any",
+) -> dict:
+    """Query parameters shared by /api/games and /api/facets, as storage kwargs.
+
+    A link filter matches games with any of its values, or with all or
+    none of them when its `<field>_match` is "all" or "none".
+    """
+    modes = {
+        "mechanics": mechanics_match, "categories": categories_match, "designers": designers_match,
+        "artists": artists_match, "publishers": publishers_match,
+    }
+    return dict(
         mechanics=mechanics.split(",") if mechanics else None,
         categories=categories.split(",") if categories else None,
         designers=designers.split(",") if designers else None,
@@ -146,46 +102,159 @@ def get_games(
         weight_max=weight_max,
         rating_min=rating_min,
         search=search,
+        username=user,
+        match={field: mode for field, mode in modes.items() if mode != "any"},
     )
-    total = get_total_game_count(db)
-    return GamesResponse(games=games, total=total, filtered=len(games))
 
 
-@app.post("/api/refresh", response_model=RefreshResponse)
-async def refresh(
+# Read responses are cached per data version; clients revalidate every
+# time (no-cache) and get a 304 while the data is unchanged.
+api_cache = ApiResponseCache()
+CACHE_CONTROL = "no-cache"
+
+
+def cached_json(request: Request, db: Session, params: dict, build: Callable[[], bytes]) -> Response:
+    """JSON response for `params` at the current data version, built once."""
+    version = get_data_version(db)
+    if version is None:  # never saved to: nothing to key the cache on
+        return Response(content=build(), media_type="application/json")
+    key = cache_key(request.url.path, params, version)
+    entry = api_cache.get(key) or api_cache.put(key, build())
+    headers = {"ETag": entry.etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/facets", response_model=Facets)
+async def get_facets(request: Request, filters: dict = Depends(game_filters), db: Session = Depends(get_db)):
+    """Facet counts for the games matching the /api/games filters."""
+    return await read_executor.run(
+        cached_json,
+        request, db, filters, lambda: get_filtered_facet_counts(db, **filters).model_dump_json().encode(),
+    )
+
+
+@app.get("/api/users", response_model=List[str])
+async def get_users(db: Session = Depends(get_db)):
+    """Usernames whose collections are stored."""
+    return await read_executor.run(get_collection_usernames, db)
+
+
+LINK_FIELDS = ["mechanics", "categories", "designers", "artists", "publishers"]
+
+
+def games_response_json(games_json: List[bytes], total: int, filtered: int, next_cursor: Optional[str]) -> bytes:
+    """GamesResponse JSON assembled from pre-serialized games, byte for byte
+    what GamesResponse.model_dump_json() would produce."""
+    tail = json.dumps({"total": total, "filtered": filtered, "next_cursor": next_cursor}, separators=(",", ":"))
+    return b'{"games":[' + b",".join(games_json) + b"]," + tail[1:].encode()
+
+
+@app.get("/api/games", response_model=GamesResponse)
+async def get_games(
+    request: Request,
+    filters: dict = Depends(game_filters),
+    sort: Optional[Literal[
+        "name", "year", "weight", "avg_rating", "bayes_rating", "my_rating", "playing_time",
+    ]] = None,
+    order: Literal["asc", "desc"] = "asc",
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    user = os.getenv("BGG_USERNAME")
-    if not user:
-        raise HTTPException(status_code=400, detail="BGG_USERNAME not configured")
+    """Matching games, optionally one page at a time.
+
+    `filtered` counts every match; `next_cursor` is set while more pages
+    remain and is passed back unchanged as `cursor` with the same sort.
+
+    `fields=name,thumbnail,...` returns only those game columns (plus id)
+    and no link lists unless `include=links` (or `include=mechanics,...`)
+    asks for them; `include` alone keeps every column.
+    """
+    field_list = fields.split(",") if fields else None
+    if include:
+        requested = include.split(",")
+        links = LINK_FIELDS if "links" in requested else [f for f in requested if f != "links"]
+    else:
+        links = [] if field_list is not None else None
+
+    def build() -> bytes:
+        try:
+            page = get_games_page(
+                db, sort=sort, order=order, limit=limit, cursor=cursor, fields=field_list, links=links,
+                as_json=True, **filters,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        total = get_total_game_count(db, username=filters["username"])
+        if page.games_json is not None:
+            return games_response_json(page.games_json, total, page.filtered, page.next_cursor)
+        response = GamesResponse(games=page.games, total=total, filtered=page.filtered, next_cursor=page.next_cursor)
+        # Partial games hold only the requested attributes; leave the rest
+        # out of the JSON.
+        return response.model_dump_json(exclude_unset=field_list is not None or links is not None).encode()
+
+    params = dict(filters, sort=sort, order=order, limit=limit, cursor=cursor, fields=field_list, links=links)
+    return await read_executor.run(cached_json, request, db, params, build)
+
+
+refresh_jobs = JobManager()
+
+
+def _get_job(job_id: str) -> RefreshJob:
+    job = refresh_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Refresh job '{job_id}' not found")
+    return job
+
+
+@app.post("/api/refresh", response_model=RefreshJobStatus, status_code=202)
+async def refresh(
+    incremental: bool = False,
+    batched: bool = False,
+    session_factory=Depends(get_session_factory),
+):
+    users = configured_usernames()
+    if not users:
+        raise HTTPException(status_code=400, detail="BGG_USERNAME (or BGG_USERNAMES) not configured")
 
     password = os.getenv("BGG_PASSWORD")
 
+    async def run(job: RefreshJob):
+        with session_factory() as db:
+            return await refresh_collections(
+                db, users, password,
+                incremental=incremental, batched=batched, on_progress=job.progress,
+            )
+
     try:
-        limits = httpx.Limits(max_keepalive_connections=20, max_connections=20)
-        timeout = httpx.Timeout(60.0, connect=10.0)
-
-        async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
-            session_cookie = None
-            if password:
-                print(f"Authenticating with BGG as '{user}'")
-                session_cookie = await get_bgg_session(client, user, password)
-
-            print(f"Fetching collection for user: {user}")
-            ids, my_ratings, collection_xml = await fetch_collection(client, user, session_cookie=session_cookie)
-            print(f"Found {len(ids)} games in collection")
-
-            games = await fetch_all_games(client, ids, my_ratings, collection_xml)
-
-            print(f"Successfully hydrated {len(games)} games")
-
-        save_games(games, db)
-        return RefreshResponse(username=user, total_in_collection=len(ids), total_hydrated=len(games), cached=True)
-    except HTTPException:
-        raise
-    except (PermissionError, LookupError) as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=str(e) or "Failed to refresh collection. Check server logs for details.")
+        job = refresh_jobs.start(",".join(users), run)
+    except RefreshInProgress as e:
+        raise HTTPException(
+            status_code=409, detail=str(e),
+            headers={"Location": f"/api/refresh/{e.job.id}"},
+        )
+    return job.status()
+
+
+@app.get("/api/refresh/{job_id}", response_model=RefreshJobStatus)
+async def get_refresh_job(job_id: str):
+    return _get_job(job_id).status()
+
+
+@app.get("/api/refresh/{job_id}/events")
+async def refresh_job_events(job_id: str):
+    """Server-sent events: one RefreshJobStatus per change until the job ends."""
+    job = _get_job(job_id)
+
+    async def stream():
+        async for status in job.updates():
+            yield f"data: {status.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -34,10 +34,28 @@ class Facets(BaseModel):
 class GamesResponse(BaseModel):
     games: List[Game]
     total: int
-    filtered: int
+    filtered: int  # matching games across all pages
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page
 
 class RefreshResponse(BaseModel):
     username: str
     total_in_collection: int
     total_hydrated: int
     cached: bool
+    run_id: Optional[str] = None
+    resumed: int = 0
+    collections: Dict[str, int] = Field(default_factory=dict)  # games per username
+
+
+class RefreshJobStatus(BaseModel):
+    id: str
+    username: str
+    state: str  # pending | running | succeeded | failed
+    total: int
+    enriched: int
+    failed: int
+    eta_seconds: Optional[float] = None
+    started_at: float
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[RefreshResponse] = None
@@ -0,0 +1,142 @@
+"""Adaptive rate limiting shared by every BGG request in a refresh.
+
+A token bucket paces request starts and a concurrency window caps how many
+requests are in flight. Both grow additively while BGG answers promptly and
+are cut multiplicatively on a 429, a 5xx, a transport error or a latency
+spike (AIMD), so a refresh settles at whatever throughput BGG tolerates
+instead of a hand-tuned constant.
+"""
+import asyncio
+import math
+import time
+from typing import Callable, Optional
+
+import httpx
+
+INITIAL_RATE = 4.0          # request starts per second
+INITIAL_CONCURRENCY = 5.0   # requests in flight
+MIN_RATE = 0.5
+MAX_RATE = 25.0
+MIN_CONCURRENCY = 1.0
+MAX_CONCURRENCY = 20.0
+
+
+class AdaptiveLimiter:
+    """AIMD-controlled token bucket plus concurrency window.
+
+    Use `await limiter.get(client, url, ...)` in place of `client.get`, or
+    pair `acquire()` / `release(status, latency)` around a custom call.
+    """
+
+    def __init__(
+        self,
+        rate: float = INITIAL_RATE,
+        concurrency: float = INITIAL_CONCURRENCY,
+        min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE,
+        min_concurrency: float = MIN_CONCURRENCY,
+        max_concurrency: float = MAX_CONCURRENCY,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_threshold: float = 2.0,
+        cooldown: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.concurrency = concurrency
+        self.min_rate, self.max_rate = min_rate, max_rate
+        self.min_concurrency, self.max_concurrency = min_concurrency, max_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_threshold = latency_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+
+        self._tokens = 1.0
+        self._refilled_at = clock()
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+        self._latency_ewma: Optional[float] = None
+        self._latency_floor: Optional[float] = None
+        self._last_cut = -math.inf
+
+    @property
+    def window(self) -> int:
+        return max(1, int(self.concurrency))
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.window)
+            self._in_flight += 1
+        try:
+            while True:
+                now = self._clock()
+                burst = max(1.0, self.rate)
+                self._tokens = min(burst, self._tokens + (now - self._refilled_at) * self.rate)
+                self._refilled_at = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+        except BaseException:
+            # Cancelled while waiting for a token: give the slot back, even
+            # if cancelled again meanwhile.
+            await asyncio.shield(self._free_slot())
+            raise
+
+    async def release(self, status: Optional[int], latency: float) -> None:
+        """Record a finished request (status None = transport error)."""
+        self.record(status, latency)
+        await self._free_slot()
+
+    async def _free_slot(self) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify(max(1, self.window - self._in_flight))
+
+    async def get(self, client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+        await self.acquire()
+        start = self._clock()
+        status = None
+        try:
+            r = await client.get(url, **kwargs)
+            status = r.status_code
+            return r
+        finally:
+            await self.release(status, self._clock() - start)
+
+    def record(self, status: Optional[int], latency: float) -> None:
+        congested = status is None or status == 429 or status >= 500
+        if status is not None and self._latency_spike(latency):
+            congested = True
+        if congested:
+            self._cut()
+        else:
+            self._grow()
+
+    def _latency_spike(self, latency: float) -> bool:
+        if self._latency_ewma is None:
+            self._latency_ewma = self._latency_floor = latency
+            return False
+        self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * latency
+        # The floor creeps up slowly so a permanently slower BGG becomes the
+        # new baseline rather than a standing congestion signal.
+        self._latency_floor = min(self._latency_ewma, self._latency_floor * 1.01)
+        return self._latency_ewma > self._latency_floor * self.latency_threshold
+
+    def _grow(self) -> None:
+        # Roughly +increase per full window of successes, and +increase req/s
+        # per second of successful traffic.
+        self.concurrency = min(self.max_concurrency, self.concurrency + self.increase / self.concurrency)
+        self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def _cut(self) -> None:
+        now = self._clock()
+        # One cut per congestion episode: responses already in flight when
+        # BGG pushed back would otherwise halve the window repeatedly.
+        if now - self._last_cut < self.cooldown:
+            return
+        self._last_cut = now
+        self.concurrency = max(self.min_concurrency, self.concurrency * self.decrease)
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self._tokens = min(self._tokens, 0.0)
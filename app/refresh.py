@@ -0,0 +1,154 @@
+"""Collection refresh: BGG collection → enrichment → database.
+
+Shared by the background refresh jobs in main.py; the HTTP layer only
+decides when to run it and how to report progress.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import Future
+from contextlib import AsyncExitStack
+from typing import List, Optional
+
+import httpx
+from sqlalchemy.orm import Session
+
+from .bgg import fetch_collections, get_bgg_session, fetch_all_games, make_thing_client, ProgressCallback
+from .db_executor import write_executor
+from .db_storage import (
+    save_games, load_games, save_collections, start_refresh_run, save_checkpoints, finish_refresh_run,
+    load_snapshot,
+)
+from .http_cache import ResponseCache
+from .models import Game, RefreshResponse
+from .ratelimit import AdaptiveLimiter
+from .retry import RetryPolicy
+
+CHECKPOINT_EVERY = 25         # games
+CHECKPOINT_INTERVAL = 5.0     # seconds
+
+
+def configured_usernames() -> List[str]:
+    """BGG accounts to refresh: BGG_USERNAMES (comma-separated), else BGG_USERNAME."""
+    raw = os.getenv("BGG_USERNAMES") or os.getenv("BGG_USERNAME") or ""
+    names = [u.strip() for u in raw.split(",") if u.strip()]
+    return list(dict.fromkeys(names))
+
+
+class Checkpointer:
+    """Buffers enriched games and writes them to the run's checkpoints.
+
+    Flushes every CHECKPOINT_EVERY games or CHECKPOINT_INTERVAL seconds,
+    whichever comes first, so a crash loses at most a few seconds of work
+    without paying a commit per game. Flushes are queued on write_executor
+    rather than run on the event loop; `flush` writes what is left and
+    waits for all of them.
+    """
+
+    def __init__(self, db: Session, run_id: str):
+        self.db = db
+        self.run_id = run_id
+        self._buffer: List[Game] = []
+        self._pending: List[Future] = []
+        self._flushed_at = time.monotonic()
+
+    def __call__(self, games: List[Game]) -> None:
+        self._buffer.extend(games)
+        if len(self._buffer) >= CHECKPOINT_EVERY or time.monotonic() - self._flushed_at >= CHECKPOINT_INTERVAL:
+            self._submit()
+
+    def _submit(self) -> None:
+        if self._buffer:
+            self._pending.append(write_executor.submit(save_checkpoints, self.db, self.run_id, self._buffer))
+            self._buffer = []
+        self._flushed_at = time.monotonic()
+
+    async def flush(self) -> None:
+        self._submit()
+        pending, self._pending = self._pending, []
+        await asyncio.gather(*(asyncio.wrap_future(f) for f in pending))
+
+
+async def refresh_collections(
+    db: Session,
+    usernames: List[str],
+    password: Optional[str] = None,
+    incremental: bool = False,
+    batched: bool = False,
+    on_progress: Optional[ProgressCallback] = None,
+) -> RefreshResponse:
+    """Fetch the collections of `usernames` from BGG, enrich them and save to `db`.
+
+    Collections are fetched concurrently and each game is enriched once no
+    matter how many users own it. The games table holds the union, with
+    my_rating taken from the first username; every user's own ratings are
+    saved as collection entries. `password` logs in as the first username.
+
+    `batched` enriches through xmlapi2 /thing, 20 games per request, falling
+    back to geekitems/dynamicinfo for any batch that fails.
+
+    Database work runs on db_executor's write thread so the event loop
+    keeps serving while a large collection saves.
+
+    Enriched games are checkpointed to the database under a refresh run id
+    as they arrive. If a refresh dies partway, the next one for the same
+    users resumes that run and skips every game already checkpointed.
+    """
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=20)
+    timeout = httpx.Timeout(60.0, connect=10.0)
+    label = ",".join(usernames)
+
+    async with AsyncExitStack() as stack:
+        client = await stack.enter_async_context(httpx.AsyncClient(limits=limits, timeout=timeout))
+        cache = stack.enter_context(ResponseCache())
+        thing_client = await stack.enter_async_context(make_thing_client()) if batched else None
+        limiter = AdaptiveLimiter()
+        retry = RetryPolicy()
+        session_cookie = None
+        if password:
+            print(f"Authenticating with BGG as '{usernames[0]}'")
+            session_cookie = await get_bgg_session(client, usernames[0], password)
+
+        print(f"Fetching collections for: {', '.join(usernames)}")
+        ids, ratings, base_games = await fetch_collections(
+            client, usernames, session_cookie=session_cookie, limiter=limiter, retry=retry
+        )
+        print(f"Found {len(ids)} unique games across {len(usernames)} collection(s)")
+
+        run_id, checkpointed = await write_executor.run(start_refresh_run, db, label)
+        checkpointer = Checkpointer(db, run_id)
+
+        # Stored games back-fill any game whose enrichment fails; incremental
+        # mode also uses them to skip games that haven't changed.
+        stored = {g.id: g for g in await write_executor.run(load_games, db)}
+        existing = stored if incremental else None
+        try:
+            games = await fetch_all_games(
+                client, base_games,
+                existing=existing, cache=cache, limiter=limiter, on_progress=on_progress,
+                thing_client=thing_client, checkpointed=checkpointed, on_enriched=checkpointer,
+                retry=retry, previous=stored,
+            )
+        finally:
+            await checkpointer.flush()
+
+        print(f"Successfully hydrated {len(games)} games")
+
+    stats = await write_executor.run(save_games, games, db)
+    print(
+        f"Saved: {stats.inserted} new, {stats.updated} changed, {stats.deleted} removed games; "
+        f"{stats.links_added} links added, {stats.links_removed} removed"
+    )
+    hydrated = {g.id for g in games}
+    await write_executor.run(save_collections, db, {
+        user: {gid: r for gid, r in user_ratings.items() if gid in hydrated}
+        for user, user_ratings in ratings.items()
+    })
+    await write_executor.run(finish_refresh_run, db, run_id)
+    # Build the read snapshot now rather than on the first request after.
+    await write_executor.run(load_snapshot, db)
+    return RefreshResponse(
+        username=label, total_in_collection=len(ids), total_hydrated=len(games), cached=True,
+        run_id=run_id, resumed=len(checkpointed),
+        collections={user: len(user_ratings) for user, user_ratings in ratings.items()},
+    )
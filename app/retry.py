@@ -0,0 +1,200 @@
+"""Retries with backoff and a circuit breaker for BGG requests.
+
+get_with_retry retries 429s, 5xx responses and transport errors with
+exponential backoff and full jitter, honouring Retry-After when BGG sends
+one. Every attempt also reports to a CircuitBreaker shared by all workers:
+after a run of consecutive failures it opens and every worker pauses until
+a single probe request gets through, so nobody keeps hammering BGG while it
+is down. If it stays down past `max_open_time`, waiting workers give up
+with CircuitOpenError instead of stalling the refresh forever.
+"""
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+import httpx
+
+from .ratelimit import AdaptiveLimiter
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class BGGRequestError(RuntimeError):
+    """A BGG request failed after exhausting its retries."""
+
+
+class CircuitOpenError(BGGRequestError):
+    """BGG has been failing for too long; requests are no longer attempted."""
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+class CircuitBreaker:
+    """Closed → open after `failure_threshold` consecutive failures.
+
+    While open every caller of wait() sleeps. After `reset_timeout` one probe
+    is let through (half-open): success closes the circuit, failure reopens
+    it with the timeout doubled up to `max_reset_timeout`.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        max_reset_timeout: float = 120.0,
+        max_open_time: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.max_open_time = max_open_time
+        self._clock = clock
+
+        self.state = "closed"
+        self._failures = 0
+        self._reset_timeout = reset_timeout
+        self._open_until = 0.0
+        self._open_since: Optional[float] = None
+        self._probing = False
+        self._changed = asyncio.Event()
+
+    async def wait(self) -> None:
+        """Block until a request may be sent; raises CircuitOpenError."""
+        while True:
+            now = self._clock()
+            if self.state == "open" and now >= self._open_until:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "closed":
+                return
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return
+            if self._open_since is not None and now - self._open_since > self.max_open_time:
+                raise CircuitOpenError("BoardGameGeek has been unavailable for too long; giving up.")
+
+            changed = self._changed
+            timeout = max(0.0, self._open_until - now) if self.state == "open" else None
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def record_success(self) -> None:
+        self._failures = 0
+        if self.state != "closed":
+            self.state = "closed"
+            self._reset_timeout = self.base_reset_timeout
+            self._open_since = None
+            self._probing = False
+            self._notify()
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == "half_open":
+            self._reset_timeout = min(self.max_reset_timeout, self._reset_timeout * 2)
+            self._open()
+        elif self.state == "closed" and self._failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        now = self._clock()
+        self.state = "open"
+        self._probing = False
+        self._open_until = now + self._reset_timeout
+        if self._open_since is None:
+            self._open_since = now
+        print(f"BGG circuit open; pausing requests for {self._reset_timeout:.0f}s")
+        self._notify()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, plus the shared circuit breaker."""
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to sleep before retry number `attempt` (0-based)."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        hinted = parse_retry_after(retry_after)
+        if hinted is not None:
+            return min(self.max_delay, max(hinted, backoff))
+        return backoff
+
+
+async def get_with_retry(
+    client: httpx.AsyncClient,
+    url: str,
+    limiter: Optional[AdaptiveLimiter] = None,
+    retry: Optional[RetryPolicy] = None,
+    **kwargs,
+) -> httpx.Response:
+    """GET `url`, retrying retryable failures according to `retry`.
+
+    Returns the final response, which may still carry a retryable status if
+    attempts ran out. Raises BGGRequestError when the last attempt was a
+    transport error, and CircuitOpenError when the breaker gives up.
+    """
+    attempts = retry.max_attempts if retry is not None else 1
+    for attempt in range(attempts):
+        if retry is not None:
+            await retry.breaker.wait()
+        try:
+            if limiter is not None:
+                r = await limiter.get(client, url, **kwargs)
+            else:
+                r = await client.get(url, **kwargs)
+        except httpx.TransportError as e:
+            if retry is not None:
+                retry.breaker.record_failure()
+            if attempt + 1 >= attempts:
+                raise BGGRequestError(f"GET {url} failed: {e!r}") from e
+            await asyncio.sleep(retry.delay(attempt))
+            continue
+        except BaseException:
+            # Never leave a half-open probe unresolved.
+            if retry is not None:
+                retry.breaker.record_failure()
+            raise
+
+        if r.status_code not in RETRYABLE_STATUSES:
+            if retry is not None:
+                retry.breaker.record_success()
+            return r
+        if retry is not None:
+            retry.breaker.record_failure()
+        if attempt + 1 >= attempts:
+            return r
+        await asyncio.sleep(retry.delay(attempt, r.headers.get("retry-after")))
+    raise AssertionError("unreachable")
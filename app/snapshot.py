@@ -0,0 +1,230 @@
+"""In-memory columnar snapshot of the library.
+
+The whole library fits in RAM and only changes when a refresh saves, so
+db_storage answers filtered reads from a Snapshot instead of SQL:
+
+- numeric columns (year, players, time, weight, ratings) are float64 NumPy
+  arrays with NaN for unknown values, so range filters are vectorized
+  comparisons that drop unknowns exactly like SQL drops NULLs;
+- link filters run on a BitsetIndex (one bitset of game positions per
+  term), and link facet counts are a bincount over (game, term) pairs;
+- every game is kept as a built Game and as its serialized JSON, so a
+  page is a list of lookups and a response a join of byte strings.
+
+A snapshot is immutable. db_storage builds a new one for each data
+version and swaps it in whole, so readers never see a half-built one.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .bitset import BitsetIndex
+from .facets import LINK_FACETS, player_bucket, time_bucket, weight_bucket, year_bucket
+from .models import Game
+
+NUMERIC_COLUMNS = (
+    "year", "min_players", "max_players", "playing_time", "weight", "avg_rating", "bayes_rating", "my_rating",
+)
+
+
+def _floats(values: List[Optional[float]]) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+class LinkIndex:
+    """(game position, term) pairs of one link field, for facet counts."""
+
+    def __init__(self, games: List[Game], field: str):
+        self.terms = sorted({name for g in games for name in getattr(g, field)})
+        term_ids = {name: i for i, name in enumerate(self.terms)}
+        pairs = [(pos, term_ids[name]) for pos, g in enumerate(games) for name in dict.fromkeys(getattr(g, field))]
+        self.game_pos = np.array([p for p, _ in pairs], dtype=np.int32)
+        self.term_idx = np.array([t for _, t in pairs], dtype=np.int32)
+
+    def counts(self, mask: np.ndarray) -> Dict[str, int]:
+        """{term: games in `mask` carrying it}, for terms with any."""
+        per_term = np.bincount(self.term_idx[mask[self.game_pos]], minlength=len(self.terms))
+        return {self.terms[t]: int(per_term[t]) for t in np.flatnonzero(per_term) if self.terms[t]}
+
+
+class Snapshot:
+    """Immutable columnar copy of all games and collections at one data version."""
+
+    def __init__(self, version: str, games: List[Game], collections: Dict[str, Dict[int, Optional[float]]]):
+        self.version = version
+        self.games = sorted(games, key=lambda g: g.id)
+        self.size = len(self.games)
+        self.ids = np.array([g.id for g in self.games], dtype=np.int64)
+        self.columns = {c: _floats([getattr(g, c) for g in self.games]) for c in NUMERIC_COLUMNS}
+        self.names = np.array([g.name for g in self.games], dtype=np.str_)
+        self.links = {field: LinkIndex(self.games, field) for field in LINK_FACETS}
+        self.bitsets = BitsetIndex(self.games)
+
+        # Each game's JSON, split around its my_rating value so a user's own
+        # rating can be spliced in. Names are escaped in JSON, so the bare
+        # key can only be the field itself.
+        self.json = [g.model_dump_json().encode() for g in self.games]
+        self._json_parts = [
+            g.model_copy(update={"my_rating": None}).model_dump_json().encode().partition(b'"my_rating":null')
+            for g in self.games
+        ]
+
+        position = {gid: i for i, gid in enumerate(self.ids.tolist())}
+        self.collections: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for username, ratings in collections.items():
+            members = np.zeros(self.size, dtype=bool)
+            my_rating = np.full(self.size, np.nan)
+            for gid, rating in ratings.items():
+                if gid in position:
+                    members[position[gid]] = True
+                    my_rating[position[gid]] = np.nan if rating is None else rating
+            self.collections[username] = (members, my_rating)
+
+        # Scalar facets as (labels, label index per game) for bincount.
+        self.buckets: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        for facet, labels in (
+            ("years", [year_bucket(g.year) for g in self.games]),
+            ("player_counts", [player_bucket(g.min_players, g.max_players) for g in self.games]),
+            ("time_buckets", [time_bucket(g.playing_time) for g in self.games]),
+            ("weight_buckets", [weight_bucket(g.weight) for g in self.games]),
+        ):
+            distinct = sorted(set(labels))
+            index = {label: i for i, label in enumerate(distinct)}
+            self.buckets[facet] = (distinct, np.array([index[label] for label in labels], dtype=np.int32))
+
+    def game_json(self, pos: int, username: Optional[str] = None) -> bytes:
+        """Serialized Game at `pos`; with `username`, carrying their rating."""
+        if username is None:
+            return self.json[pos]
+        rating = self.collections[username][1][pos]
+        head, key, tail = self._json_parts[pos]
+        value = b"null" if rating != rating else json.dumps(float(rating)).encode()  # NaN is unrated
+        return head + key[:-4] + value + tail
+
+    def mask(
+        self,
+        mechanics: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        designers: Optional[List[str]] = None,
+        artists: Optional[List[str]] = None,
+        publishers: Optional[List[str]] = None,
+        year_min: Optional[int] = None,
+        year_max: Optional[int] = None,
+        players: Optional[int] = None,
+        players_min: Optional[int] = None,
+        players_max: Optional[int] = None,
+        time_max: Optional[int] = None,
+        weight_min: Optional[float] = None,
+        weight_max: Optional[float] = None,
+        rating_min: Optional[float] = None,
+        username: Optional[str] = None,
+        match: Optional[Dict[str, str]] = None,
+    ) -> np.ndarray:
+        """Games matching the filters, with db_storage._apply_filters semantics (no search)."""
+        mask = np.ones(self.size, dtype=bool)
+        if username:
+            members = self.collections.get(username)
+            if members is None:
+                return np.zeros(self.size, dtype=bool)
+            mask &= members[0]
+        bits = self.bitsets.universe
+        for field, values in (
+            ("mechanics", mechanics), ("categories", categories), ("designers", designers),
+            ("artists", artists), ("publishers", publishers),
+        ):
+            if values:
+                bits &= self.bitsets.match(field, values, (match or {}).get(field, "any"))
+        if bits != self.bitsets.universe:
+            raw = np.frombuffer(self.bitsets.to_bytes(bits), dtype=np.uint8)
+            mask &= np.unpackbits(raw, count=self.size, bitorder="little").astype(bool)
+
+        # Comparisons with NaN are False, so unknown values drop out of
+        # bounded filters; the player filters let them through explicitly.
+        col = self.columns
+        with np.errstate(invalid="ignore"):
+            if year_min is not None:
+                mask &= col["year"] >= year_min
+            if year_max is not None:
+                mask &= col["year"] <= year_max
+            if players is not None:
+                mask &= (np.isnan(col["min_players"]) | (col["min_players"] <= players))
+                mask &= (np.isnan(col["max_players"]) | (col["max_players"] >= players))
+            if players_min is not None:
+                mask &= np.isnan(col["max_players"]) | (col["max_players"] >= players_min)
+            if players_max is not None:
+                mask &= np.isnan(col["min_players"]) | (col["min_players"] <= players_max)
+            if time_max is not None:
+                mask &= col["playing_time"] <= time_max
+            if weight_min is not None:
+                mask &= col["weight"] >= weight_min
+            if weight_max is not None:
+                mask &= col["weight"] <= weight_max
+            if rating_min is not None:
+                mask &= col["avg_rating"] >= rating_min
+        return mask
+
+    def _key(self, sort: Optional[str], username: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(values, null flags) to sort by; id order when `sort` is None."""
+        if sort is None:
+            return self.ids, np.zeros(self.size, dtype=bool)
+        if sort == "name":
+            return self.names, np.zeros(self.size, dtype=bool)
+        values = self.columns[sort]
+        if sort == "my_rating" and username in self.collections:
+            values = self.collections[username][1]
+        return values, np.isnan(values)
+
+    def page(
+        self,
+        mask: np.ndarray,
+        sort: Optional[str],
+        order: str,
+        limit: Optional[int],
+        after: Optional[Tuple[Any, int]],
+        username: Optional[str] = None,
+    ) -> Tuple[List[int], bool]:
+        """Positions of the next page of `mask`, and whether more follow.
+
+        Ordered by (sort value, id) with NULLs first ascending and last
+        descending, starting after the `after` (value, id) key, as
+        db_storage's SQL keyset pagination does.
+        """
+        desc = order == "desc"
+        key, nulls = self._key(sort, username)
+        if after is not None:
+            value, last_id = after
+            id_after = self.ids < last_id if desc else self.ids > last_id
+            if sort is None:
+                mask = mask & id_after
+            elif value is None:
+                beyond = nulls & id_after
+                mask = mask & (beyond if desc else beyond | ~nulls)
+            else:
+                with np.errstate(invalid="ignore"):
+                    beyond = ~nulls & ((key < value) if desc else (key > value))
+                    beyond |= ~nulls & (key == value) & id_after
+                mask = mask & (beyond | nulls if desc else beyond)
+
+        positions = np.flatnonzero(mask)
+        if sort is not None:
+            values = key[positions]
+            if values.dtype.kind == "f":
+                values = np.where(nulls[positions], 0.0, values)
+            ranked = np.lexsort((self.ids[positions], values, ~nulls[positions]))
+            positions = positions[ranked[::-1] if desc else ranked]
+        elif desc:
+            positions = positions[::-1]
+        if limit is not None and len(positions) > limit:
+            return positions[:limit].tolist(), True
+        return positions.tolist(), False
+
+    def facet_counts(self, mask: np.ndarray, field: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """{facet: {value: count}} over the games in `mask`; just link `field` if given."""
+        if field is not None:
+            return {field: self.links[field].counts(mask)}
+        counts = {name: index.counts(mask) for name, index in self.links.items()}
+        for facet, (labels, per_game) in self.buckets.items():
+            per_label = np.bincount(per_game[mask], minlength=len(labels))
+            counts[facet] = {labels[i]: int(per_label[i]) for i in np.flatnonzero(per_label)}
+        return counts
@@ -18,11 +18,14 @@ const state = {
   lastGames: null,   // cached result for view toggle (M6.4)
   totalGames: 0,     // unfiltered collection size (M5.6)
   allGames: null,
+  index: null,       // facet bitsets for allGames, if data/index.json exists
 };
 
 async function ensureCollection() {
   if (state.allGames) return state.allGames;
-  state.allGames = await loadCollection();
+  const [games, index] = await Promise.all([loadCollection(), loadIndex()]);
+  state.allGames = games;
+  state.index = index;
   state.totalGames = state.allGames.length;
   return state.allGames;
 }
@@ -272,7 +275,7 @@ async function applyFilters() {
   try {
     collectFilters();
     const games = await ensureCollection();
-    const filtered = queryGames(games, state.filters);
+    const filtered = queryGames(games, state.filters, state.index);
     state.lastGames = filtered;
     state.totalGames = games.length;
     renderResults(filtered, games.length, filtered.length);
@@ -548,6 +551,29 @@ function clearAll() {
 
 // ── Refresh ────────────────────────────────────────────────────────────────
 
+// Follow a background refresh job over SSE until it finishes. Resolves with
+// the job's RefreshResponse, rejects with the job's error.
+function followRefreshJob(jobId, onProgress) {
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`/api/refresh/${encodeURIComponent(jobId)}/events`);
+    source.onmessage = (ev) => {
+      const job = JSON.parse(ev.data);
+      onProgress(job);
+      if (job.state === "succeeded") { source.close(); resolve(job.result); }
+      else if (job.state === "failed") { source.close(); reject(new Error(job.error || "Refresh failed")); }
+    };
+    source.onerror = () => { source.close(); reject(new Error("Lost connection to the refresh job")); };
+  });
+}
+
+function describeRefreshProgress(job) {
+  if (!job.total) return "Syncing with BoardGameGeek…";
+  let text = `Enriched ${job.enriched} of ${job.total} games`;
+  if (job.failed) text += ` (${job.failed} failed)`;
+  if (job.eta_seconds != null) text += ` — about ${Math.max(1, Math.round(job.eta_seconds))}s left`;
+  return text;
+}
+
 async function doRefresh() {
   const refreshBtn = qs("refresh");
   const originalText = refreshBtn ? refreshBtn.textContent : "";
@@ -570,11 +596,25 @@ async function doRefresh() {
 
   try {
     const r = await fetch("/api/refresh", { method: "POST" });
-    if (!r.ok) {
+    let jobId;
+    if (r.status === 409) {
+      // A refresh is already running — follow that one instead.
+      jobId = (r.headers.get("Location") || "").split("/").pop();
+    } else if (!r.ok) {
       const err = await r.json().catch(() => ({}));
       throw new Error(err.detail || `HTTP ${r.status}`);
+    } else {
+      jobId = (await r.json()).id;
     }
-    const data = await r.json();
+
+    const data = await followRefreshJob(jobId, (job) => {
+      const fill = progressDiv.querySelector(".progress-fill");
+      if (job.total) {
+        fill.classList.remove("indeterminate");
+        fill.style.width = `${Math.round(((job.enriched + job.failed) / job.total) * 100)}%`;
+      }
+      progressDiv.querySelector(".progress-text").textContent = describeRefreshProgress(job);
+    });
 
     // Store last synced timestamp
     try { localStorage.setItem("bgg_last_synced", new Date().toISOString()); } catch {}
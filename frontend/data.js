@@ -27,7 +27,40 @@
     return "Heavy (>4.0)";
   }
 
-  function queryGames(games, filters) {
+  // Facet bitsets from data/index.json (scripts/export_collection.py): one
+  // base64 little-endian bitset per value, bit i = games.json position i.
+  function decodeBitset(b64) {
+    const bin = atob(b64);
+    const bytes = new Uint8Array(bin.length);
+    for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+    return bytes;
+  }
+
+  function termBitset(index, field, name) {
+    const cache = index._decoded || (index._decoded = {});
+    const key = `${field}\u0000${name}`;
+    if (!(key in cache)) {
+      const b64 = (index.fields[field] || {})[name];
+      cache[key] = b64 ? decodeBitset(b64) : new Uint8Array(Math.ceil(index.size / 8));
+    }
+    return cache[key];
+  }
+
+  // Games with any of `names` for `field`, as a bitset.
+  function anyOf(index, field, names) {
+    const bits = new Uint8Array(Math.ceil(index.size / 8));
+    for (const name of names) {
+      const term = termBitset(index, field, name);
+      for (let i = 0; i < bits.length; i++) bits[i] |= term[i];
+    }
+    return bits;
+  }
+
+  function hasBit(bits, i) {
+    return (bits[i >> 3] >> (i & 7)) & 1;
+  }
+
+  function queryGames(games, filters, index) {
     const f = filters || {};
     const mech = asArray(f.mechanics);
     const cats = asArray(f.categories);
@@ -45,12 +78,29 @@
 
     const hasAny = (gameList, selected) => selected.some((s) => gameList.includes(s));
 
-    return games.filter((g) => {
-      if (mech.length && !hasAny(g.mechanics, mech)) return false;
-      if (cats.length && !hasAny(g.categories, cats)) return false;
-      if (desi.length && !hasAny(g.designers, desi)) return false;
-      if (arts.length && !hasAny(g.artists, arts)) return false;
-      if (pubs.length && !hasAny(g.publishers, pubs)) return false;
+    // With an index built for this exact list, link filters are bitset ORs
+    // (within a facet) and ANDs (across facets) instead of list scans.
+    const indexed = Boolean(index) && index.size === games.length;
+    let linkBits = null;
+    if (indexed) {
+      const selected = { mechanics: mech, categories: cats, designers: desi, artists: arts, publishers: pubs };
+      for (const [field, names] of Object.entries(selected)) {
+        if (!names.length) continue;
+        const bits = anyOf(index, field, names);
+        if (linkBits) for (let i = 0; i < bits.length; i++) linkBits[i] &= bits[i];
+        else linkBits = bits;
+      }
+    }
+
+    return games.filter((g, i) => {
+      if (linkBits && !hasBit(linkBits, i)) return false;
+      if (!indexed) {
+        if (mech.length && !hasAny(g.mechanics, mech)) return false;
+        if (cats.length && !hasAny(g.categories, cats)) return false;
+        if (desi.length && !hasAny(g.designers, desi)) return false;
+        if (arts.length && !hasAny(g.artists, arts)) return false;
+        if (pubs.length && !hasAny(g.publishers, pubs)) return false;
+      }
 
       if (yearMin !== null && !(g.year != null && g.year >= yearMin)) return false;
       if (yearMax !== null && !(g.year != null && g.year <= yearMax)) return false;
@@ -113,7 +163,19 @@
     return loadCollection._cache;
   }
 
-  const api = { bucketizeMinutes, weightBucket, queryGames, computeFacets, loadCollection };
+  // The facet index is optional; without it queryGames scans lists.
+  async function loadIndex() {
+    if (loadIndex._cache !== undefined) return loadIndex._cache;
+    try {
+      const r = await fetch("data/index.json");
+      loadIndex._cache = r.ok ? await r.json() : null;
+    } catch (err) {
+      loadIndex._cache = null;
+    }
+    return loadIndex._cache;
+  }
+
+  const api = { bucketizeMinutes, weightBucket, decodeBitset, queryGames, computeFacets, loadCollection, loadIndex };
   if (typeof module !== "undefined" && module.exports) module.exports = api;
   if (typeof window !== "undefined") Object.assign(window, api);
 })();
@@ -0,0 +1,117 @@
+"""Benchmark a refresh against the fake BGG server, without the network.
+
+Runs fetch_collection and fetch_all_games against scripts/fake_bgg.py
+mounted in-process, then reports collection time, enrichment throughput
+(games/s) and p50/p99 per-game latency. A game's latency runs from its
+first request leaving the client to its last response arriving, so it
+includes retries and any rate-limiter wait between its requests.
+
+    python -m scripts.bench_refresh --games 2000 --latency 0.05 --rate-429 0.02
+"""
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from app.bgg import fetch_all_games, fetch_collection
+from app.ratelimit import AdaptiveLimiter, INITIAL_CONCURRENCY, INITIAL_RATE, MAX_CONCURRENCY, MAX_RATE
+from app.retry import RetryPolicy
+from scripts.fake_bgg import FakeBGGConfig, make_app
+
+
+class TimingTransport(httpx.AsyncBaseTransport):
+    """Wraps a transport and records request start/end times per objectid."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport):
+        self.inner = inner
+        self.first_sent: Dict[int, float] = {}
+        self.last_done: Dict[int, float] = defaultdict(float)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        raw = request.url.params.get("objectid") or request.url.params.get("id") or ""
+        ids = [int(i) for i in raw.split(",") if i]
+        start = time.perf_counter()
+        for gid in ids:
+            self.first_sent.setdefault(gid, start)
+        response = await self.inner.handle_async_request(request)
+        await response.aread()
+        end = time.perf_counter()
+        for gid in ids:
+            self.last_done[gid] = max(self.last_done[gid], end)
+        return response
+
+    def latencies(self) -> List[float]:
+        return sorted(self.last_done[gid] - t for gid, t in self.first_sent.items())
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+async def bench(args: argparse.Namespace) -> dict:
+    app = make_app(FakeBGGConfig(
+        games=args.games, latency=args.latency, rate_429=args.rate_429, queued_polls=args.queued_polls,
+    ))
+    transport = TimingTransport(httpx.ASGITransport(app=app))
+    limiter = AdaptiveLimiter(
+        rate=args.rate, concurrency=args.concurrency, max_rate=args.max_rate, max_concurrency=args.max_concurrency,
+    )
+    retry = RetryPolicy(base_delay=args.base_delay)
+
+    async with httpx.AsyncClient(transport=transport) as client:
+        started = time.perf_counter()
+        _, _, base_games = await fetch_collection(client, "bench", limiter=limiter, retry=retry)
+        collected = time.perf_counter()
+        # The fake doesn't check auth, so /thing can share the client.
+        games = await fetch_all_games(
+            client, base_games,
+            limiter=limiter, retry=retry, thing_client=client if args.batched else None,
+        )
+        finished = time.perf_counter()
+
+    latencies = transport.latencies()
+    enrich_seconds = finished - collected
+    return {
+        "games": len(games),
+        "collection_s": collected - started,
+        "enrich_s": enrich_seconds,
+        "games_per_s": len(games) / enrich_seconds if enrich_seconds else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "requests": dict(app.state.requests),
+        "final_rate": limiter.rate,
+        "final_concurrency": limiter.concurrency,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark a refresh against a local fake BGG.")
+    parser.add_argument("--games", type=int, default=1000, help="collection size")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake server latency in seconds")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--queued-polls", type=int, default=1, help="202 responses before the collection")
+    parser.add_argument("--batched", action="store_true", help="enrich through xmlapi2 /thing")
+    parser.add_argument("--rate", type=float, default=INITIAL_RATE, help="limiter initial requests/s")
+    parser.add_argument("--max-rate", type=float, default=MAX_RATE)
+    parser.add_argument("--concurrency", type=float, default=INITIAL_CONCURRENCY)
+    parser.add_argument("--max-concurrency", type=float, default=MAX_CONCURRENCY)
+    parser.add_argument("--base-delay", type=float, default=1.0, help="retry backoff base in seconds")
+    args = parser.parse_args()
+
+    result = asyncio.run(bench(args))
+    print(f"games:            {result['games']}")
+    print(f"collection fetch: {result['collection_s']:.2f}s")
+    print(f"enrichment:       {result['enrich_s']:.2f}s ({result['games_per_s']:.1f} games/s)")
+    print(f"per-game latency: p50 {result['p50_ms']:.0f}ms, p99 {result['p99_ms']:.0f}ms")
+    print(f"limiter settled:  {result['final_rate']:.1f} req/s, {result['final_concurrency']:.0f} in flight")
+    print(f"requests:         {result['requests']}")
+
+
+if __name__ == "__main__":
+    main()
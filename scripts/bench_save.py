@@ -0,0 +1,130 @@
+"""Benchmark save_games against the old per-row ORM write path.
+
+Generates synthetic games (scripts/fake_bgg.py's generator) and times a
+full save into a fresh SQLite file for each size, with both the Core
+executemany path (save_games(replace=True)) and the per-object ORM path it
+replaced. The "diff" column re-saves the collection with 1% of games
+changed, which is what a typical refresh looks like.
+
+    python -m scripts.bench_save --sizes 1000 10000 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.db_models import (
+    Base, GameDB, GameMechanic, GameCategory, GameDesigner, GameArtist, GamePublisher,
+    Mechanic, Category, Designer, Artist, Publisher,
+)
+from app.db_storage import save_games
+from app.models import Game
+from scripts.fake_bgg import generate_games
+
+
+def save_games_orm(games: List[Game], db: Session) -> None:
+    """The original write path: one ORM object per game and per link row."""
+    for model in (GameMechanic, GameCategory, GameDesigner, GameArtist, GamePublisher,
+                  Mechanic, Category, Designer, Artist, Publisher, GameDB):
+        db.query(model).delete()
+
+    terms: Dict[type, dict] = {}
+
+    def term(model, name):
+        known = terms.setdefault(model, {})
+        if name not in known:
+            known[name] = model(name=name)
+        return known[name]
+
+    for game in games:
+        db.add(GameDB(
+            id=game.id, name=game.name, year=game.year,
+            image=game.image, thumbnail=game.thumbnail,
+            min_players=game.min_players, max_players=game.max_players,
+            playing_time=game.playing_time, weight=game.weight,
+            avg_rating=game.avg_rating, bayes_rating=game.bayes_rating,
+            my_rating=game.my_rating,
+        ))
+        for m in game.mechanics:
+            db.add(GameMechanic(game_id=game.id, term=term(Mechanic, m)))
+        for c in game.categories:
+            db.add(GameCategory(game_id=game.id, term=term(Category, c)))
+        for d in game.designers:
+            db.add(GameDesigner(game_id=game.id, term=term(Designer, d)))
+        for a in game.artists:
+            db.add(GameArtist(game_id=game.id, term=term(Artist, a)))
+        for p in game.publishers:
+            db.add(GamePublisher(game_id=game.id, term=term(Publisher, p)))
+
+    db.commit()
+
+
+def make_games(count: int) -> List[Game]:
+    return [
+        Game(
+            id=g.id, name=g.name, year=g.year,
+            image=f"https://fake-bgg.test/{g.id}.jpg", thumbnail=f"https://fake-bgg.test/{g.id}_t.jpg",
+            min_players=g.min_players, max_players=g.max_players, playing_time=g.playing_time,
+            weight=g.weight, avg_rating=g.avg_rating, bayes_rating=g.avg_rating, my_rating=g.my_rating,
+            mechanics=g.links["boardgamemechanic"], categories=g.links["boardgamecategory"],
+            designers=g.links["boardgamedesigner"], artists=g.links["boardgameartist"],
+            publishers=g.links["boardgamepublisher"],
+        )
+        for g in generate_games(count)
+    ]
+
+
+def change_some(games: List[Game], share: float = 0.01) -> List[Game]:
+    """A copy of `games` with every 1/share-th game's weight and mechanics changed."""
+    step = max(1, int(1 / share))
+    return [
+        g.model_copy(update={"weight": (g.weight or 0) + 0.1, "mechanics": g.mechanics[1:] + ["Bench"]})
+        if i % step == 0 else g
+        for i, g in enumerate(games)
+    ]
+
+
+def time_save(
+    save: Callable[[List[Game], Session], None], games: List[Game], existing: Optional[List[Game]] = None,
+) -> float:
+    """Seconds for one save into an on-disk database holding `existing`."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        Base.metadata.create_all(engine)
+        with sessionmaker(bind=engine)() as db:
+            if existing:
+                save_games(existing, db, replace=True)
+            started = time.perf_counter()
+            save(games, db)
+            return time.perf_counter() - started
+    finally:
+        engine.dispose()
+        os.unlink(path)
+
+
+def save_games_replace(games: List[Game], db: Session) -> None:
+    save_games(games, db, replace=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark save_games (Core) against per-row ORM adds.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'games':>8} {'orm':>9} {'core':>9} {'speedup':>8} {'diff 1%':>9}")
+    for size in args.sizes:
+        games = make_games(size)
+        orm = time_save(save_games_orm, games)
+        core = time_save(save_games_replace, games)
+        diff = time_save(save_games, change_some(games), existing=games)
+        print(f"{size:>8} {orm:>8.2f}s {core:>8.2f}s {orm / core:>7.1f}x {diff:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark /api/games serialization: models against cached JSON bytes.
+
+Builds a snapshot of synthetic games (scripts/bench_save's generator) and
+times turning one page of N games into the response body both ways: the
+model path builds a Game per game, validates them into GamesResponse and
+dumps it; the cached path joins the snapshot's pre-serialized game bytes.
+Times are per 1k games, the best of --repeat runs.
+
+    python -m scripts.bench_serialize --sizes 1000 10000
+"""
+import argparse
+import time
+from typing import Callable
+
+from app.main import games_response_json
+from app.models import Game, GamesResponse
+from app.snapshot import Snapshot
+from scripts.bench_save import make_games
+
+
+def best_of(repeat: int, run: Callable[[], bytes]) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark model vs pre-serialized /api/games bodies.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'games':>8} {'models/1k':>10} {'cached/1k':>10} {'speedup':>8} {'build':>8}")
+    for size in args.sizes:
+        games = make_games(size)
+        started = time.perf_counter()
+        snapshot = Snapshot("bench", games, {})
+        build = time.perf_counter() - started
+        positions = list(range(size))
+
+        def models() -> bytes:
+            page = [Game(**snapshot.games[pos].model_dump()) for pos in positions]
+            return GamesResponse(games=page, total=size, filtered=size).model_dump_json().encode()
+
+        def cached() -> bytes:
+            return games_response_json([snapshot.game_json(pos) for pos in positions], size, size, None)
+
+        assert models() == cached()
+        slow = best_of(args.repeat, models) * 1000 / size
+        fast = best_of(args.repeat, cached) * 1000 / size
+        print(f"{size:>8} {slow * 1000:>8.2f}ms {fast * 1000:>8.3f}ms {slow / fast:>7.0f}x {build:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,81 @@
 """Fetch the BGG collection and write it to frontend/data/games.json.
 
 Reuses app/bgg.py so the static site ships the same data the FastAPI app
-would serve. Run locally, then commit + deploy.
+would serve. Alongside it, index.json holds a bitset per link value
+(app/bitset.py) over the positions in games.json, which data.js uses for
+facet filters. Run locally, then commit + deploy.
 """
 import asyncio
 import json
 import os
+from contextlib import AsyncExitStack
 from pathlib import Path
 from typing import List
 
 import httpx
 from dotenv import load_dotenv
 
-from app.bgg import fetch_collection, get_bgg_session, fetch_all_games
+from app.bgg import fetch_collections, get_bgg_session, fetch_all_games, make_thing_client
+from app.bitset import BitsetIndex
+from app.http_cache import ResponseCache
+from app.ratelimit import AdaptiveLimiter
+from app.retry import RetryPolicy
 from app.models import Game
+from app.refresh import configured_usernames
 
 load_dotenv()
 
 OUT_PATH = Path(__file__).resolve().parent.parent / "frontend" / "data" / "games.json"
+INDEX_PATH = OUT_PATH.with_name("index.json")
+
+
+def sort_games(games: List[Game]) -> List[Game]:
+    """The order games.json lists games in: case-insensitively by name."""
+    return sorted(games, key=lambda g: (g.name or "").lower())
 
 
 def games_to_json(games: List[Game]) -> str:
     """Serialize games to deterministic, name-sorted, pretty JSON."""
-    data = [g.model_dump() for g in games]
-    data.sort(key=lambda d: (d["name"] or "").lower())
+    data = [g.model_dump() for g in sort_games(games)]
     return json.dumps(data, ensure_ascii=False, indent=2) + "\n"
 
 
+def index_to_json(games: List[Game]) -> str:
+    """Bitset index over the games.json positions of `games`, as compact JSON."""
+    index = BitsetIndex(sort_games(games)).to_json()
+    return json.dumps(index, ensure_ascii=False, sort_keys=True, separators=(",", ":")) + "\n"
+
+
 async def export() -> int:
-    user = os.getenv("BGG_USERNAME")
-    if not user:
-        raise SystemExit("BGG_USERNAME not configured in .env")
+    users = configured_usernames()
+    if not users:
+        raise SystemExit("BGG_USERNAME (or BGG_USERNAMES) not configured in .env")
     password = os.getenv("BGG_PASSWORD")
 
     limits = httpx.Limits(max_keepalive_connections=20, max_connections=20)
     timeout = httpx.Timeout(60.0, connect=10.0)
-    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
-        session_cookie = await get_bgg_session(client, user, password) if password else None
-        print(f"Fetching collection for user: {user}")
-        ids, my_ratings, collection_xml = await fetch_collection(
-            client, user, session_cookie=session_cookie
+    batched = os.getenv("BGG_BATCH_ENRICH", "").lower() in ("1", "true", "yes")
+    async with AsyncExitStack() as stack:
+        client = await stack.enter_async_context(httpx.AsyncClient(limits=limits, timeout=timeout))
+        cache = stack.enter_context(ResponseCache())
+        thing_client = await stack.enter_async_context(make_thing_client()) if batched else None
+        limiter = AdaptiveLimiter()
+        retry = RetryPolicy()
+        session_cookie = await get_bgg_session(client, users[0], password) if password else None
+        print(f"Fetching collections for: {', '.join(users)}")
+        ids, ratings, base_games = await fetch_collections(
+            client, users, session_cookie=session_cookie, limiter=limiter, retry=retry
+        )
+        print(f"Found {len(ids)} unique games; hydrating…")
+        games = await fetch_all_games(
+            client, base_games,
+            cache=cache, limiter=limiter, thing_client=thing_client, retry=retry,
         )
-        print(f"Found {len(ids)} games; hydrating…")
-        games = await fetch_all_games(client, ids, my_ratings, collection_xml)
 
     OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
     OUT_PATH.write_text(games_to_json(games), encoding="utf-8")
-    print(f"Wrote {len(games)} games to {OUT_PATH}")
+    INDEX_PATH.write_text(index_to_json(games), encoding="utf-8")
+    print(f"Wrote {len(games)} games to {OUT_PATH} (facet index: {INDEX_PATH.name})")
     return len(games)
 
 
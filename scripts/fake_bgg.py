@@ -0,0 +1,211 @@
+"""A local stand-in for the BGG endpoints a refresh talks to.
+
+Serves login, the xmlapi2 collection (with 202 "queued" responses first),
+geekitems, dynamicinfo and xmlapi2 /thing from a deterministic, generated
+collection. Latency, the share of requests answered with 429 and the
+collection size are configurable, so refresh throughput can be measured
+without the network (see scripts/bench_refresh.py).
+
+The app routes on path only, so the hosts in app/bgg.py don't matter when
+it is mounted with httpx.ASGITransport:
+
+    app = make_app(FakeBGGConfig(games=2000, latency=0.05))
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+
+It can also be run on its own for poking at with curl:
+
+    python -m scripts.fake_bgg --games 500 --latency 0.1 --port 8001
+"""
+import argparse
+import asyncio
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from fastapi import FastAPI, Request, Response
+
+MECHANICS = [
+    "Worker Placement", "Deck Building", "Dice Rolling", "Area Control", "Set Collection",
+    "Hand Management", "Tile Placement", "Cooperative Game", "Drafting", "Trading",
+]
+CATEGORIES = ["Strategy", "Economic", "Fantasy", "Card Game", "Family", "Wargame", "Party Game"]
+DESIGNERS = [f"Designer {i}" for i in range(40)]
+ARTISTS = [f"Artist {i}" for i in range(60)]
+PUBLISHERS = [f"Publisher {i}" for i in range(25)]
+
+
+@dataclass
+class FakeBGGConfig:
+    games: int = 1000                # collection size
+    latency: float = 0.05            # seconds added to every response
+    jitter: float = 0.5              # latency varies by ± this fraction
+    rate_429: float = 0.0            # share of enrichment requests answered 429
+    retry_after: int = 0             # Retry-After on 429s (0 = no header)
+    queued_polls: int = 1            # 202s before the collection is ready
+    seed: int = 0
+
+
+@dataclass
+class FakeGame:
+    id: int
+    name: str
+    year: int
+    min_players: int
+    max_players: int
+    playing_time: int
+    avg_rating: float
+    my_rating: float
+    weight: float
+    links: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def generate_games(count: int, seed: int = 0) -> List[FakeGame]:
+    """A reproducible collection of `count` games."""
+    rnd = random.Random(seed)
+    games = []
+    for i in range(count):
+        min_players = rnd.randint(1, 3)
+        games.append(FakeGame(
+            id=1000 + i,
+            name=f"Game {i:05d}",
+            year=rnd.randint(1980, 2024),
+            min_players=min_players,
+            max_players=min_players + rnd.randint(0, 4),
+            playing_time=rnd.choice([20, 30, 45, 60, 90, 120, 180]),
+            avg_rating=round(rnd.uniform(5.0, 8.5), 2),
+            my_rating=rnd.randint(1, 10),
+            weight=round(rnd.uniform(1.0, 4.5), 2),
+            links={
+                "boardgamemechanic": rnd.sample(MECHANICS, rnd.randint(1, 4)),
+                "boardgamecategory": rnd.sample(CATEGORIES, rnd.randint(1, 3)),
+                "boardgamedesigner": rnd.sample(DESIGNERS, 1),
+                "boardgameartist": rnd.sample(ARTISTS, rnd.randint(1, 2)),
+                "boardgamepublisher": rnd.sample(PUBLISHERS, rnd.randint(1, 2)),
+            },
+        ))
+    return games
+
+
+def collection_xml(games: List[FakeGame]) -> str:
+    items = "".join(
+        f"""<item objecttype="thing" objectid="{g.id}" subtype="boardgame">
+<name sortindex="1">{escape(g.name)}</name>
+<yearpublished>{g.year}</yearpublished>
+<image>https://fake-bgg.test/{g.id}.jpg</image>
+<thumbnail>https://fake-bgg.test/{g.id}_t.jpg</thumbnail>
+<stats minplayers="{g.min_players}" maxplayers="{g.max_players}" playingtime="{g.playing_time}">
+<rating value="{g.my_rating}"><average value="{g.avg_rating}"/><bayesaverage value="{g.avg_rating}"/></rating>
+</stats>
+</item>
+"""
+        for g in games
+    )
+    return f'<?xml version="1.0" encoding="utf-8"?>\n<items totalitems="{len(games)}">\n{items}</items>'
+
+
+def thing_xml(games: List[FakeGame]) -> str:
+    items = []
+    for g in games:
+        links = "".join(
+            f'<link type="{kind}" id="0" value="{escape(name)}"/>'
+            for kind, names in g.links.items() for name in names
+        )
+        items.append(
+            f'<item type="boardgame" id="{g.id}"><thumbnail>https://fake-bgg.test/{g.id}_t.jpg</thumbnail>'
+            f'{links}<statistics page="1"><ratings><average value="{g.avg_rating}"/>'
+            f'<averageweight value="{g.weight}"/></ratings></statistics></item>'
+        )
+    return f"<items>{''.join(items)}</items>"
+
+
+def make_app(config: Optional[FakeBGGConfig] = None) -> FastAPI:
+    """Build the fake BGG app. `app.state.requests` counts requests per endpoint."""
+    config = config or FakeBGGConfig()
+    games = generate_games(config.games, config.seed)
+    by_id = {g.id: g for g in games}
+    rnd = random.Random(config.seed)
+    polls: Counter = Counter()
+    collection_body = collection_xml(games)
+
+    app = FastAPI(title="Fake BGG")
+    app.state.config = config
+    app.state.requests = Counter()
+
+    async def respond(endpoint: str, throttle: bool = True) -> Optional[Response]:
+        """Count the request and sleep for the configured latency; a 429 to send, or None."""
+        app.state.requests[endpoint] += 1
+        if config.latency:
+            spread = config.latency * config.jitter
+            await asyncio.sleep(max(0.0, config.latency + rnd.uniform(-spread, spread)))
+        if throttle and rnd.random() < config.rate_429:
+            app.state.requests["429"] += 1
+            headers = {"Retry-After": str(config.retry_after)} if config.retry_after else {}
+            return Response(status_code=429, headers=headers)
+        return None
+
+    @app.post("/login/api/v1")
+    async def login():
+        await respond("login", throttle=False)
+        response = Response(status_code=204)
+        response.set_cookie("SessionID", "fake-session")
+        return response
+
+    @app.get("/xmlapi2/collection")
+    async def collection(username: str):
+        await respond("collection", throttle=False)
+        polls[username] += 1
+        if polls[username] <= config.queued_polls:
+            return Response(status_code=202, content="Your request has been accepted and will be processed.")
+        return Response(content=collection_body, media_type="text/xml")
+
+    @app.get("/api/geekitems")
+    async def geekitems(objectid: int):
+        error = await respond("geekitems")
+        if error is not None:
+            return error
+        g = by_id.get(objectid)
+        if g is None:
+            return {"item": {}}
+        return {"item": {
+            "objectid": str(g.id),
+            "imageurl": f"https://fake-bgg.test/{g.id}.jpg",
+            "images": {"thumb": f"https://fake-bgg.test/{g.id}_t.jpg"},
+            "links": {kind: [{"name": n} for n in names] for kind, names in g.links.items()},
+        }}
+
+    @app.get("/api/dynamicinfo")
+    async def dynamicinfo(objectid: int):
+        error = await respond("dynamicinfo")
+        if error is not None:
+            return error
+        g = by_id.get(objectid)
+        return {"item": {"stats": {"avgweight": str(g.weight) if g else "0"}}}
+
+    @app.get("/xmlapi2/thing")
+    async def thing(request: Request):
+        error = await respond("thing")
+        if error is not None:
+            return error
+        ids = [int(i) for i in request.query_params.get("id", "").split(",") if i]
+        return Response(content=thing_xml([by_id[i] for i in ids if i in by_id]), media_type="text/xml")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=FakeBGGConfig.games)
+    parser.add_argument("--latency", type=float, default=FakeBGGConfig.latency)
+    parser.add_argument("--rate-429", type=float, default=FakeBGGConfig.rate_429)
+    parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    import uvicorn
+    config = FakeBGGConfig(games=args.games, latency=args.latency, rate_429=args.rate_429)
+    uvicorn.run(make_app(config), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
 """Integration tests for the API endpoints"""
 
+import base64
+import json
+
 import pytest
 import tempfile
 import os
@@ -141,6 +144,66 @@ class TestGamesEndpoints:
         assert len(data["games"]) == 1
         assert data["games"][0]["name"] == "Agricola"
 
+    def test_get_games_paged_and_sorted(self, client, db_session, sample_games):
+        save_games(sample_games, db_session)
+        first = client.get("/api/games?sort=year&order=desc&limit=1").json()
+        assert [g["name"] for g in first["games"]] == ["Agricola"]
+        assert first["filtered"] == first["total"] == 2
+
+        rest = client.get(f"/api/games?sort=year&order=desc&limit=1&cursor={first['next_cursor']}").json()
+        assert [g["name"] for g in rest["games"]] == ["Catan"]
+        assert rest["next_cursor"] is None
+
+        assert client.get(f"/api/games?sort=name&limit=1&cursor={first['next_cursor']}").status_code == 400
+        assert client.get("/api/games?sort=image").status_code == 422
+
+    @pytest.mark.parametrize("value", [10 ** 400, -(10 ** 30), "abc", {"x": 1}])
+    def test_get_games_rejects_tampered_cursor(self, client, db_session, sample_games, value):
+        save_games(sample_games, db_session)
+        raw = json.dumps(["year", "asc", value, 1]).encode()
+        cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        assert client.get(f"/api/games?sort=year&limit=1&cursor={cursor}").status_code == 400
+
+    def test_get_games_match_all(self, client, db_session, sample_games):
+        save_games(sample_games, db_session)
+        url = "/api/games?categories=Euro,Family"
+        assert client.get(url).json()["filtered"] == 2
+        assert client.get(url + "&categories_match=all").json()["filtered"] == 0
+        assert client.get("/api/games?mechanics=Trading,Dice Rolling&mechanics_match=all").json()["filtered"] == 1
+        assert client.get(url + "&categories_match=some").status_code == 422
+
+    def test_get_games_projection(self, client, db_session, sample_games):
+        save_games(sample_games, db_session)
+        data = client.get("/api/games?fields=name,thumbnail&sort=name").json()
+        assert data["games"] == [
+            {"id": 1, "name": "Agricola", "thumbnail": None},
+            {"id": 2, "name": "Catan", "thumbnail": None},
+        ]
+        assert data["filtered"] == 2
+
+        data = client.get("/api/games?fields=name&include=links&mechanics=Trading").json()
+        assert data["games"][0]["designers"] == ["Klaus Teuber"]
+        assert "year" not in data["games"][0]
+
+        assert client.get("/api/games?fields=name,secret").status_code == 400
+
+    def test_get_games_revalidates_with_etag(self, client, db_session, sample_games):
+        save_games(sample_games, db_session)
+        first = client.get("/api/games?mechanics=Trading,Farming")
+        etag = first.headers["etag"]
+        assert first.headers["cache-control"] == "no-cache"
+
+        # Same query with the values reordered: same cached body and ETag.
+        again = client.get("/api/games?mechanics=Farming,Trading", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.headers["etag"] == etag
+
+        save_games(sample_games[:1], db_session)
+        changed = client.get("/api/games?mechanics=Trading,Farming", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert changed.json()["filtered"] == 1
+
 
 class TestFacetsEndpoints:
 
@@ -164,6 +227,16 @@ class TestFacetsEndpoints:
         assert "1–5" in data["player_counts"]
         assert "Medium‑Heavy (3.26–4.0)" in data["weight_buckets"]
 
+    def test_get_facets_drill_down(self, client, db_session, sample_games):
+        save_games(sample_games, db_session)
+        data = client.get("/api/facets?mechanics=Worker Placement").json()
+        assert data["designers"] == {"Uwe Rosenberg": 1}
+        assert data["years"] == {"2007": 1}
+        # The filtered field itself counts as if its filter weren't set.
+        assert data["mechanics"] == client.get("/api/facets").json()["mechanics"]
+        data = client.get("/api/facets?mechanics=Worker Placement&mechanics_match=all").json()
+        assert data["mechanics"] == {"Worker Placement": 1, "Farming": 1}
+
 
 class TestRefreshEndpoints:
 
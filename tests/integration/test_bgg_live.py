@@ -498,21 +498,12 @@ async def test_full_bgg_flow():
         session_id = await get_bgg_session(client, BGG_USERNAME, BGG_PASSWORD)
         print(f"\nSession ID: {session_id[:20]}...")
 
-        ids, ratings, collection_xml = await fetch_collection(client, BGG_USERNAME, session_cookie=session_id)
+        ids, ratings, base_games = await fetch_collection(client, BGG_USERNAME, session_cookie=session_id)
         print(f"Collection: {len(ids)} games")
         assert len(ids) > 0, "No games found in collection"
 
         # Only enrich the first 3 games to keep the test fast
-        import xml.etree.ElementTree as ET
-        root = ET.fromstring(collection_xml)
-        items = root.findall("item") or root.findall(".//item")
-        # Rebuild a minimal XML with just 3 items
-        mini_root = ET.Element("items")
-        for item in items[:3]:
-            mini_root.append(item)
-        mini_xml = ET.tostring(mini_root, encoding="unicode")
-
-        games = await fetch_all_games(client, ids[:3], ratings, mini_xml)
+        games = await fetch_all_games(client, base_games[:3])
         print(f"Hydrated: {len(games)} games")
         for g in games:
             print(f"  {g.name}: mechanics={g.mechanics[:2]}, categories={g.categories[:2]}")
@@ -0,0 +1,26 @@
+"""The fake BGG server drives a full refresh without the network."""
+
+import httpx
+import pytest
+
+from app.bgg import fetch_all_games, fetch_collection, get_bgg_session
+from app.ratelimit import AdaptiveLimiter
+from app.retry import CircuitBreaker, RetryPolicy
+from scripts.fake_bgg import FakeBGGConfig, make_app
+
+pytestmark = pytest.mark.integration
+
+
+async def test_refresh_against_fake_bgg():
+    app = make_app(FakeBGGConfig(games=30, latency=0, rate_429=0.1, queued_polls=1))
+    limiter = AdaptiveLimiter(rate=500, max_rate=500)
+    retry = RetryPolicy(max_attempts=10, base_delay=0.001, breaker=CircuitBreaker(failure_threshold=100))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app)) as client:
+        assert await get_bgg_session(client, "bench", "secret") == "fake-session"
+        _, _, base_games = await fetch_collection(client, "bench", limiter=limiter, retry=retry)
+        games = await fetch_all_games(client, base_games, limiter=limiter, retry=retry)
+
+    assert len(games) == 30
+    assert all(g.mechanics and g.weight for g in games)
+    assert app.state.requests["collection"] == 2  # one 202, then the XML
+    assert app.state.requests["geekitems"] >= 30
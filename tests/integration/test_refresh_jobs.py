@@ -0,0 +1,94 @@
+"""Integration tests for background refresh jobs and their progress stream."""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.jobs import JobManager
+from app.models import RefreshResponse
+
+pytestmark = pytest.mark.integration
+
+
+@pytest.fixture
+def fake_refresh(monkeypatch):
+    """Replace the BGG round trip with a controllable fake."""
+    monkeypatch.setenv("BGG_USERNAME", "alice")
+    # Entering TestClient runs the lifespan; keep it off the real data/games.db.
+    monkeypatch.setattr(main, "init_db", lambda: None)
+    monkeypatch.setattr(main, "refresh_jobs", JobManager())
+    gate = {"release": asyncio.Event()}
+
+    async def fake(db, usernames, password=None, on_progress=None, **options):
+        username = ",".join(usernames)
+        on_progress(0, 0, 3)
+        on_progress(1, 0, 3)
+        on_progress(2, 1, 3)
+        await gate["release"].wait()
+        gate["release"] = asyncio.Event()
+        if gate.get("fail"):
+            raise LookupError(f"BGG username '{username}' not found.")
+        return RefreshResponse(username=username, total_in_collection=3, total_hydrated=2, cached=True)
+
+    monkeypatch.setattr(main, "refresh_collections", fake)
+    return gate
+
+
+def _release(client, gate):
+    client.portal.call(gate["release"].set)
+
+
+def test_refresh_returns_job_immediately(fake_refresh):
+    with TestClient(main.app) as client:
+        r = client.post("/api/refresh")
+        assert r.status_code == 202
+        job = r.json()
+        assert job["username"] == "alice"
+        assert job["state"] in ("pending", "running")
+
+        status = client.get(f"/api/refresh/{job['id']}").json()
+        assert status["total"] == 3
+        assert status["enriched"] == 2
+        assert status["failed"] == 1
+
+        _release(client, fake_refresh)
+        events = [
+            json.loads(line[len("data: "):])
+            for line in client.get(f"/api/refresh/{job['id']}/events").iter_lines()
+            if line.startswith("data: ")
+        ]
+        assert events[-1]["state"] == "succeeded"
+        assert events[-1]["result"]["total_hydrated"] == 2
+
+
+def test_duplicate_refresh_is_refused(fake_refresh):
+    with TestClient(main.app) as client:
+        first = client.post("/api/refresh").json()
+        r = client.post("/api/refresh")
+        assert r.status_code == 409
+        assert r.headers["location"] == f"/api/refresh/{first['id']}"
+
+        _release(client, fake_refresh)
+        client.get(f"/api/refresh/{first['id']}/events").read()
+        assert client.post("/api/refresh").status_code == 202
+        _release(client, fake_refresh)
+
+
+def test_failed_refresh_reports_error(fake_refresh):
+    fake_refresh["fail"] = True
+    with TestClient(main.app) as client:
+        job = client.post("/api/refresh").json()
+        _release(client, fake_refresh)
+        client.get(f"/api/refresh/{job['id']}/events").read()
+        status = client.get(f"/api/refresh/{job['id']}").json()
+        assert status["state"] == "failed"
+        assert "not found" in status["error"]
+
+
+def test_unknown_job_is_404(fake_refresh):
+    with TestClient(main.app) as client:
+        assert client.get("/api/refresh/nope").status_code == 404
+        assert client.get("/api/refresh/nope/events").status_code == 404
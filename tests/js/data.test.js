@@ -7,6 +7,10 @@ const { queryGames, computeFacets, bucketizeMinutes, weightBucket } = require(".
 const games = JSON.parse(
   fs.readFileSync(path.join(__dirname, "fixtures", "sample.json"), "utf8")
 );
+// Built from sample.json by app/bitset.py's BitsetIndex.to_json().
+const index = JSON.parse(
+  fs.readFileSync(path.join(__dirname, "fixtures", "sample-index.json"), "utf8")
+);
 const names = (gs) => gs.map((g) => g.name).sort();
 
 test("no filters returns all games", () => {
@@ -57,6 +61,23 @@ test("search is case-insensitive substring", () => {
   assert.deepEqual(names(queryGames(games, { search: "patch" })), ["Patchwork"]);
 });
 
+test("bitset index gives the same results as list scans", () => {
+  for (const filters of [
+    { mechanics: ["Tile Placement"] },
+    { mechanics: ["Tile Placement", "Hand Management"] },
+    { mechanics: ["Tile Placement"], categories: ["Abstract Strategy"], designers: ["Uwe Rosenberg"] },
+    { publishers: ["Nobody"] },
+    { mechanics: ["Tile Placement"], time_max: "40" },
+  ]) {
+    assert.deepEqual(names(queryGames(games, filters, index)), names(queryGames(games, filters)));
+  }
+});
+
+test("an index for a different list is ignored", () => {
+  const r = queryGames(games.slice(1), { mechanics: ["Tile Placement"] }, index);
+  assert.deepEqual(names(r), ["Patchwork"]);
+});
+
 test("bucketizeMinutes labels", () => {
   assert.equal(bucketizeMinutes(null), "Unknown");
   assert.equal(bucketizeMinutes(30), "≤30 min");
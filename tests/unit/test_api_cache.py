@@ -0,0 +1,41 @@
+"""Unit tests for the read-endpoint response cache"""
+
+import pytest
+
+from app.api_cache import ApiResponseCache, cache_key, etag_matches
+
+pytestmark = pytest.mark.unit
+
+
+def test_keys_ignore_list_order_and_unset_params():
+    a = cache_key("/api/games", {"mechanics": ["B", "A"], "year_min": None}, "1-x")
+    b = cache_key("/api/games", {"mechanics": ["A", "B"]}, "1-x")
+    assert a == b
+    assert a != cache_key("/api/games", {"mechanics": ["A", "B"]}, "2-y")
+    assert a != cache_key("/api/facets", {"mechanics": ["A", "B"]}, "1-x")
+
+
+def test_lru_eviction():
+    cache = ApiResponseCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a").body == b"1"  # a is now most recent
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_etag_is_strong_and_tracks_the_body():
+    cache = ApiResponseCache()
+    first = cache.put("a", b"same")
+    assert first.etag.startswith('"') and first.etag == cache.put("b", b"same").etag
+    assert first.etag != cache.put("c", b"other").etag
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
@@ -0,0 +1,91 @@
+import httpx
+import pytest
+
+from app.bgg import THING_BATCH_SIZE, fetch_all_games, fetch_things_batch
+from app.models import Game
+
+pytestmark = pytest.mark.unit
+
+
+def _thing_xml(ids):
+    items = "".join(
+        f"""<item type="boardgame" id="{i}">
+          <thumbnail>https://img/{i}_t.jpg</thumbnail>
+          <link type="boardgamemechanic" id="1" value="Dice Rolling"/>
+          <link type="boardgamecategory" id="2" value="Economic"/>
+          <link type="boardgamedesigner" id="3" value="Klaus Teuber"/>
+          <statistics page="1"><ratings>
+            <average value="7.1"/><averageweight value="2.29"/>
+          </ratings></statistics>
+        </item>"""
+        for i in ids
+    )
+    return f"<items>{items}</items>".encode()
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def test_fetch_things_batch_parses_links_and_weight():
+    def handler(request):
+        assert request.url.path == "/xmlapi2/thing"
+        assert request.url.params["id"] == "13,822"
+        return httpx.Response(200, content=_thing_xml([13, 822]))
+
+    games = [Game(id=13, name="Catan"), Game(id=822, name="Carcassonne")]
+    async with _client(handler) as client:
+        found = await fetch_things_batch(client, games)
+
+    catan = found[13]
+    assert catan.mechanics == ["Dice Rolling"]
+    assert catan.categories == ["Economic"]
+    assert catan.designers == ["Klaus Teuber"]
+    assert catan.weight == pytest.approx(2.29)
+    assert catan.thumbnail == "https://img/13_t.jpg"
+
+
+async def test_batched_enrichment_uses_one_request_per_batch():
+    thing_calls = []
+
+    def thing_handler(request):
+        ids = [int(i) for i in request.url.params["id"].split(",")]
+        thing_calls.append(ids)
+        return httpx.Response(200, content=_thing_xml(ids))
+
+    def per_game_handler(request):
+        raise AssertionError("per-game path should not be used")
+
+    games = [Game(id=i, name=f"Game {i}") for i in range(1, 46)]
+    async with _client(thing_handler) as things, _client(per_game_handler) as client:
+        result = await fetch_all_games(client, games, thing_client=things)
+
+    assert len(result) == 45
+    assert sorted(len(c) for c in thing_calls) == [5, THING_BATCH_SIZE, THING_BATCH_SIZE]
+    assert all(g.mechanics == ["Dice Rolling"] for g in result)
+
+
+async def test_failed_batch_falls_back_to_per_game():
+    per_game_calls = []
+
+    def per_game_handler(request):
+        per_game_calls.append(request.url.path)
+        if request.url.path.endswith("/geekitems"):
+            return httpx.Response(200, json={"item": {"links": {"boardgamemechanic": [{"name": "Fallback"}]}}})
+        return httpx.Response(200, json={"item": {"stats": {"avgweight": "1.5"}}})
+
+    # 822 is missing from the batch response, 13 comes back normally.
+    thing_handler = lambda request: httpx.Response(200, content=_thing_xml([13]))  # noqa: E731
+    games = [Game(id=13, name="Catan"), Game(id=822, name="Carcassonne")]
+    async with _client(thing_handler) as things, _client(per_game_handler) as client:
+        by_id = {g.id: g for g in await fetch_all_games(client, games, thing_client=things)}
+    assert by_id[13].mechanics == ["Dice Rolling"]
+    assert by_id[822].mechanics == ["Fallback"]
+    assert len(per_game_calls) == 2
+
+    per_game_calls.clear()
+    unauthorized = lambda request: httpx.Response(401)  # noqa: E731
+    async with _client(unauthorized) as things, _client(per_game_handler) as client:
+        result = await fetch_all_games(client, games, thing_client=things)
+    assert {g.mechanics[0] for g in result} == {"Fallback"}
+    assert len(per_game_calls) == 4
@@ -0,0 +1,72 @@
+import httpx
+import pytest
+
+from app.bgg import fetch_collection, parse_collection
+
+pytestmark = pytest.mark.unit
+
+COLLECTION_XML = b"""<?xml version="1.0" encoding="utf-8" standalone="yes"?>
+<items totalitems="3" termsofuse="https://boardgamegeek.com/xmlapi/termsofuse">
+  <item objecttype="thing" objectid="13" subtype="boardgame" collid="1">
+    <name sortindex="1">Catan</name>
+    <yearpublished>1995</yearpublished>
+    <image>https://cf.geekdo-images.com/catan.jpg</image>
+    <thumbnail>https://cf.geekdo-images.com/catan_t.jpg</thumbnail>
+    <stats minplayers="3" maxplayers="4" playingtime="120" numowned="1">
+      <rating value="7.5">
+        <average value="7.1"/>
+        <bayesaverage value="6.9"/>
+      </rating>
+    </stats>
+  </item>
+  <item objecttype="thing" objectid="822" subtype="boardgame" collid="2">
+    <name sortindex="1">Carcassonne</name>
+    <stats minplayers="2" maxplayers="5" playingtime="45">
+      <rating value="N/A"><average value="7.4"/><bayesaverage value="7.3"/></rating>
+    </stats>
+  </item>
+  <item objecttype="thing" objectid="13" subtype="boardgame" collid="3">
+    <name sortindex="1">Catan</name>
+    <stats minplayers="3" maxplayers="4" playingtime="120">
+      <rating value="8"><average value="7.1"/><bayesaverage value="6.9"/></rating>
+    </stats>
+  </item>
+</items>"""
+
+
+def test_parse_collection_single_pass():
+    ids, ratings, games = parse_collection(COLLECTION_XML)
+    assert ids == [13, 822, 13]
+    assert ratings == {13: 8.0, 822: None}
+    assert [g.id for g in games] == [13, 822]
+
+    catan = games[0]
+    assert catan.name == "Catan"
+    assert catan.year == 1995
+    assert catan.thumbnail.endswith("catan_t.jpg")
+    assert (catan.min_players, catan.max_players, catan.playing_time) == (3, 4, 120)
+    assert catan.avg_rating == pytest.approx(7.1)
+    assert catan.my_rating == 8.0
+    assert catan.mechanics == []
+
+
+def test_parse_collection_accepts_str_and_empty():
+    assert parse_collection("<items/>") == ([], {}, [])
+
+
+async def test_fetch_collection_returns_base_games():
+    def handler(request):
+        assert request.url.params["username"] == "alice"
+        return httpx.Response(200, content=COLLECTION_XML)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        ids, ratings, games = await fetch_collection(client, "alice")
+    assert len(ids) == 3
+    assert {g.name for g in games} == {"Catan", "Carcassonne"}
+
+
+async def test_fetch_collection_unknown_user():
+    transport = httpx.MockTransport(lambda request: httpx.Response(404))
+    async with httpx.AsyncClient(transport=transport) as client:
+        with pytest.raises(LookupError):
+            await fetch_collection(client, "nobody")
@@ -0,0 +1,92 @@
+import httpx
+import pytest
+
+from app.bgg import _needs_enrichment, fetch_all_games, parse_collection
+from app.models import Game
+
+pytestmark = pytest.mark.unit
+
+COLLECTION_XML = """<items>
+  <item objectid="1"><name>Agricola</name><yearpublished>2007</yearpublished>
+    <stats minplayers="1" maxplayers="5" playingtime="150">
+      <rating value="9"><average value="7.9"/><bayesaverage value="7.8"/></rating>
+    </stats>
+  </item>
+  <item objectid="2"><name>Catan</name><yearpublished>1995</yearpublished>
+    <stats minplayers="3" maxplayers="4" playingtime="90">
+      <rating value="N/A"><average value="7.1"/><bayesaverage value="7.0"/></rating>
+    </stats>
+  </item>
+</items>"""
+
+
+def _stored(gid, name, year, pmin, pmax, time):
+    return Game(
+        id=gid, name=name, year=year, min_players=pmin, max_players=pmax,
+        playing_time=time, weight=2.5, avg_rating=6.0,
+        mechanics=["Stored Mechanic"], designers=["Stored Designer"],
+    )
+
+
+def _mock_client(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        if request.url.path.endswith("/geekitems"):
+            return httpx.Response(200, json={"item": {"links": {
+                "boardgamemechanic": [{"name": "Fresh Mechanic"}],
+            }}})
+        return httpx.Response(200, json={"item": {"stats": {"avgweight": "3.1"}}})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_needs_enrichment_new_game():
+    assert _needs_enrichment(Game(id=1, name="A"), None)
+
+
+def test_needs_enrichment_ignores_rating_drift():
+    stored = _stored(1, "Agricola", 2007, 1, 5, 150)
+    fresh = stored.model_copy(update={"avg_rating": 7.9, "my_rating": 9.0, "mechanics": []})
+    assert not _needs_enrichment(fresh, stored)
+
+
+def test_needs_enrichment_on_changed_field():
+    stored = _stored(1, "Agricola", 2007, 1, 5, 150)
+    assert _needs_enrichment(stored.model_copy(update={"max_players": 6}), stored)
+
+
+def test_needs_enrichment_retries_empty_stored_game():
+    stored = Game(id=1, name="Agricola")
+    assert _needs_enrichment(Game(id=1, name="Agricola"), stored)
+
+
+async def test_incremental_refresh_only_enriches_changed_games():
+    existing = {
+        1: _stored(1, "Agricola", 2007, 1, 5, 150),   # unchanged
+        2: _stored(2, "Catan", 1995, 3, 6, 90),       # max_players changed
+    }
+    calls = []
+    async with _mock_client(calls) as client:
+        _, _, base_games = parse_collection(COLLECTION_XML)
+        games = await fetch_all_games(client, base_games, existing=existing)
+
+    by_id = {g.id: g for g in games}
+    assert len(calls) == 2  # geekitems + dynamicinfo for Catan only
+
+    agricola = by_id[1]
+    assert agricola.mechanics == ["Stored Mechanic"]
+    assert agricola.weight == 2.5
+    assert agricola.avg_rating == pytest.approx(7.9)  # fresh from the collection
+    assert agricola.my_rating == 9.0
+
+    catan = by_id[2]
+    assert catan.mechanics == ["Fresh Mechanic"]
+    assert catan.weight == pytest.approx(3.1)
+
+
+async def test_full_refresh_enriches_everything():
+    calls = []
+    async with _mock_client(calls) as client:
+        games = await fetch_all_games(client, parse_collection(COLLECTION_XML)[2])
+    assert len(games) == 2
+    assert len(calls) == 4
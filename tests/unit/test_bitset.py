@@ -0,0 +1,44 @@
+"""Unit tests for the bitset inverted index"""
+
+import base64
+
+import pytest
+
+from app.bitset import BitsetIndex, count, positions
+from app.models import Game
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def index():
+    return BitsetIndex([
+        Game(id=10, name="Agricola", mechanics=["Worker Placement", "Farming"], designers=["Uwe Rosenberg"]),
+        Game(id=20, name="Catan", mechanics=["Trading", "Dice Rolling"]),
+        Game(id=30, name="Caverna", mechanics=["Worker Placement"], designers=["Uwe Rosenberg"]),
+    ])
+
+
+def test_any_all_none(index):
+    assert positions(index.match("mechanics", ["Worker Placement", "Trading"])) == [0, 1, 2]
+    assert positions(index.match("mechanics", ["Worker Placement", "Farming"], "all")) == [0]
+    assert positions(index.match("mechanics", ["Worker Placement"], "none")) == [1]
+    assert index.match("mechanics", ["Unknown"], "all") == 0
+
+
+def test_combined_across_fields(index):
+    bits = index.any_of("mechanics", ["Worker Placement"]) & ~index.any_of("mechanics", ["Farming"])
+    assert positions(bits & index.any_of("designers", ["Uwe Rosenberg"])) == [2]
+
+
+def test_facet_counts_are_popcounts(index):
+    bits = index.any_of("designers", ["Uwe Rosenberg"])
+    assert count(bits) == 2
+    assert index.facet_counts("mechanics", bits) == {"Worker Placement": 2, "Farming": 1}
+
+
+def test_json_is_little_endian_bytes(index):
+    data = index.to_json()
+    assert data["size"] == 3
+    raw = base64.b64decode(data["fields"]["mechanics"]["Worker Placement"])
+    assert raw == bytes([0b101])
@@ -0,0 +1,83 @@
+"""Unit tests for the read/write engine split"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import create_read_engine, create_write_engine
+from app.db_executor import DbExecutor
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def engines(tmp_path):
+    url = f"sqlite:///{tmp_path / 'games.db'}"
+    writer = create_write_engine(url)
+    with writer.begin() as conn:
+        conn.execute(text("CREATE TABLE games (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO games VALUES (1, 'Agricola')"))
+    reader = create_read_engine(url)
+    yield reader, writer
+    reader.dispose()
+    writer.dispose()
+
+
+def test_writer_uses_wal_and_normal_sync(engines):
+    _, writer = engines
+    with writer.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+
+def test_reader_is_read_only(engines):
+    reader, _ = engines
+    with reader.connect() as conn:
+        assert conn.execute(text("PRAGMA query_only")).scalar() == 1
+        assert conn.execute(text("PRAGMA mmap_size")).scalar() > 0
+        with pytest.raises(OperationalError):
+            conn.execute(text("DELETE FROM games"))
+
+
+def test_reads_proceed_during_an_open_write(engines):
+    reader, writer = engines
+    with writer.connect() as wconn:
+        wconn.execute(text("BEGIN IMMEDIATE"))
+        wconn.execute(text("INSERT INTO games VALUES (2, 'Catan')"))
+
+        # The reader sees the last committed snapshot without waiting.
+        result = {}
+
+        def read():
+            with reader.connect() as conn:
+                result["names"] = conn.execute(text("SELECT name FROM games")).scalars().all()
+
+        t = threading.Thread(target=read)
+        t.start()
+        t.join(timeout=2)
+        assert result["names"] == ["Agricola"]
+        wconn.execute(text("COMMIT"))
+
+
+async def test_db_executor_runs_off_the_loop_with_bounded_concurrency():
+    executor = DbExecutor(2, "test-db")
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def query():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return threading.current_thread().name
+
+    names = await asyncio.gather(*(executor.run(query) for _ in range(6)))
+    assert all(name.startswith("test-db") for name in names)
+    assert peak[0] == 2
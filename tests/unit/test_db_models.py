@@ -3,7 +3,10 @@
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from app.db_models import Base, GameDB, GameMechanic, GameCategory, GameDesigner, GameArtist, GamePublisher
+from app.db_models import (
+    Base, GameDB, GameMechanic, GameCategory, GameDesigner, GameArtist, GamePublisher,
+    Mechanic, Category, Designer, Artist, Publisher,
+)
 
 
 @pytest.fixture
@@ -73,12 +76,12 @@ class TestGameMechanic:
         test_session.commit()
         
         # Create a mechanic
-        mechanic = GameMechanic(game_id=3, mechanic="Deck Building")
+        mechanic = GameMechanic(game_id=3, term=Mechanic(name="Deck Building"))
         test_session.add(mechanic)
         test_session.commit()
         
         saved_mechanic = test_session.query(GameMechanic).filter_by(game_id=3).first()
-        assert saved_mechanic.mechanic == "Deck Building"
+        assert saved_mechanic.term.name == "Deck Building"
         assert saved_mechanic.game_id == 3
 
 
@@ -93,12 +96,12 @@ class TestGameCategory:
         test_session.commit()
         
         # Create a category
-        category = GameCategory(game_id=4, category="Strategy")
+        category = GameCategory(game_id=4, term=Category(name="Strategy"))
         test_session.add(category)
         test_session.commit()
         
         saved_category = test_session.query(GameCategory).filter_by(game_id=4).first()
-        assert saved_category.category == "Strategy"
+        assert saved_category.term.name == "Strategy"
         assert saved_category.game_id == 4
 
 
@@ -113,12 +116,12 @@ class TestGameDesigner:
         test_session.commit()
         
         # Create a designer
-        designer = GameDesigner(game_id=5, designer="Uwe Rosenberg")
+        designer = GameDesigner(game_id=5, term=Designer(name="Uwe Rosenberg"))
         test_session.add(designer)
         test_session.commit()
         
         saved_designer = test_session.query(GameDesigner).filter_by(game_id=5).first()
-        assert saved_designer.designer == "Uwe Rosenberg"
+        assert saved_designer.term.name == "Uwe Rosenberg"
         assert saved_designer.game_id == 5
 
 
@@ -133,12 +136,12 @@ class TestGameArtist:
         test_session.commit()
         
         # Create an artist
-        artist = GameArtist(game_id=6, artist="Klemens Franz")
+        artist = GameArtist(game_id=6, term=Artist(name="Klemens Franz"))
         test_session.add(artist)
         test_session.commit()
         
         saved_artist = test_session.query(GameArtist).filter_by(game_id=6).first()
-        assert saved_artist.artist == "Klemens Franz"
+        assert saved_artist.term.name == "Klemens Franz"
         assert saved_artist.game_id == 6
 
 
@@ -153,12 +156,12 @@ class TestGamePublisher:
         test_session.commit()
         
         # Create a publisher
-        publisher = GamePublisher(game_id=7, publisher="Lookout Games")
+        publisher = GamePublisher(game_id=7, term=Publisher(name="Lookout Games"))
         test_session.add(publisher)
         test_session.commit()
         
         saved_publisher = test_session.query(GamePublisher).filter_by(game_id=7).first()
-        assert saved_publisher.publisher == "Lookout Games"
+        assert saved_publisher.term.name == "Lookout Games"
         assert saved_publisher.game_id == 7
 
 
@@ -173,11 +176,11 @@ class TestRelationships:
         test_session.commit()
         
         # Add relationships
-        test_session.add(GameMechanic(game_id=8, mechanic="Worker Placement"))
-        test_session.add(GameCategory(game_id=8, category="Euro"))
-        test_session.add(GameDesigner(game_id=8, designer="Test Designer"))
-        test_session.add(GameArtist(game_id=8, artist="Test Artist"))
-        test_session.add(GamePublisher(game_id=8, publisher="Test Publisher"))
+        test_session.add(GameMechanic(game_id=8, term=Mechanic(name="Worker Placement")))
+        test_session.add(GameCategory(game_id=8, term=Category(name="Euro")))
+        test_session.add(GameDesigner(game_id=8, term=Designer(name="Test Designer")))
+        test_session.add(GameArtist(game_id=8, term=Artist(name="Test Artist")))
+        test_session.add(GamePublisher(game_id=8, term=Publisher(name="Test Publisher")))
         test_session.commit()
         
         # Query the game with relationships
@@ -185,18 +188,18 @@ class TestRelationships:
         
         # Check relationships
         assert len(saved_game.mechanics) == 1
-        assert saved_game.mechanics[0].mechanic == "Worker Placement"
+        assert saved_game.mechanics[0].term.name == "Worker Placement"
         
         assert len(saved_game.categories) == 1
-        assert saved_game.categories[0].category == "Euro"
+        assert saved_game.categories[0].term.name == "Euro"
         
         assert len(saved_game.designers) == 1
-        assert saved_game.designers[0].designer == "Test Designer"
+        assert saved_game.designers[0].term.name == "Test Designer"
         
         assert len(saved_game.artists) == 1
-        assert saved_game.artists[0].artist == "Test Artist"
+        assert saved_game.artists[0].term.name == "Test Artist"
         
         assert len(saved_game.publishers) == 1
-        assert saved_game.publishers[0].publisher == "Test Publisher"
+        assert saved_game.publishers[0].term.name == "Test Publisher"
 
 
@@ -1,13 +1,20 @@
 """Unit tests for database storage operations"""
 
+import base64
+import json
+
 import pytest
 import tempfile
 import os
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 
-from app.db_models import Base
-from app.db_storage import save_games, load_games, get_games_filtered, init_db
+from app.db_models import Base, GameDB
+from app.db_storage import (
+    SaveStats, save_games, save_collections, load_games, get_games_filtered, get_facet_counts,
+    get_filtered_facet_counts, get_games_page, InvalidCursor, init_db,
+)
+from app.facets import make_facets
 from app.models import Game
 
 
@@ -118,6 +125,131 @@ class TestDatabaseOperations:
         assert len(loaded) == 1
         assert loaded[0].name == "New Game"
 
+    def test_save_games_writes_only_the_diff(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+
+        changed = sample_games[0].model_copy(update={
+            "weight": 3.7, "mechanics": ["Worker Placement", "Animal Husbandry"],
+        })
+        added = Game(id=4, name="Brass", mechanics=["Network Building"])
+        stats = save_games([changed, sample_games[1], added], db_session)
+
+        assert (stats.inserted, stats.updated, stats.deleted) == (1, 1, 1)
+        # Farming out, Animal Husbandry + Network Building in; game 3's links go with it.
+        assert (stats.links_added, stats.links_removed) == (2, 1)
+        by_id = {g.id: g for g in load_games(db_session)}
+        assert set(by_id) == {1, 2, 4}
+        assert by_id[1].weight == 3.7
+        assert set(by_id[1].mechanics) == {"Worker Placement", "Animal Husbandry"}
+        assert set(by_id[2].mechanics) == {"Trading", "Dice Rolling"}
+
+        unchanged = save_games(list(by_id.values()), db_session)
+        assert unchanged == SaveStats()
+
+    def test_link_names_are_interned(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        strategy = db_session.execute(text("SELECT id FROM categories WHERE name = 'Strategy'")).scalar()
+        links = db_session.execute(text("SELECT COUNT(*) FROM game_categories WHERE term_id = :id"), {"id": strategy})
+        assert links.scalar() == 3
+
+        # Terms no game uses any more are dropped.
+        save_games(sample_games[:1], db_session)
+        assert db_session.execute(text("SELECT COUNT(*) FROM categories")).scalar() == 2
+
+    def test_init_db_migrates_legacy_link_tables(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            GameDB.__table__.create(conn)
+            conn.execute(text("INSERT INTO games (id, name) VALUES (1, 'Agricola'), (2, 'Caverna')"))
+            conn.execute(text("CREATE TABLE game_mechanics (game_id INTEGER, mechanic VARCHAR, PRIMARY KEY (game_id, mechanic))"))
+            conn.execute(text("INSERT INTO game_mechanics VALUES (1, 'Worker Placement'), (2, 'Worker Placement')"))
+
+        init_db(engine)
+        with sessionmaker(bind=engine)() as db:
+            by_id = {g.id: g for g in load_games(db)}
+            assert by_id[1].mechanics == ["Worker Placement"]
+            assert by_id[2].mechanics == ["Worker Placement"]
+            assert db.execute(text("SELECT COUNT(*) FROM mechanics")).scalar() == 1
+            assert len(get_games_filtered(db, search="worker")) == 2
+        engine.dispose()
+
+    def test_replace_matches_diff(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        stats = save_games(sample_games[:1], db_session, replace=True)
+        assert stats.inserted == 1
+        assert [g.id for g in load_games(db_session)] == [1]
+
+
+class TestFacetCounts:
+
+    def test_facets_are_precomputed_on_save(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        assert get_facet_counts(db_session) == make_facets(sample_games)
+
+        changed = sample_games[0].model_copy(update={"weight": 1.5, "mechanics": ["Farming"]})
+        save_games([changed, sample_games[1]], db_session)
+        facets = get_facet_counts(db_session)
+        assert facets == make_facets([changed, sample_games[1]])
+        assert "Worker Placement" not in facets.mechanics
+        assert facets.weight_buckets["Light (≤1.75)"] == 1
+
+    def test_facets_per_collection(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        save_collections(db_session, {"alice": {1: None, 3: 8.0}})
+        assert get_facet_counts(db_session, "alice") == make_facets([sample_games[0], sample_games[2]])
+        assert get_facet_counts(db_session, "nobody") == make_facets([])
+
+    def test_facets_are_updated_with_only_the_change(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        save_collections(db_session, {"alice": {1: None, 3: 8.0}, "bob": {2: 7.0}})
+
+        changed = sample_games[2].model_copy(update={"year": 1990, "mechanics": ["Trading", "Farming"]})
+        save_games([sample_games[0], changed], db_session)  # game 2 removed, game 3 changed
+        save_collections(db_session, {"alice": {1: 9.0}, "carol": {1: None, 3: None}})
+
+        games = {g.id: g for g in load_games(db_session)}
+        assert get_facet_counts(db_session) == make_facets(list(games.values()))
+        assert get_facet_counts(db_session, "alice") == make_facets([games[1]])
+        assert get_facet_counts(db_session, "bob") == make_facets([])
+        assert get_facet_counts(db_session, "carol") == make_facets([games[1], games[3]])
+
+    @pytest.mark.parametrize("filters", [
+        {"categories": ["Strategy"], "year_min": 2000},
+        {"mechanics": ["Trading", "Cooperative"]},
+        {"search": "rosenberg"},
+        {"search": "%"},
+        {"username": "alice", "weight_max": 3.0},
+    ])
+    def test_filtered_facets_match_filtered_games(self, db_session, sample_games, filters):
+        save_games(sample_games, db_session)
+        save_collections(db_session, {"alice": {1: None, 3: 8.0}})
+        expected = make_facets(get_games_filtered(db_session, **filters))
+        # A filtered link field counts what adding each of its values would give.
+        for field in ("mechanics", "categories"):
+            if field in filters:
+                others = {k: v for k, v in filters.items() if k != field}
+                setattr(expected, field, getattr(make_facets(get_games_filtered(db_session, **others)), field))
+        assert get_filtered_facet_counts(db_session, **filters) == expected
+
+    def test_filtered_link_field_counts_ignore_its_own_filter(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        filters = {"mechanics": ["Worker Placement"], "year_min": 2000}
+        facets = get_filtered_facet_counts(db_session, **filters)
+        # Each mechanic counts its games under the other filters.
+        assert facets.mechanics == {
+            mechanic: len(get_games_filtered(db_session, mechanics=[mechanic], year_min=2000))
+            for mechanic in facets.mechanics
+        }
+        assert "Trading" not in facets.mechanics  # only on the 1995 game
+        assert facets.designers == make_facets(get_games_filtered(db_session, **filters)).designers
+
+    @pytest.mark.parametrize("mode", ["all", "none"])
+    def test_all_and_none_matches_count_the_filtered_games(self, db_session, sample_games, mode):
+        save_games(sample_games, db_session)
+        filters = {"mechanics": ["Worker Placement", "Trading"], "match": {"mechanics": mode}}
+        expected = make_facets(get_games_filtered(db_session, **filters))
+        assert get_filtered_facet_counts(db_session, **filters) == expected
+
 
 class TestGameFiltering:
 
@@ -131,6 +263,19 @@ class TestGameFiltering:
         assert len(results) == 1
         assert results[0].name == "Catan"
 
+    def test_filter_match_all(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        both = ["Strategy", "Family"]
+        assert len(get_games_filtered(db_session, categories=both)) == 3
+        results = get_games_filtered(db_session, categories=both, match={"categories": "all"})
+        assert [g.name for g in results] == ["Catan"]
+        # Each game appears once, however many values it matches.
+        results = get_games_filtered(db_session, mechanics=["Trading", "Dice Rolling"])
+        assert [g.name for g in results] == ["Catan"]
+        assert get_games_filtered(db_session, mechanics=["Trading", "Unknown"], match={"mechanics": "all"}) == []
+        results = get_games_filtered(db_session, categories=["Family", "Thematic"], match={"categories": "none"})
+        assert [g.name for g in results] == ["Agricola"]
+
     def test_filter_by_categories(self, db_session, sample_games):
         save_games(sample_games, db_session)
         assert len(get_games_filtered(db_session, categories=["Strategy"])) == 3
@@ -187,6 +332,27 @@ class TestGameFiltering:
         results = get_games_filtered(db_session, categories=["Strategy"], year_min=2000, weight_max=3.0)
         assert len(results) == 1  # Only Pandemic (Agricola weight 3.64 > 3.0)
 
+    def test_search_matches_designers_publishers_and_mechanics(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        assert [g.name for g in get_games_filtered(db_session, search="rosenberg")] == ["Agricola"]
+        assert [g.name for g in get_games_filtered(db_session, search="z-man")] == ["Pandemic"]
+        assert [g.name for g in get_games_filtered(db_session, search="cooperative leac")] == ["Pandemic"]
+
+    def test_search_ranks_name_matches_first(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        # "Catan" is Catan's name and Catan Studio's publisher name.
+        extra = Game(id=4, name="Carcassonne", publishers=["Catan Studio"])
+        save_games(sample_games + [extra], db_session)
+        assert [g.name for g in get_games_filtered(db_session, search="catan")] == ["Catan", "Carcassonne"]
+
+    def test_search_index_follows_saves(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        renamed = sample_games[0].model_copy(update={"designers": ["Someone Else"]})
+        save_games([renamed, sample_games[1]], db_session)
+        assert get_games_filtered(db_session, search="rosenberg") == []
+        assert get_games_filtered(db_session, search="pandemic") == []
+        assert [g.name for g in get_games_filtered(db_session, search="someone")] == ["Agricola"]
+
     def test_search_wildcard_characters_safe(self, db_session, sample_games):
         """% and _ in search should not be treated as SQL wildcards."""
         save_games(sample_games, db_session)
@@ -194,6 +360,94 @@ class TestGameFiltering:
         assert len(results) == 0  # Should match nothing, not everything
 
 
+class TestPagination:
+
+    @pytest.fixture
+    def many_games(self, db_session):
+        games = [
+            Game(id=i, name=f"Game {i % 7}", year=None if i % 5 == 0 else 2000 + i % 4,
+                 weight=None if i % 3 == 0 else round(1 + (i % 6) * 0.5, 1))
+            for i in range(1, 41)
+        ]
+        save_games(games, db_session)
+        return games
+
+    def _walk(self, db, **kwargs):
+        ids, cursor, pages = [], None, 0
+        while True:
+            page = get_games_page(db, limit=6, cursor=cursor, **kwargs)
+            assert len(page.games) <= 6
+            ids += [g.id for g in page.games]
+            pages += 1
+            cursor = page.next_cursor
+            if cursor is None:
+                return ids, page.filtered, pages
+
+    @pytest.mark.parametrize("sort", ["name", "year", "weight", None])
+    @pytest.mark.parametrize("order", ["asc", "desc"])
+    def test_keyset_pages_cover_sorted_results(self, db_session, many_games, sort, order):
+        ids, filtered, pages = self._walk(db_session, sort=sort, order=order)
+        assert filtered == 40 and pages == 7
+
+        def key(g):
+            value = getattr(g, sort) if sort else 0
+            # SQLite sorts NULL below every value.
+            return (value is not None, value or 0, g.id)
+        expected = [g.id for g in sorted(many_games, key=key, reverse=order == "desc")]
+        assert ids == expected
+
+    def test_filtered_counts_all_pages(self, db_session, many_games):
+        page = get_games_page(db_session, limit=5, year_min=2002, sort="year")
+        assert len(page.games) == 5
+        assert page.filtered == sum(1 for g in many_games if g.year and g.year >= 2002)
+
+    def test_cursor_is_tied_to_its_sort(self, db_session, many_games):
+        cursor = get_games_page(db_session, sort="name", limit=5).next_cursor
+        with pytest.raises(InvalidCursor):
+            get_games_page(db_session, sort="year", limit=5, cursor=cursor)
+        with pytest.raises(InvalidCursor):
+            get_games_page(db_session, limit=5, cursor="not-a-cursor")
+
+    @pytest.mark.parametrize("sort,value,game_id", [
+        ("year", "abc", 1), ("year", {"x": 1}, 1), ("year", [1], 1), ("year", True, 1), ("year", float("nan"), 1),
+        ("name", 2001, 1), ("id", 5, 1), ("year", 2001, "1"), ("year", 2001, True), ("year", 10 ** 400, 1),
+    ])
+    def test_tampered_cursor_is_rejected(self, db_session, many_games, sort, value, game_id):
+        raw = json.dumps([sort, "asc", value, game_id]).encode()
+        cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        with pytest.raises(InvalidCursor):
+            get_games_page(db_session, sort=None if sort == "id" else sort, limit=2, cursor=cursor)
+
+
+class TestProjection:
+
+    def test_fields_select_only_requested_columns(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        games = get_games_page(db_session, fields=["name", "weight"], links=[], sort="name").games
+        assert [g.model_dump(exclude_unset=True) for g in games] == [
+            {"id": 1, "name": "Agricola", "weight": 3.64},
+            {"id": 2, "name": "Catan", "weight": 2.3},
+            {"id": 3, "name": "Pandemic", "weight": 2.4},
+        ]
+
+    def test_links_can_be_requested_alone(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        game = get_games_page(db_session, fields=[], links=["designers"], designers=["Uwe Rosenberg"]).games[0]
+        assert game.model_dump(exclude_unset=True) == {"id": 1, "designers": ["Uwe Rosenberg"]}
+
+    def test_projected_my_rating_is_the_users(self, db_session, sample_games):
+        save_games(sample_games, db_session)
+        save_collections(db_session, {"alice": {3: 9.0}})
+        games = get_games_page(db_session, fields=["my_rating"], links=[], username="alice").games
+        assert [g.model_dump(exclude_unset=True) for g in games] == [{"id": 3, "my_rating": 9.0}]
+
+    def test_unknown_fields_are_rejected(self, db_session):
+        with pytest.raises(ValueError):
+            get_games_page(db_session, fields=["nope"])
+        with pytest.raises(ValueError):
+            get_games_page(db_session, links=["families"])
+
+
 class TestEdgeCases:
 
     def test_empty_games_list(self, db_session):
@@ -217,3 +471,8 @@ class TestEdgeCases:
         assert loaded[0].year is None
         assert loaded[0].weight is None
         assert loaded[0].avg_rating is None
+
+    def test_duplicate_link_names_are_saved_once(self, db_session):
+        game = Game(id=777, name="Dup Game", mechanics=["Dice Rolling", "Dice Rolling"])
+        save_games([game], db_session)
+        assert load_games(db_session)[0].mechanics == ["Dice Rolling"]
@@ -1,7 +1,8 @@
+import base64
 import json
 import pytest
 from app.models import Game
-from scripts.export_collection import games_to_json
+from scripts.export_collection import games_to_json, index_to_json
 
 pytestmark = pytest.mark.unit
 
@@ -20,3 +21,15 @@ def test_games_to_json_is_sorted_and_complete():
     assert data[0]["id"] == 1
     assert data[0]["mechanics"] == ["B", "C"]
     assert "thumbnail" in data[0]
+
+
+def test_index_to_json_follows_games_json_order():
+    games = [
+        Game(id=2, name="Zebra", mechanics=["A"]),
+        Game(id=1, name="apple", mechanics=["A", "B"]),
+    ]
+    index = json.loads(index_to_json(games))
+    assert index["size"] == 2
+    # apple is position 0, Zebra position 1.
+    assert base64.b64decode(index["fields"]["mechanics"]["B"]) == bytes([0b01])
+    assert base64.b64decode(index["fields"]["mechanics"]["A"]) == bytes([0b11])
@@ -0,0 +1,86 @@
+import httpx
+import pytest
+
+from app.bgg import fetch_game_links, fetch_weight
+from app.http_cache import ResponseCache
+from app.models import Game
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with ResponseCache(path=tmp_path / "http_cache.db") as c:
+        yield c
+
+
+def test_put_get_roundtrip(cache):
+    cache.put("geekitems", 13, '{"item": {}}', etag='"abc"')
+    entry = cache.get("geekitems", 13)
+    assert entry.body == '{"item": {}}'
+    assert entry.etag == '"abc"'
+    assert entry.fresh
+    assert cache.get("geekitems", 14) is None
+    assert cache.get("dynamicinfo", 13) is None
+
+
+def test_zero_ttl_is_stale(tmp_path):
+    with ResponseCache(path=tmp_path / "c.db", ttls={"dynamicinfo": 0}) as c:
+        c.put("dynamicinfo", 1, "{}")
+        assert not c.get("dynamicinfo", 1).fresh
+
+
+def test_eviction_drops_oldest(tmp_path):
+    with ResponseCache(path=tmp_path / "c.db", max_entries=2, evict_every=3) as c:
+        for i in range(3):
+            c.put("geekitems", i, "{}")
+        assert len(c) == 2
+        assert c.get("geekitems", 0) is None
+        assert c.get("geekitems", 2) is not None
+
+
+def test_eviction_runs_in_batches_and_on_close(tmp_path):
+    path = tmp_path / "c.db"
+    with ResponseCache(path=path, max_entries=2, evict_every=10) as c:
+        for i in range(4):
+            c.put("geekitems", i, "{}")
+        assert len(c) == 4
+        c.evict()
+        assert len(c) == 2
+        c.put("geekitems", 4, "{}")
+    with ResponseCache(path=path, max_entries=2) as c:
+        assert len(c) == 2
+        assert c.get("geekitems", 4) is not None
+
+
+async def test_fresh_entry_skips_network(cache):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"item": {"stats": {"avgweight": "2.0"}}})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        assert await fetch_weight(client, 13, cache=cache) == pytest.approx(2.0)
+        assert await fetch_weight(client, 13, cache=cache) == pytest.approx(2.0)
+    assert len(calls) == 1
+
+
+async def test_stale_entry_revalidates_with_etag(tmp_path):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        body = {"item": {"links": {"boardgamemechanic": [{"name": "Trading"}]}}}
+        return httpx.Response(200, json=body, headers={"ETag": '"v1"'})
+
+    with ResponseCache(path=tmp_path / "c.db", ttls={"geekitems": 0}) as cache:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await fetch_game_links(client, Game(id=13, name="Catan"), cache=cache)
+            second = await fetch_game_links(client, Game(id=13, name="Catan"), cache=cache)
+
+    assert first.mechanics == second.mechanics == ["Trading"]
+    assert len(calls) == 2
+    assert calls[1].headers["if-none-match"] == '"v1"'
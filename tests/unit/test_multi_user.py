@@ -0,0 +1,111 @@
+"""Unit tests for multi-user refresh: merged collections and per-user ratings"""
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.bgg import fetch_all_games, fetch_collections
+from app.db_models import Base
+from app.db_storage import (
+    save_games, save_collections, get_games_filtered, get_total_game_count, get_collection_usernames,
+    get_data_version,
+)
+from app.models import Game
+from app.refresh import configured_usernames
+
+pytestmark = pytest.mark.unit
+
+
+def _item(gid, name, rating):
+    return f"""<item objecttype="thing" objectid="{gid}" subtype="boardgame">
+      <name>{name}</name>
+      <stats minplayers="2" maxplayers="4" playingtime="60">
+        <rating value="{rating}"><average value="7.0"/></rating>
+      </stats>
+    </item>"""
+
+
+COLLECTIONS = {
+    "alice": [(13, "Catan", 8), (822, "Carcassonne", "N/A")],
+    "bob": [(822, "Carcassonne", 6), (31260, "Agricola", 9)],
+}
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+async def test_fetch_collections_merges_and_enriches_shared_games_once():
+    enrich_calls = []
+
+    def handler(request):
+        if request.url.path.endswith("/collection"):
+            items = COLLECTIONS[request.url.params["username"]]
+            return httpx.Response(200, content=f"<items>{''.join(_item(*i) for i in items)}</items>")
+        enrich_calls.append(int(request.url.params["objectid"]))
+        if request.url.path.endswith("/geekitems"):
+            return httpx.Response(200, json={"item": {"links": {}}})
+        return httpx.Response(200, json={"item": {"stats": {"avgweight": "2.0"}}})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        ids, ratings, base_games = await fetch_collections(client, ["alice", "bob"])
+        games = await fetch_all_games(client, base_games)
+
+    assert ids == [13, 822, 31260]
+    assert ratings == {"alice": {13: 8.0, 822: None}, "bob": {822: 6.0, 31260: 9.0}}
+    by_id = {g.id: g for g in games}
+    assert by_id[822].my_rating is None       # first user's rating
+    assert by_id[31260].my_rating is None     # not in the first user's collection
+    assert by_id[13].my_rating == 8.0
+    # geekitems + dynamicinfo once per unique game
+    assert sorted(enrich_calls) == [13, 13, 822, 822, 31260, 31260]
+
+
+def test_collections_are_stored_per_user(db_session):
+    save_games([
+        Game(id=13, name="Catan", my_rating=8.0),
+        Game(id=822, name="Carcassonne"),
+        Game(id=31260, name="Agricola"),
+    ], db_session)
+    save_collections(db_session, {"alice": {13: 8.0, 822: None}, "bob": {822: 6.0, 31260: 9.0}})
+
+    assert get_collection_usernames(db_session) == ["alice", "bob"]
+    assert get_total_game_count(db_session) == 3
+    assert get_total_game_count(db_session, username="bob") == 2
+
+    bob = {g.id: g.my_rating for g in get_games_filtered(db_session, username="bob")}
+    assert bob == {822: 6.0, 31260: 9.0}
+    alice = {g.id: g.my_rating for g in get_games_filtered(db_session, username="alice")}
+    assert alice == {13: 8.0, 822: None}
+
+    save_collections(db_session, {"alice": {13: 7.0}})
+    assert get_collection_usernames(db_session) == ["alice"]
+
+
+def test_unchanged_collections_keep_the_data_version(db_session):
+    save_games([Game(id=13, name="Catan"), Game(id=822, name="Carcassonne")], db_session)
+    save_collections(db_session, {"alice": {13: 8.0, 822: None}})
+    version = get_data_version(db_session)
+
+    save_collections(db_session, {"alice": {13: 8.0, 822: None}})
+    assert get_data_version(db_session) == version
+
+    save_collections(db_session, {"alice": {13: 8.0, 822: 5.0}})
+    assert get_data_version(db_session) != version
+    alice = {g.id: g.my_rating for g in get_games_filtered(db_session, username="alice")}
+    assert alice == {13: 8.0, 822: 5.0}
+
+
+def test_configured_usernames(monkeypatch):
+    monkeypatch.setenv("BGG_USERNAME", "alice")
+    monkeypatch.delenv("BGG_USERNAMES", raising=False)
+    assert configured_usernames() == ["alice"]
+    monkeypatch.setenv("BGG_USERNAMES", " bob, carol,,bob ")
+    assert configured_usernames() == ["bob", "carol"]
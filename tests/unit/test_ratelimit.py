@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.ratelimit import AdaptiveLimiter
+
+pytestmark = pytest.mark.unit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_successes_grow_additively():
+    limiter = AdaptiveLimiter(rate=2.0, concurrency=2.0, clock=FakeClock())
+    for _ in range(4):
+        limiter.record(200, 0.1)
+    assert 2.0 < limiter.concurrency < 4.0
+    assert 2.0 < limiter.rate < 4.0
+
+
+@pytest.mark.parametrize("status", [429, 500, 503, None])
+def test_congestion_cuts_multiplicatively(status):
+    limiter = AdaptiveLimiter(rate=8.0, concurrency=8.0, clock=FakeClock())
+    limiter.record(status, 0.1)
+    assert limiter.concurrency == 4.0
+    assert limiter.rate == 4.0
+
+
+def test_one_cut_per_cooldown():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(rate=8.0, concurrency=8.0, cooldown=2.0, clock=clock)
+    limiter.record(429, 0.1)
+    limiter.record(429, 0.1)
+    assert limiter.concurrency == 4.0
+    clock.now = 3.0
+    limiter.record(429, 0.1)
+    assert limiter.concurrency == 2.0
+
+
+def test_cut_respects_floor():
+    limiter = AdaptiveLimiter(rate=0.6, concurrency=1.0, min_rate=0.5, clock=FakeClock())
+    limiter.record(503, 0.1)
+    assert limiter.concurrency == 1.0
+    assert limiter.rate == 0.5
+
+
+def test_latency_spike_counts_as_congestion():
+    limiter = AdaptiveLimiter(rate=8.0, concurrency=8.0, clock=FakeClock())
+    for _ in range(5):
+        limiter.record(200, 0.1)
+    before = limiter.concurrency
+    for _ in range(10):
+        limiter.record(200, 2.0)
+    assert limiter.concurrency < before
+
+
+async def test_window_caps_in_flight_requests():
+    limiter = AdaptiveLimiter(rate=1000.0, concurrency=2.0, max_concurrency=2.0)
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        await asyncio.gather(*(limiter.get(client, "https://bgg.test/") for _ in range(8)))
+    assert peak == 2
+
+
+async def test_cancelled_token_wait_frees_its_slot():
+    limiter = AdaptiveLimiter(rate=1.0, concurrency=2.0, max_concurrency=2.0)
+    await limiter.acquire()  # takes the only token
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.01)  # now sleeping for the next token
+    assert limiter._in_flight == 2
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert limiter._in_flight == 1
@@ -0,0 +1,119 @@
+"""Unit tests for checkpointed, resumable refresh runs"""
+
+import threading
+import time
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import refresh
+from app.bgg import fetch_all_games
+from app.db_models import Base, RefreshRunDB, RefreshCheckpointDB
+from app.db_storage import start_refresh_run, save_checkpoints, finish_refresh_run
+from app.models import Game
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def test_new_run_has_no_checkpoints(db_session):
+    run_id, checkpointed = start_refresh_run(db_session, "alice")
+    assert run_id
+    assert checkpointed == {}
+
+
+def test_unfinished_run_is_resumed(db_session):
+    run_id, _ = start_refresh_run(db_session, "alice")
+    save_checkpoints(db_session, run_id, [Game(id=1, name="Agricola", mechanics=["Farming"], weight=3.6)])
+
+    resumed_id, checkpointed = start_refresh_run(db_session, "alice")
+    assert resumed_id == run_id
+    assert checkpointed[1].mechanics == ["Farming"]
+    assert checkpointed[1].weight == 3.6
+
+    # Runs are per user.
+    other_id, other = start_refresh_run(db_session, "bob")
+    assert other_id != run_id
+    assert other == {}
+
+
+def test_finished_run_starts_fresh(db_session):
+    run_id, _ = start_refresh_run(db_session, "alice")
+    save_checkpoints(db_session, run_id, [Game(id=1, name="Agricola")])
+    finish_refresh_run(db_session, run_id)
+
+    assert db_session.query(RefreshCheckpointDB).count() == 0
+    new_id, checkpointed = start_refresh_run(db_session, "alice")
+    assert new_id != run_id
+    assert checkpointed == {}
+
+
+def test_stale_run_is_abandoned(db_session):
+    run_id, _ = start_refresh_run(db_session, "alice")
+    save_checkpoints(db_session, run_id, [Game(id=1, name="Agricola")])
+    db_session.query(RefreshRunDB).update({"started_at": time.time() - 7 * 24 * 3600})
+    db_session.commit()
+
+    new_id, checkpointed = start_refresh_run(db_session, "alice")
+    assert new_id != run_id
+    assert checkpointed == {}
+    assert db_session.get(RefreshRunDB, run_id) is None
+
+
+def test_save_checkpoints_overwrites(db_session):
+    run_id, _ = start_refresh_run(db_session, "alice")
+    save_checkpoints(db_session, run_id, [Game(id=1, name="Old")])
+    save_checkpoints(db_session, run_id, [Game(id=1, name="New")])
+    _, checkpointed = start_refresh_run(db_session, "alice")
+    assert checkpointed[1].name == "New"
+
+
+async def test_fetch_all_games_skips_checkpointed_and_reports_new():
+    calls = []
+
+    def handler(request):
+        calls.append(int(request.url.params["objectid"]))
+        if request.url.path.endswith("/geekitems"):
+            return httpx.Response(200, json={"item": {"links": {"boardgamemechanic": [{"name": "Fresh"}]}}})
+        return httpx.Response(200, json={"item": {"stats": {"avgweight": "2.0"}}})
+
+    games = [Game(id=1, name="Agricola", avg_rating=8.1), Game(id=2, name="Catan")]
+    checkpointed = {1: Game(id=1, name="Agricola", avg_rating=7.0, mechanics=["Farming"], weight=3.6)}
+    enriched = []
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        result = await fetch_all_games(
+            client, games, checkpointed=checkpointed, on_enriched=enriched.extend,
+        )
+
+    assert set(calls) == {2}
+    assert [g.id for g in enriched] == [2]
+    by_id = {g.id: g for g in result}
+    assert by_id[1].mechanics == ["Farming"]
+    assert by_id[1].avg_rating == 8.1  # collection fields stay fresh
+    assert by_id[2].mechanics == ["Fresh"]
+
+
+async def test_checkpoints_are_written_off_the_event_loop(monkeypatch):
+    writes = []
+    monkeypatch.setattr(
+        refresh, "save_checkpoints",
+        lambda db, run_id, games: writes.append((threading.current_thread().name, [g.id for g in games])),
+    )
+    checkpointer = refresh.Checkpointer(db=None, run_id="run")
+    checkpointer([Game(id=i, name=f"Game {i}") for i in range(refresh.CHECKPOINT_EVERY)])
+    checkpointer([Game(id=100, name="Last")])
+    await checkpointer.flush()
+
+    assert [ids for _, ids in writes] == [list(range(refresh.CHECKPOINT_EVERY)), [100]]
+    assert all(name.startswith("db-write") for name, _ in writes)
@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.bgg import fetch_all_games, fetch_weight
+from app.models import Game
+from app.retry import (
+    BGGRequestError, CircuitBreaker, CircuitOpenError, RetryPolicy, get_with_retry, parse_retry_after,
+)
+
+pytestmark = pytest.mark.unit
+
+
+def _fast_policy(**kwargs):
+    kwargs.setdefault("breaker", CircuitBreaker(failure_threshold=100))
+    return RetryPolicy(base_delay=0.001, max_delay=0.01, **kwargs)
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470.0) == pytest.approx(10.0)
+
+
+def test_delay_is_jittered_and_honours_retry_after():
+    policy = RetryPolicy(base_delay=1.0, max_delay=60.0)
+    for attempt in range(5):
+        assert 0 <= policy.delay(attempt) <= 2 ** attempt
+    assert policy.delay(0, retry_after="5") >= 5
+    assert policy.delay(0, retry_after="500") == 60.0
+
+
+async def test_retries_until_success():
+    statuses = iter([503, 429, 200])
+    async with _client(lambda request: httpx.Response(next(statuses))) as client:
+        r = await get_with_retry(client, "https://bgg.test/", retry=_fast_policy())
+    assert r.status_code == 200
+
+
+async def test_gives_back_last_response_when_attempts_run_out():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    async with _client(handler) as client:
+        r = await get_with_retry(client, "https://bgg.test/", retry=_fast_policy(max_attempts=3))
+    assert r.status_code == 503
+    assert len(calls) == 3
+
+
+async def test_transport_errors_raise_after_retries():
+    def handler(request):
+        raise httpx.ConnectError("boom")
+
+    async with _client(handler) as client:
+        with pytest.raises(BGGRequestError):
+            await get_with_retry(client, "https://bgg.test/", retry=_fast_policy(max_attempts=2))
+
+
+async def test_non_retryable_status_is_not_retried():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    async with _client(handler) as client:
+        r = await get_with_retry(client, "https://bgg.test/", retry=_fast_policy())
+    assert r.status_code == 404
+    assert len(calls) == 1
+
+
+async def test_breaker_opens_and_half_open_probe_closes_it():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    # Only one waiter gets the probe slot; the other waits for its outcome.
+    waiters = {asyncio.create_task(breaker.wait()) for _ in range(2)}
+    done, pending = await asyncio.wait(waiters, timeout=1.0, return_when=asyncio.FIRST_COMPLETED)
+    assert len(done) == 1
+    assert breaker.state == "half_open"
+    await asyncio.sleep(0.01)
+    assert not pending.pop().done()
+
+    breaker.record_success()
+    done, _ = await asyncio.wait(waiters, timeout=1.0)
+    assert len(done) == 2
+    assert breaker.state == "closed"
+
+
+async def test_breaker_gives_up_after_max_open_time():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0, max_open_time=0.0)
+    breaker.record_failure()
+    await asyncio.sleep(0.001)
+    with pytest.raises(CircuitOpenError):
+        await breaker.wait()
+
+
+async def test_fetch_weight_raises_on_failure():
+    async with _client(lambda request: httpx.Response(500)) as client:
+        with pytest.raises(BGGRequestError):
+            await fetch_weight(client, 13, retry=_fast_policy(max_attempts=2))
+
+
+async def test_failed_games_keep_previous_values():
+    def handler(request):
+        if request.url.params["objectid"] == "2":
+            return httpx.Response(503)
+        if request.url.path.endswith("/geekitems"):
+            return httpx.Response(200, json={"item": {"links": {"boardgamemechanic": [{"name": "Fresh"}]}}})
+        return httpx.Response(200, json={"item": {"stats": {"avgweight": "2.0"}}})
+
+    games = [Game(id=1, name="Agricola"), Game(id=2, name="Catan", avg_rating=7.2)]
+    previous = {2: Game(id=2, name="Catan", weight=2.3, mechanics=["Trading"], avg_rating=7.0)}
+    progress = []
+    async with _client(handler) as client:
+        result = await fetch_all_games(
+            client, games,
+            retry=_fast_policy(max_attempts=2), previous=previous,
+            on_progress=lambda *p: progress.append(p),
+        )
+
+    by_id = {g.id: g for g in result}
+    assert by_id[1].mechanics == ["Fresh"]
+    assert by_id[2].mechanics == ["Trading"]
+    assert by_id[2].weight == 2.3
+    assert by_id[2].avg_rating == 7.2
+    assert progress[-1] == (1, 1, 2)
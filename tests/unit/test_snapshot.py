@@ -0,0 +1,130 @@
+"""The in-memory snapshot answers reads exactly like the SQL path"""
+
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import db_storage
+from app.db_models import Base
+from app.db_storage import (
+    save_games, save_collections, get_games_page, get_filtered_facet_counts, load_snapshot, get_data_version,
+)
+from app.models import Game
+
+pytestmark = pytest.mark.unit
+
+MECHANICS = ["Dice Rolling", "Worker Placement", "Trading", "Cooperative", "Deck Building"]
+CATEGORIES = ["Strategy", "Family", "Economic", "Fantasy"]
+
+
+def _maybe(rng, value):
+    return None if rng.random() < 0.2 else value
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    rng = random.Random(7)
+    games = [
+        Game(
+            id=i, name=f"Game {rng.randint(1, 40):02d}", year=_maybe(rng, rng.randint(1990, 2024)),
+            min_players=_maybe(rng, rng.randint(1, 3)), max_players=_maybe(rng, rng.randint(2, 6)),
+            playing_time=_maybe(rng, rng.choice([20, 45, 60, 90, 150])),
+            weight=_maybe(rng, round(rng.uniform(1, 5), 2)), avg_rating=_maybe(rng, round(rng.uniform(5, 9), 1)),
+            my_rating=_maybe(rng, rng.randint(1, 10)),
+            mechanics=rng.sample(MECHANICS, rng.randint(0, 3)), categories=rng.sample(CATEGORIES, rng.randint(0, 2)),
+            designers=[f"Designer {rng.randint(1, 8)}"],
+        )
+        for i in range(1, 121)
+    ]
+    save_games(games, session)
+    save_collections(session, {"alice": {g.id: _maybe(rng, rng.randint(1, 10)) for g in games[::3]}})
+    yield session
+    session.close()
+    engine.dispose()
+
+
+FILTERS = [
+    {},
+    {"mechanics": ["Dice Rolling", "Trading"]},
+    {"mechanics": ["Dice Rolling", "Trading"], "match": {"mechanics": "all"}},
+    {"mechanics": ["Cooperative"], "categories": ["Family"], "match": {"mechanics": "none"}},
+    {"categories": ["Strategy"], "year_min": 2000, "weight_max": 3.0},
+    {"players": 2},
+    {"players_min": 4, "players_max": 5, "time_max": 90},
+    {"rating_min": 7.0, "designers": ["Designer 3", "Nobody"]},
+    {"username": "alice"},
+    {"username": "alice", "mechanics": ["Cooperative"]},
+    {"username": "nobody"},
+]
+
+
+def _sql(monkeypatch, fn, *args, **kwargs):
+    with monkeypatch.context() as m:
+        m.setattr(db_storage, "load_snapshot", lambda db: None)
+        return fn(*args, **kwargs)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("sort,order", [
+    (None, "asc"), (None, "desc"), ("name", "asc"), ("year", "desc"), ("weight", "asc"), ("my_rating", "desc"),
+])
+def test_pages_match_sql(db_session, monkeypatch, filters, sort, order):
+    assert load_snapshot(db_session) is not None
+
+    def walk(**kwargs):
+        pages, cursor = [], None
+        while True:
+            page = get_games_page(db_session, sort=sort, order=order, limit=7, cursor=cursor, **kwargs, **filters)
+            pages.append(([g.model_dump() for g in page.games], page.filtered))
+            cursor = page.next_cursor
+            if cursor is None:
+                return pages
+
+    expected = _sql(monkeypatch, walk)
+    assert walk() == expected
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_facet_counts_match_sql(db_session, monkeypatch, filters):
+    expected = _sql(monkeypatch, get_filtered_facet_counts, db_session, year_max=2030, **filters)
+    assert get_filtered_facet_counts(db_session, year_max=2030, **filters) == expected
+
+
+def test_projection_matches_sql(db_session, monkeypatch):
+    kwargs = dict(fields=["name", "my_rating"], links=["mechanics"], username="alice", sort="name")
+    expected = _sql(monkeypatch, get_games_page, db_session, **kwargs)
+    actual = get_games_page(db_session, **kwargs)
+    assert [g.model_dump(exclude_unset=True) for g in actual.games] == [
+        g.model_dump(exclude_unset=True) for g in expected.games
+    ]
+
+
+def test_snapshot_is_replaced_after_save(db_session):
+    before = load_snapshot(db_session)
+    assert load_snapshot(db_session) is before
+    save_games([Game(id=1, name="Only Game")], db_session)
+    after = load_snapshot(db_session)
+    assert after is not before and after.version == get_data_version(db_session)
+    assert [g.name for g in get_games_page(db_session).games] == ["Only Game"]
+
+
+@pytest.mark.parametrize("username", [None, "alice"])
+@pytest.mark.parametrize("sort", [None, "my_rating"])
+def test_serialized_games_match_models(db_session, username, sort):
+    from app.main import games_response_json
+    from app.models import GamesResponse
+
+    load_snapshot(db_session)
+    kwargs = dict(sort=sort, order="desc", limit=9, username=username)
+    page = get_games_page(db_session, **kwargs)
+    fast = get_games_page(db_session, as_json=True, **kwargs)
+    assert fast.games == [] and fast.next_cursor == page.next_cursor
+    expected = GamesResponse(games=page.games, total=120, filtered=page.filtered, next_cursor=page.next_cursor)
+    assert games_response_json(fast.games_json, 120, fast.filtered, fast.next_cursor) == (
+        expected.model_dump_json().encode()
+    )